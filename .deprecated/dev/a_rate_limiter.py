@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_rate_limiter.py
+
+Controle adaptativo de taxa por host (AIMD) compartilhado pelos fetchers:
+- Limite de requisições simultâneas por host (float; usa-se floor >= 1)
+- Aumento aditivo (+STF_RATE_INCREASE) a cada "rodada" de respostas
+  saudáveis (uma rodada = limite atual de sucessos seguidos)
+- Redução multiplicativa (x STF_RATE_DECREASE) em 429/5xx, timeouts, erros
+  de navegação do Playwright ou latência acima do teto; no máximo uma redução
+  por janela de latência (rajadas de erro não derrubam o limite a zero)
+- Pausa (cooldown) após redução, respeitando Retry-After quando houver
+- Limite aprendido persistido em disco entre execuções (STF_RATE_STATE_FILE)
+- Decisões registradas em log e expostas em stats()
+
+Uso (sync / threads):
+    ctl = controller_for_url(url)
+    with ctl.acquire() as ticket:
+        resp = session.get(url)
+        ticket.status = resp.status_code
+
+Uso (async):
+    async with ctl.acquire_async() as ticket:
+        ...
+
+Uso (com retry de 429/5xx, um ticket por tentativa):
+    resp = send_with_retries(url, lambda: session.get(url), retries=3)
+
+Exceções dentro do bloco são classificadas (timeout / navegação / HTTP) e
+propagadas normalmente.
+
+Env vars:
+- STF_RATE_LIMIT=true|false          (default true; false = sem controle)
+- STF_RATE_MIN=1 / STF_RATE_MAX=8    (limites de concorrência)
+- STF_RATE_INITIAL=2                 (limite inicial sem estado salvo)
+- STF_RATE_INCREASE=1                (aumento aditivo por rodada saudável)
+- STF_RATE_DECREASE=0.5              (fator multiplicativo de redução)
+- STF_RATE_LATENCY_CEILING_MS=20000  (latência considerada congestionamento)
+- STF_RATE_COOLDOWN_SECONDS=5        (pausa base após redução)
+- STF_RATE_STATE_FILE=/caminho.json  (default ./.rate_state.json ao lado deste arquivo)
+
+Dependências:
+  nenhuma (stdlib)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+
+DEFAULT_STATE_FILE = Path(__file__).resolve().parent / ".rate_state.json"
+
+# Intervalo mínimo entre gravações do estado em disco
+_SAVE_EVERY_SECONDS = 10.0
+
+BACKOFF_STATUS = {429, 500, 502, 503, 504}
+
+# O arquivo de estado é compartilhado por todos os hosts/threads
+_STATE_FILE_LOCK = threading.Lock()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    v = os.getenv(name)
+    if v is None:
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+def classify_exception(exc: BaseException) -> str:
+    """
+    "timeout" | "navigation" | "http:<status>" | "error".
+    Cobre requests/urllib3/httpx, Playwright (sync e async) e asyncio.
+    """
+    name = type(exc).__name__
+    module = type(exc).__module__ or ""
+    if "Timeout" in name or isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is None:
+        m = re.search(r"\bHTTP (\d{3})\b", str(exc))
+        status = int(m.group(1)) if m else None
+    if status is not None:
+        return f"http:{status}"
+    if module.startswith("playwright"):
+        return "navigation"
+    if "Connection" in name:
+        return "navigation"
+    return "error"
+
+
+# =========================
+# Config / ticket
+# =========================
+
+@dataclass(frozen=True)
+class RateConfig:
+    min_limit: float = 1.0
+    max_limit: float = 8.0
+    initial_limit: float = 2.0
+    increase: float = 1.0
+    decrease: float = 0.5
+    latency_ceiling_ms: float = 20_000.0
+    cooldown_seconds: float = 5.0
+    enabled: bool = True
+
+    @classmethod
+    def from_env(cls) -> "RateConfig":
+        min_limit = max(1.0, _env_float("STF_RATE_MIN", 1))
+        max_limit = max(min_limit, _env_float("STF_RATE_MAX", 8))
+        return cls(
+            min_limit=min_limit,
+            max_limit=max_limit,
+            initial_limit=min(max_limit, max(min_limit, _env_float("STF_RATE_INITIAL", 2))),
+            increase=max(0.0, _env_float("STF_RATE_INCREASE", 1)),
+            decrease=min(0.95, max(0.05, _env_float("STF_RATE_DECREASE", 0.5))),
+            latency_ceiling_ms=_env_float("STF_RATE_LATENCY_CEILING_MS", 20_000),
+            cooldown_seconds=max(0.0, _env_float("STF_RATE_COOLDOWN_SECONDS", 5)),
+            enabled=_env_bool("STF_RATE_LIMIT", True),
+        )
+
+
+@dataclass
+class RateTicket:
+    """Preenchido pelo chamador dentro do bloco acquire()."""
+    status: Optional[int] = None
+    retry_after: Optional[float] = None
+    started: float = field(default_factory=time.monotonic)
+
+
+# =========================
+# Controller (AIMD)
+# =========================
+
+class AimdRateController:
+    """
+    Controle AIMD da concorrência para um host. Thread-safe; acquire() bloqueia
+    a thread e acquire_async() cede o event loop enquanto não há vaga.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        config: Optional[RateConfig] = None,
+        *,
+        state_file: Optional[Path] = None,
+    ) -> None:
+        self.host = host
+        self.config = config or RateConfig.from_env()
+        self.state_file = state_file
+        self._cond = threading.Condition()
+        self._limit = self.config.initial_limit
+        self._in_flight = 0
+        self._streak = 0
+        self._cooldown_until = 0.0
+        self._last_decrease = 0.0
+        self._last_save = 0.0
+        self._latency_ewma_ms: Optional[float] = None
+        self._counters: Dict[str, int] = {
+            "requests": 0,
+            "ok": 0,
+            "throttled": 0,
+            "serverErrors": 0,
+            "timeouts": 0,
+            "navigationErrors": 0,
+            "slow": 0,
+            "increases": 0,
+            "decreases": 0,
+        }
+        self._load_state()
+
+    # ---------- persistence ----------
+
+    def _load_state(self) -> None:
+        if self.state_file is None or not self.state_file.exists():
+            return
+        try:
+            saved = json.loads(self.state_file.read_text(encoding="utf-8")).get(self.host) or {}
+        except (OSError, ValueError):
+            return
+        limit = saved.get("limit")
+        if isinstance(limit, (int, float)):
+            self._limit = min(self.config.max_limit, max(self.config.min_limit, float(limit)))
+            log(f"RateLimiter {self.host}: limite aprendido carregado = {self._limit:.2f}")
+
+    def save_state(self, *, force: bool = False) -> None:
+        if self.state_file is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < _SAVE_EVERY_SECONDS:
+            return
+        self._last_save = now
+        with _STATE_FILE_LOCK:
+            try:
+                data = json.loads(self.state_file.read_text(encoding="utf-8")) if self.state_file.exists() else {}
+            except (OSError, ValueError):
+                data = {}
+            data[self.host] = {
+                "limit": round(self._limit, 3),
+                "latencyEwmaMs": round(self._latency_ewma_ms, 1) if self._latency_ewma_ms is not None else None,
+                "updatedAt": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                tmp = self.state_file.with_suffix(".tmp")
+                tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+                os.replace(tmp, self.state_file)
+            except OSError as e:
+                log(f"Aviso: falha ao gravar estado do rate limiter: {e}")
+
+    # ---------- gate ----------
+
+    @property
+    def limit(self) -> float:
+        return self._limit
+
+    def _try_acquire(self) -> float:
+        """Retorna 0 se obteve vaga; senão o tempo sugerido de espera (s)."""
+        now = time.monotonic()
+        if now < self._cooldown_until:
+            return self._cooldown_until - now
+        if self._in_flight < max(1, math.floor(self._limit)):
+            self._in_flight += 1
+            self._counters["requests"] += 1
+            return 0.0
+        return 0.05
+
+    @contextmanager
+    def acquire(self) -> Iterator[RateTicket]:
+        if not self.config.enabled:
+            yield RateTicket()
+            return
+        with self._cond:
+            while True:
+                wait = self._try_acquire()
+                if wait <= 0:
+                    break
+                self._cond.wait(timeout=min(wait, 1.0))
+        ticket = RateTicket()
+        try:
+            yield ticket
+        except BaseException as exc:
+            self._release(ticket, outcome=classify_exception(exc))
+            raise
+        else:
+            self._release(ticket, outcome=None)
+
+    @asynccontextmanager
+    async def acquire_async(self) -> AsyncIterator[RateTicket]:
+        if not self.config.enabled:
+            yield RateTicket()
+            return
+        while True:
+            with self._cond:
+                wait = self._try_acquire()
+            if wait <= 0:
+                break
+            await asyncio.sleep(min(wait, 1.0))
+        ticket = RateTicket()
+        try:
+            yield ticket
+        except BaseException as exc:
+            self._release(ticket, outcome=classify_exception(exc))
+            raise
+        else:
+            self._release(ticket, outcome=None)
+
+    # ---------- AIMD ----------
+
+    def _release(self, ticket: RateTicket, *, outcome: Optional[str]) -> None:
+        latency_ms = (time.monotonic() - ticket.started) * 1000.0
+        if outcome is None and ticket.status is not None and ticket.status in BACKOFF_STATUS:
+            outcome = f"http:{ticket.status}"
+
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            if outcome is None or (outcome.startswith("http:") and int(outcome[5:]) not in BACKOFF_STATUS):
+                self._on_success(latency_ms)
+            else:
+                self._on_congestion(outcome, latency_ms, ticket.retry_after)
+            self._cond.notify_all()
+        self.save_state()
+
+    def _on_success(self, latency_ms: float) -> None:
+        self._latency_ewma_ms = latency_ms if self._latency_ewma_ms is None else (
+            0.8 * self._latency_ewma_ms + 0.2 * latency_ms
+        )
+        if latency_ms > self.config.latency_ceiling_ms:
+            self._counters["slow"] += 1
+            self._decrease(f"latência {latency_ms:.0f} ms", retry_after=None)
+            return
+        self._counters["ok"] += 1
+        self._streak += 1
+        if self._streak >= max(1, math.floor(self._limit)) and self._limit < self.config.max_limit:
+            old = self._limit
+            self._limit = min(self.config.max_limit, self._limit + self.config.increase)
+            self._streak = 0
+            self._counters["increases"] += 1
+            log(f"RateLimiter {self.host}: limite {old:.2f} -> {self._limit:.2f} (saudável, latência média {self._latency_ewma_ms:.0f} ms)")
+
+    def _on_congestion(self, outcome: str, latency_ms: float, retry_after: Optional[float]) -> None:
+        if outcome == "timeout":
+            self._counters["timeouts"] += 1
+        elif outcome == "navigation":
+            self._counters["navigationErrors"] += 1
+        elif outcome == "http:429":
+            self._counters["throttled"] += 1
+        elif outcome.startswith("http:"):
+            self._counters["serverErrors"] += 1
+        else:
+            # Erro sem relação com carga (parse, dado ausente...): não mexe no limite
+            self._streak = 0
+            return
+        self._decrease(outcome, retry_after=retry_after)
+
+    def _decrease(self, reason: str, *, retry_after: Optional[float]) -> None:
+        self._streak = 0
+        now = time.monotonic()
+        # Uma redução por janela: respostas já em voo refletem o limite antigo
+        window = max(1.0, (self._latency_ewma_ms or 1000.0) / 1000.0)
+        if now - self._last_decrease < window:
+            return
+        old = self._limit
+        self._limit = max(self.config.min_limit, self._limit * self.config.decrease)
+        self._last_decrease = now
+        self._counters["decreases"] += 1
+        cooldown = retry_after if retry_after is not None else self.config.cooldown_seconds
+        self._cooldown_until = max(self._cooldown_until, now + cooldown)
+        log(f"RateLimiter {self.host}: limite {old:.2f} -> {self._limit:.2f} ({reason}; pausa {cooldown:.1f}s)")
+
+    # ---------- metrics ----------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "host": self.host,
+                "limit": round(self._limit, 3),
+                "inFlight": self._in_flight,
+                "latencyEwmaMs": round(self._latency_ewma_ms, 1) if self._latency_ewma_ms is not None else None,
+                **self._counters,
+            }
+
+    def summary(self) -> str:
+        st = self.stats()
+        return (
+            f"rate {st['host']}: limite={st['limit']} | req={st['requests']} ok={st['ok']} | "
+            f"429={st['throttled']} 5xx={st['serverErrors']} timeout={st['timeouts']} nav={st['navigationErrors']} | "
+            f"+{st['increases']}/-{st['decreases']}"
+        )
+
+
+# =========================
+# Registro por host
+# =========================
+
+_CONTROLLERS: Dict[str, AimdRateController] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def controller_for_host(host: str) -> AimdRateController:
+    host = (host or "").lower()
+    with _REGISTRY_LOCK:
+        ctl = _CONTROLLERS.get(host)
+        if ctl is None:
+            state_file = Path(os.getenv("STF_RATE_STATE_FILE") or DEFAULT_STATE_FILE)
+            ctl = AimdRateController(host, state_file=state_file)
+            _CONTROLLERS[host] = ctl
+        return ctl
+
+
+def controller_for_url(url: str) -> AimdRateController:
+    return controller_for_host(urlparse(url).hostname or "")
+
+
+def retry_after_seconds(headers: Optional[Dict[str, str]]) -> Optional[float]:
+    for k, v in (headers or {}).items():
+        if str(k).lower() == "retry-after":
+            try:
+                return max(0.0, float(v))
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def send_with_retries(url: str, send: Callable[[], Any], *, retries: int = 3) -> Any:
+    """
+    Executa send() (retorna uma resposta com status_code/headers) ocupando um
+    ticket do controle do host por tentativa. 429/5xx são registrados no AIMD
+    e repetidos até `retries` vezes; a espera entre tentativas é o cooldown do
+    próprio controle (que respeita Retry-After). Retorna a última resposta.
+    """
+    ctl = controller_for_url(url)
+    attempt = 0
+    while True:
+        with ctl.acquire() as ticket:
+            resp = send()
+            ticket.status = resp.status_code
+            ticket.retry_after = retry_after_seconds(resp.headers)
+        if resp.status_code not in BACKOFF_STATUS or attempt >= retries:
+            return resp
+        attempt += 1
+        log(f"RateLimiter {ctl.host}: HTTP {resp.status_code}; nova tentativa {attempt}/{retries}")
+        if not ctl.config.enabled:
+            # Sem controle (STF_RATE_LIMIT=false) não há cooldown: backoff exponencial simples
+            time.sleep(ticket.retry_after or 0.5 * 2 ** (attempt - 1))
+
+
+def all_stats() -> Dict[str, Dict[str, Any]]:
+    with _REGISTRY_LOCK:
+        controllers = list(_CONTROLLERS.values())
+    return {ctl.host: ctl.stats() for ctl in controllers}
+
+
+def save_all() -> None:
+    with _REGISTRY_LOCK:
+        controllers = list(_CONTROLLERS.values())
+    for ctl in controllers:
+        ctl.save_state(force=True)
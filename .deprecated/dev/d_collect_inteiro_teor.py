@@ -11,28 +11,54 @@ Pipeline:
    - Resolver redirect com requests.Session() usando headers (User-Agent/Accept/Referer)
    - (Opcional) SSL via certifi / STF_SSL_VERIFY=false
 5) Fazer download do PDF usando requests com stream=True
+   - Grava em <arquivo>.part e retoma downloads interrompidos com Range +
+     If-Range (ETag/Last-Modified da parte, em <arquivo>.part.json); parte
+     sem validador ou de outra versão do PDF é descartada
+     (PDF_DOWNLOAD_RETRIES tentativas por arquivo)
+   - Arquivo já em disco com o sha256 gravado no documento: não baixa de novo
+   - PDF idêntico (mesmo sha256) a outro documento: reaproveita o arquivo existente
 6) Atualizar o documento em case_data com URLs e metadados do arquivo
 
+PDF_CONCURRENT=true processa vários documentos em paralelo (claim atômico
+extracted -> pdf_collecting), com PDF_WORKERS downloads em voo e um único
+Chromium compartilhado para capturar as URLs JSP. Claims em pdf_collecting
+mais antigos que PDF_CLAIM_STALE_MINUTES (processo interrompido) voltam
+para extracted no início da execução.
+
 Env vars:
-- STF_SSL_VERIFY=true|false (default true)
+- STF_SSL_VERIFY=true|false (default true) / HTTP_POOL_* / HTTP_RETRIES (ver a_http_client.py)
 - STF_PDF_DIR=/caminho/para/salvar/pdfs (default /workspaces/cito/poc/v-a33-240125/data/pdfs)
+- STF_REQUEST_FILTER / STF_BLOCK_* / STF_ALLOW_URL_PATTERNS (ver a_request_filter.py)
+- HTTP_CACHE / HTTP_CACHE_DIR / HTTP_CACHE_TTL_HOURS / HTTP_CACHE_MAX_MB (ver a_http_cache.py)
+- STF_RATE_LIMIT / STF_RATE_* (controle adaptativo de taxa por host, ver a_rate_limiter.py)
+- PDF_CONCURRENT=true|false (default false)
+- PDF_WORKERS (default 4)             # documentos/downloads em paralelo
+- PDF_MAX_DOCS (default 0 = todos)    # limite de documentos no modo concorrente
+- PDF_DOWNLOAD_RETRIES (default 3)    # retomadas por arquivo após falha de rede
+- PDF_CLAIM_STALE_MINUTES (default 60) # idade de um claim pdf_collecting considerado abandonado
 """
 
 import asyncio
 import hashlib
+import json
 import os
 import re
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
 
-import certifi
 import requests
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 from pymongo.collection import Collection
 from pymongo.errors import PyMongoError
 
+from a_http_cache import HTTP_CACHE
+from a_http_client import get_session
+from a_rate_limiter import controller_for_url, retry_after_seconds, save_all as save_rate_state
+from a_request_filter import RequestFilterPolicy, install_route_filter_async
+
 
 # =========================
 # Mongo (fixo)
@@ -46,6 +72,7 @@ CASE_DATA_COLLECTION = "case_data"
 STATUS_INPUT = "extracted"
 STATUS_OK = "pdf_collected"
 STATUS_ERROR = "pdf_error"
+STATUS_CLAIMED = "pdf_collecting"
 
 # =========================
 # Playwright
@@ -55,6 +82,12 @@ USER_AGENT = (
     "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 )
 VIEWPORT = {"width": 1920, "height": 1080}
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--window-size=1920,1080",
+]
 
 # Mesma lógica do seu coletor: múltiplos seletores (inclui xpath genérico)
 SELECTORS = [
@@ -69,49 +102,96 @@ SELECTORS = [
 DOWNLOAD_DIR = Path(os.getenv("STF_PDF_DIR", "/workspaces/cito/poc/v-a33-240125/data/pdfs"))
 DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+PDF_CONCURRENT = os.getenv("PDF_CONCURRENT", "false").strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
+PDF_WORKERS = max(1, int(os.getenv("PDF_WORKERS", "4") or 4))
+PDF_MAX_DOCS = max(0, int(os.getenv("PDF_MAX_DOCS", "0") or 0))
+PDF_DOWNLOAD_RETRIES = max(0, int(os.getenv("PDF_DOWNLOAD_RETRIES", "3") or 0))
+PDF_CLAIM_STALE_MINUTES = max(1, int(os.getenv("PDF_CLAIM_STALE_MINUTES", "60") or 60))
+
+CHUNK_SIZE = 1024 * 256
+
 
 # =========================
 # Helpers
 # =========================
-def _env_bool(name: str, default: bool) -> bool:
-    v = os.getenv(name)
-    if v is None:
-        return default
-    return v.strip().lower() in ("1", "true", "yes", "y", "on")
+def _safe_filename(s: str) -> str:
+    s = re.sub(r"[^a-zA-Z0-9._-]+", "_", (s or "").strip())
+    return s[:180] if s else "documento"
 
 
-def _requests_verify_opt() -> Any:
-    """
-    - certifi.where() por padrão
-    - False se STF_SSL_VERIFY=false
-    """
-    ssl_verify = _env_bool("STF_SSL_VERIFY", True)
-    if not ssl_verify:
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        return False
-    return certifi.where()
+def _file_sha256(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
 
 
-def _safe_filename(s: str) -> str:
-    s = re.sub(r"[^a-zA-Z0-9._-]+", "_", (s or "").strip())
-    return s[:180] if s else "documento"
+def _pdf_ext(final_url: str, content_type: str) -> str:
+    return ".pdf" if (".pdf" in (final_url or "").lower() or "pdf" in (content_type or "")) else ".bin"
+
+
+def _existing_download(file_path: Optional[str], expected_sha256: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Metadados do arquivo já em disco se o sha256 bate com o esperado; senão None."""
+    if not file_path or not expected_sha256:
+        return None
+    path = Path(file_path)
+    if not path.is_file() or _file_sha256(path) != expected_sha256:
+        return None
+    return {
+        "finalUrl": "",
+        "filePath": str(path),
+        "sizeBytes": path.stat().st_size,
+        "sha256": expected_sha256,
+        "contentType": "application/pdf" if path.suffix == ".pdf" else "",
+        "skipped": True,
+    }
+
+
+def _range_total(content_range: Optional[str]) -> Optional[int]:
+    """Tamanho total em 'bytes 100-199/1234' ou 'bytes */1234'."""
+    m = re.search(r"/(\d+)\s*$", content_range or "")
+    return int(m.group(1)) if m else None
+
 
+def _part_validator_path(part_path: Path) -> Path:
+    return part_path.with_name(part_path.name + ".json")
 
-def _build_requests_session(referer: str) -> requests.Session:
+
+def _if_range_validator(headers: Any) -> Optional[str]:
+    """Valor para If-Range: ETag forte ou, na falta dele, Last-Modified (ETag fraco não vale em If-Range)."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _load_part_validator(part_path: Path) -> Optional[str]:
+    try:
+        return json.loads(_part_validator_path(part_path).read_text(encoding="utf-8")).get("ifRange")
+    except (OSError, ValueError):
+        return None
+
+
+def _save_part_validator(part_path: Path, validator: Optional[str]) -> None:
+    _part_validator_path(part_path).write_text(json.dumps({"ifRange": validator}), encoding="utf-8")
+
+
+def _discard_part(part_path: Path) -> None:
+    part_path.unlink(missing_ok=True)
+    _part_validator_path(part_path).unlink(missing_ok=True)
+
+
+def _request_headers(referer: str, *, accept: Optional[str] = None) -> Dict[str, str]:
     """
-    Replica a estratégia do seu coletor: requests.Session com headers.
-    Importante: inclui Referer para reduzir chance de 403.
+    Headers por requisição sobre a sessão compartilhada (a_http_client.get_session):
+    a conexão keep-alive/TLS é reaproveitada entre casos; o Referer muda por caso
+    e reduz a chance de 403.
     """
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Referer": referer,
-        "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Connection": "keep-alive",
-    })
-    return session
+    headers = {"User-Agent": USER_AGENT, "Referer": referer}
+    if accept:
+        headers["Accept"] = accept
+    return headers
 
 
 # =========================
@@ -120,13 +200,60 @@ def _build_requests_session(referer: str) -> requests.Session:
 def get_case_data_collection() -> Collection:
     client = MongoClient(MONGO_URI)
     db = client[DB_NAME]
-    return db[CASE_DATA_COLLECTION]
+    col = db[CASE_DATA_COLLECTION]
+    ensure_pdf_indexes(col)
+    return col
+
+
+def ensure_pdf_indexes(col: Collection) -> None:
+    """Índice do find_duplicate_pdf (consulta por sha256 a cada download); criado uma vez no início."""
+    try:
+        col.create_index([("inteiroTeorPdfSha256", 1)], name="idx_inteiro_teor_pdf_sha256", sparse=True)
+    except PyMongoError as e:
+        print(f"⚠️ Falha ao criar índice de inteiroTeorPdfSha256: {e}")
 
 
 def fetch_oldest_case_extracted(col: Collection) -> Optional[Dict[str, Any]]:
     return col.find_one({"status": STATUS_INPUT}, sort=[("_id", 1)])
 
 
+def claim_oldest_case_extracted(col: Collection) -> Optional[Dict[str, Any]]:
+    """Claim atômico (extracted -> pdf_collecting): seguro com vários workers."""
+    return col.find_one_and_update(
+        {"status": STATUS_INPUT},
+        {"$set": {"status": STATUS_CLAIMED, "inteiroTeorClaimedAt": datetime.now(timezone.utc)}},
+        sort=[("_id", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def requeue_stale_claims(col: Collection) -> int:
+    """
+    Devolve para extracted os docs presos em pdf_collecting por um processo
+    que morreu (claim mais antigo que PDF_CLAIM_STALE_MINUTES).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=PDF_CLAIM_STALE_MINUTES)
+    res = col.update_many(
+        {"status": STATUS_CLAIMED, "inteiroTeorClaimedAt": {"$lt": cutoff}},
+        {"$set": {"status": STATUS_INPUT}, "$inc": {"inteiroTeorClaimRequeued": 1}},
+    )
+    if res.modified_count:
+        print(f"♻️ {res.modified_count} claim(s) '{STATUS_CLAIMED}' abandonado(s) devolvido(s) para '{STATUS_INPUT}'")
+    return res.modified_count
+
+
+def find_duplicate_pdf(col: Collection, doc_id, sha256: str) -> Optional[Dict[str, Any]]:
+    """Outro documento com o mesmo PDF (sha256) e arquivo ainda em disco."""
+    for other in col.find(
+        {"inteiroTeorPdfSha256": sha256, "_id": {"$ne": doc_id}},
+        projection={"inteiroTeorPdfFilePath": 1},
+    ):
+        path = other.get("inteiroTeorPdfFilePath")
+        if path and Path(path).is_file():
+            return other
+    return None
+
+
 def mark_case_pdf_error(col: Collection, doc_id, *, error_msg: str) -> None:
     col.update_one(
         {"_id": doc_id},
@@ -159,6 +286,7 @@ def mark_case_pdf_success_with_download(
             "inteiroTeorPdfSha256": download_meta.get("sha256", ""),
             "inteiroTeorPdfContentType": download_meta.get("contentType", ""),
             "inteiroTeorPdfDownloadedAt": datetime.now(timezone.utc),
+            "inteiroTeorPdfDuplicateOf": download_meta.get("duplicateOf"),
 
             "status": STATUS_OK,
         }}
@@ -166,141 +294,362 @@ def mark_case_pdf_success_with_download(
 
 
 # =========================
-# Core: resolve redirect + download (MESMA abordagem do seu coletor)
+# Core: download (MESMA abordagem do seu coletor)
 # =========================
-def resolve_final_url_from_jsp(jsp_url: str, *, referer: str) -> str:
-    """
-    MESMA solução do seu coletor:
-    - requests.Session()
-    - allow_redirects=True
-    - headers (User-Agent/Accept/Referer)
-    Retorna a URL final após redirects.
-    """
-    session = _build_requests_session(referer)
-    resp = session.get(
-        jsp_url,
-        allow_redirects=True,
-        timeout=45,
-        verify=_requests_verify_opt(),
-    )
-    resp.raise_for_status()
-    return resp.url
-
-
 def download_pdf(
     *,
     jsp_url: str,
     referer: str,
     output_dir: Path,
     filename_base: str,
+    expected_sha256: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Faz download via requests (stream=True) partindo do JSP, seguindo redirects.
     Contorna o problema usando a mesma estratégia do seu coletor (Session + headers + redirects).
+    Com HTTP_CACHE=true, um PDF já baixado para o mesmo JSP é copiado do cache local.
+
+    O conteúdo é gravado em <arquivo>.part; após falha de rede o download é
+    retomado do ponto em que parou (Range + If-Range com o validador da parte).
+    Com expected_sha256, um arquivo final já em disco com esse hash é
+    reaproveitado sem requisição.
     """
-    session = _build_requests_session(referer)
+    safe_base = _safe_filename(filename_base)
+    for ext in (".pdf", ".bin"):
+        existing = _existing_download(str(output_dir / (safe_base + ext)), expected_sha256)
+        if existing is not None:
+            return existing
+
+    cached = HTTP_CACHE.get(jsp_url, kind="pdf")
+    if cached is not None:
+        final_url = cached.meta.get("finalUrl") or jsp_url
+        content_type = cached.content_type or ""
+        file_path = output_dir / (safe_base + _pdf_ext(final_url, content_type))
+        file_path.write_bytes(cached.body)
+        return {
+            "finalUrl": final_url,
+            "filePath": str(file_path),
+            "sizeBytes": len(cached.body),
+            "sha256": cached.sha256,
+            "contentType": content_type,
+        }
 
     # Para download, ajusta Accept para PDF
-    session.headers.update({
-        "Accept": "application/pdf,application/octet-stream,*/*;q=0.8",
-    })
-
-    resp = session.get(
-        jsp_url,
-        allow_redirects=True,
-        timeout=60,
-        verify=_requests_verify_opt(),
-        stream=True,
-    )
-    resp.raise_for_status()
-
-    final_url = resp.url
-    content_type = (resp.headers.get("Content-Type") or "").lower()
-
-    ext = ".pdf" if (".pdf" in final_url.lower() or "pdf" in content_type) else ".bin"
-    filename = _safe_filename(filename_base) + ext
-    file_path = output_dir / filename
-
-    sha = hashlib.sha256()
-    size = 0
+    headers = _request_headers(referer, accept="application/pdf,application/octet-stream,*/*;q=0.8")
+    part_path = output_dir / (safe_base + ".part")
+    resumed_from = part_path.stat().st_size if part_path.exists() else 0
 
-    with open(file_path, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=1024 * 256):
-            if not chunk:
-                continue
-            f.write(chunk)
-            sha.update(chunk)
-            size += len(chunk)
+    for attempt in range(PDF_DOWNLOAD_RETRIES + 1):
+        try:
+            final_url, content_type, status = _download_to_part(jsp_url, headers, part_path)
+            break
+        except requests.HTTPError as e:
+            code = e.response.status_code if e.response is not None else None
+            if code is not None and 400 <= code < 500 and code != 429:
+                raise
+            if attempt >= PDF_DOWNLOAD_RETRIES:
+                raise
+            err = e
+        except (requests.RequestException, IOError) as e:
+            if attempt >= PDF_DOWNLOAD_RETRIES:
+                raise
+            err = e
+        done = part_path.stat().st_size if part_path.exists() else 0
+        print(f"⚠️ Download interrompido ({err}); retomando de {done} bytes (tentativa {attempt + 2})")
+        time.sleep(min(30, 2 ** attempt))
+
+    file_path = output_dir / (safe_base + _pdf_ext(final_url, content_type))
+    os.replace(part_path, file_path)
+    _part_validator_path(part_path).unlink(missing_ok=True)
+    sha256 = _file_sha256(file_path)
+    size = file_path.stat().st_size
+
+    if HTTP_CACHE.enabled:
+        HTTP_CACHE.put(
+            jsp_url,
+            file_path.read_bytes(),
+            kind="pdf",
+            status=status,
+            content_type=content_type,
+            meta={"finalUrl": final_url},
+        )
 
     return {
         "finalUrl": final_url,
         "filePath": str(file_path),
         "sizeBytes": size,
-        "sha256": sha.hexdigest(),
+        "sha256": sha256,
         "contentType": content_type,
+        "resumedFromBytes": resumed_from,
     }
 
 
+def _download_to_part(jsp_url: str, headers: Dict[str, str], part_path: Path) -> Tuple[str, str, int]:
+    """
+    Uma tentativa de download para part_path, continuando do tamanho atual
+    do arquivo (Range: bytes=N-) com If-Range = validador gravado quando a
+    parte começou. Se o PDF mudou, o servidor responde 200 com o arquivo
+    inteiro, que é reescrito do zero (o mesmo quando ignora o Range).
+    Parte sem validador não é retomada. Retorna (url final, content-type, status).
+
+    Raises:
+        IOError: se a conexão terminar antes do tamanho anunciado ou se um 206
+            vier com validador diferente do da parte
+    """
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    validator = _load_part_validator(part_path) if offset else None
+    if offset and not validator:
+        # Sem ETag/Last-Modified não há como saber se a parte é da mesma versão do PDF
+        _discard_part(part_path)
+        offset = 0
+    req_headers = dict(headers)
+    if offset:
+        req_headers["Range"] = f"bytes={offset}-"
+        req_headers["If-Range"] = validator
+
+    with controller_for_url(jsp_url).acquire() as ticket, get_session().get(
+        jsp_url,
+        headers=req_headers,
+        allow_redirects=True,
+        timeout=60,
+        stream=True,
+    ) as resp:
+        ticket.status = resp.status_code
+        ticket.retry_after = retry_after_seconds(resp.headers)
+        content_type = (resp.headers.get("Content-Type") or "").lower()
+
+        if resp.status_code == 416 and offset:
+            # Range além do fim: a parte já está completa se o total bate
+            if _range_total(resp.headers.get("Content-Range")) == offset:
+                return resp.url, content_type or "application/pdf", resp.status_code
+            _discard_part(part_path)
+            raise IOError("Range recusado pelo servidor; reiniciando download do zero")
+        resp.raise_for_status()
+
+        if resp.status_code == 206:
+            fresh = _if_range_validator(resp.headers)
+            if fresh and fresh != validator:
+                # Servidor que ignora If-Range: o 206 é de outra versão do PDF
+                _discard_part(part_path)
+                raise IOError("PDF mudou desde o início do download; reiniciando do zero")
+            mode = "ab"
+            total = _range_total(resp.headers.get("Content-Range"))
+        else:
+            mode, offset = "wb", 0
+            length = resp.headers.get("Content-Length")
+            total = int(length) if length and length.isdigit() else None
+            _save_part_validator(part_path, _if_range_validator(resp.headers))
+
+        written = offset
+        with open(part_path, mode) as f:
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                if not chunk:
+                    continue
+                f.write(chunk)
+                written += len(chunk)
+
+        if total is not None and written != total:
+            raise IOError(f"download incompleto: {written}/{total} bytes")
+        return resp.url, content_type, resp.status_code
+
+
 # =========================
 # Playwright: capturar JSP via popup
 # =========================
-async def capture_jsp_url(case_url: str) -> str:
+async def capture_jsp_url(case_url: str, browser=None) -> str:
+    """
+    Abre o processo, clica em "Inteiro teor" e retorna a URL JSP do popup.
+    Com browser (Chromium já lançado), usa um contexto novo dele em vez de
+    lançar um navegador por chamada.
+    """
+    if browser is not None:
+        return await _capture_jsp_url(browser, case_url)
+
     async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-                "--window-size=1920,1080",
-            ],
-        )
+        browser = await p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        try:
+            return await _capture_jsp_url(browser, case_url)
+        finally:
+            await browser.close()
 
-        context = await browser.new_context(
-            viewport=VIEWPORT,
-            user_agent=USER_AGENT,
-            extra_http_headers={"accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"},
-        )
-        page = await context.new_page()
 
-        try:
-            await page.goto(case_url, wait_until="networkidle", timeout=60000)
-            await page.wait_for_timeout(5000)
-
-            elemento = None
-            for sel in SELECTORS:
-                try:
-                    if sel.startswith("//*"):
-                        elemento = await page.wait_for_selector(f"xpath={sel}", timeout=12000)
-                    else:
-                        # no seu coletor, aqui era query_selector para CSS; wait_for_selector é mais robusto
-                        elemento = await page.wait_for_selector(sel, timeout=12000)
-                    if elemento:
-                        break
-                except PlaywrightTimeoutError:
-                    continue
+async def _capture_jsp_url(browser, case_url: str) -> str:
+    context = await browser.new_context(
+        viewport=VIEWPORT,
+        user_agent=USER_AGENT,
+        extra_http_headers={"accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"},
+    )
+    # No contexto: cobre também o popup do JSP
+    filter_stats = await install_route_filter_async(context, RequestFilterPolicy.from_env())
+    page = await context.new_page()
+
+    try:
+        await page.goto(case_url, wait_until="networkidle", timeout=60000)
+        await page.wait_for_timeout(5000)
+
+        elemento = None
+        for sel in SELECTORS:
+            try:
+                if sel.startswith("//*"):
+                    elemento = await page.wait_for_selector(f"xpath={sel}", timeout=12000)
+                else:
+                    # no seu coletor, aqui era query_selector para CSS; wait_for_selector é mais robusto
+                    elemento = await page.wait_for_selector(sel, timeout=12000)
+                if elemento:
+                    break
+            except PlaywrightTimeoutError:
+                continue
+
+        if not elemento:
+            raise Exception("Elemento 'Inteiro teor' não encontrado (selectors esgotados).")
 
-            if not elemento:
-                raise Exception("Elemento 'Inteiro teor' não encontrado (selectors esgotados).")
+        async with page.expect_popup(timeout=20000) as popup_info:
+            await elemento.click()
 
-            async with page.expect_popup(timeout=20000) as popup_info:
-                await elemento.click()
+        new_page = await popup_info.value
+        await new_page.wait_for_load_state("networkidle", timeout=60000)
+        await new_page.wait_for_timeout(2000)
 
-            new_page = await popup_info.value
-            await new_page.wait_for_load_state("networkidle", timeout=60000)
-            await new_page.wait_for_timeout(2000)
+        jsp_url = new_page.url
+        await new_page.close()
+        print(f"🧹 Filtro de requisições: {filter_stats.summary()}")
 
-            jsp_url = new_page.url
-            await new_page.close()
+        if not jsp_url:
+            raise Exception("Popup abriu, mas não foi possível obter a URL JSP.")
 
-            if not jsp_url:
-                raise Exception("Popup abriu, mas não foi possível obter a URL JSP.")
+        return jsp_url
 
-            return jsp_url
+    finally:
+        await context.close()
 
+
+# =========================
+# Coleta de um documento
+# =========================
+async def collect_doc(col: Collection, doc: Dict[str, Any], *, browser=None, prefix: str = "") -> Dict[str, Any]:
+    """
+    Captura o JSP, baixa o PDF e atualiza o documento. Levanta em erro
+    (o chamador marca pdf_error). Retorna os metadados do download
+    ("skipped"=True quando o arquivo em disco já tinha o hash gravado).
+    """
+    doc_id = doc["_id"]
+    case_url = (doc.get("caseUrl") or "").strip()
+    if not case_url:
+        raise ValueError("Documento não possui 'caseUrl' preenchido.")
+
+    # 0) PDF já em disco com o hash gravado: nada a buscar
+    existing = await asyncio.to_thread(
+        _existing_download, doc.get("inteiroTeorPdfFilePath"), doc.get("inteiroTeorPdfSha256")
+    )
+    if existing is not None:
+        print(f"{prefix}⏭️ PDF já em disco com sha256 conferido: {existing['filePath']}")
+        await asyncio.to_thread(
+            mark_case_pdf_success_with_download,
+            col,
+            doc_id,
+            jsp_url=doc.get("inteiroTeorJspUrl") or "",
+            pdf_final_url=doc.get("inteiroTeorPdfFinalUrl") or "",
+            download_meta=existing,
+        )
+        return existing
+
+    # 1) Captura JSP via Playwright (igual ao seu coletor)
+    jsp_url = await capture_jsp_url(case_url, browser=browser)
+    print(f"{prefix}✅ URL JSP: {jsp_url}")
+
+    # 2) Download (stream, retomável) - mesma estratégia Session+headers+redirects;
+    #    a URL final após redirects vem do próprio download
+    stf_id = (doc.get("stfDecisionId") or "").strip()
+    filename_base = f"{stf_id or str(doc_id)}_inteiro_teor"
+
+    print(f"{prefix}⬇️ Baixando PDF para: {DOWNLOAD_DIR} ...")
+    dl_meta = await asyncio.to_thread(
+        download_pdf,
+        jsp_url=jsp_url,
+        referer=case_url,
+        output_dir=DOWNLOAD_DIR,
+        filename_base=filename_base,
+        expected_sha256=doc.get("inteiroTeorPdfSha256"),
+    )
+
+    # 3) Dedupe: mesmo PDF já baixado para outro documento
+    if not dl_meta.get("skipped"):
+        dup = await asyncio.to_thread(find_duplicate_pdf, col, doc_id, dl_meta["sha256"])
+        if dup is not None and dup["inteiroTeorPdfFilePath"] != dl_meta["filePath"]:
+            Path(dl_meta["filePath"]).unlink(missing_ok=True)
+            dl_meta["filePath"] = dup["inteiroTeorPdfFilePath"]
+            dl_meta["duplicateOf"] = dup["_id"]
+            print(f"{prefix}♻️ PDF idêntico ao de _id={dup['_id']}; reaproveitando {dl_meta['filePath']}")
+
+    pdf_final_url = dl_meta["finalUrl"] or jsp_url
+    print(f"{prefix}✅ URL PDF final: {pdf_final_url}")
+    print(f"{prefix}✅ Download OK: {dl_meta['filePath']}")
+    print(f"{prefix}📦 sizeBytes: {dl_meta['sizeBytes']}")
+    print(f"{prefix}🔐 sha256: {dl_meta['sha256']}")
+    if dl_meta.get("resumedFromBytes"):
+        print(f"{prefix}↪️ retomado de {dl_meta['resumedFromBytes']} bytes")
+
+    # 4) Atualiza Mongo
+    await asyncio.to_thread(
+        mark_case_pdf_success_with_download,
+        col,
+        doc_id,
+        jsp_url=jsp_url,
+        pdf_final_url=pdf_final_url,
+        download_meta=dl_meta,
+    )
+    return dl_meta
+
+
+# =========================
+# Modo concorrente
+# =========================
+async def _pdf_worker(worker_id: int, col: Collection, browser, counters: Dict[str, int]) -> None:
+    prefix = f"[w{worker_id}] "
+    while True:
+        if PDF_MAX_DOCS and counters["claimed"] >= PDF_MAX_DOCS:
+            return
+        counters["claimed"] += 1
+        doc = await asyncio.to_thread(claim_oldest_case_extracted, col)
+        if not doc:
+            counters["claimed"] -= 1
+            return
+
+        doc_id = doc["_id"]
+        try:
+            meta = await collect_doc(col, doc, browser=browser, prefix=prefix)
+            counters["skipped" if meta.get("skipped") else "ok"] += 1
+            counters["bytes"] += 0 if meta.get("skipped") else int(meta.get("sizeBytes") or 0)
+            print(f"{prefix}🗃️ {doc_id}: status='{STATUS_OK}'")
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            raise
+        except Exception as e:
+            counters["errors"] += 1
+            print(f"{prefix}❌ {doc_id}: {e}")
+            await asyncio.to_thread(mark_case_pdf_error, col, doc_id, error_msg=str(e))
+
+
+async def run_concurrent(col: Collection) -> int:
+    """PDF_WORKERS documentos em paralelo, um Chromium compartilhado para capturar os JSPs."""
+    print(f"⚡ Coleta concorrente: workers={PDF_WORKERS} | limite={PDF_MAX_DOCS or 'todos'}")
+    counters = {"claimed": 0, "ok": 0, "skipped": 0, "errors": 0, "bytes": 0}
+    await asyncio.to_thread(requeue_stale_claims, col)
+    t0 = time.monotonic()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        try:
+            await asyncio.gather(*(_pdf_worker(i, col, browser, counters) for i in range(1, PDF_WORKERS + 1)))
         finally:
             await browser.close()
 
+    elapsed = time.monotonic() - t0
+    mb = counters["bytes"] / (1024 * 1024)
+    print(
+        f"🏁 Finalizado em {elapsed:.1f}s | ok={counters['ok']} | já em disco={counters['skipped']} | "
+        f"erros={counters['errors']} | {mb:.1f} MB ({mb / elapsed if elapsed else 0:.2f} MB/s)"
+    )
+    return 0 if not counters["errors"] else 1
+
 
 # =========================
 # Main
@@ -311,6 +660,9 @@ async def main() -> int:
 
     try:
         col = get_case_data_collection()
+        if PDF_CONCURRENT:
+            return await run_concurrent(col)
+
         doc = fetch_oldest_case_extracted(col)
 
         if not doc:
@@ -318,62 +670,17 @@ async def main() -> int:
             return 0
 
         doc_id = doc["_id"]
-        case_url = (doc.get("caseUrl") or "").strip()
 
         print(f"Mongo target: db={DB_NAME} collection={CASE_DATA_COLLECTION}")
         print(f"Doc selecionado: _id={doc_id} status={doc.get('status')}")
-        print(f"caseUrl: {case_url}")
+        print(f"caseUrl: {(doc.get('caseUrl') or '').strip()}")
         print("🌐 Iniciando coleta do Inteiro Teor (headless)...")
 
-        if not case_url:
-            msg = "Documento não possui 'caseUrl' preenchido."
-            print(f"❌ {msg}")
-            mark_case_pdf_error(col, doc_id, error_msg=msg)
-            return 1
-
-        # 1) Captura JSP via Playwright (igual ao seu coletor)
-        jsp_url = await capture_jsp_url(case_url)
-        print("✅ URL JSP:", jsp_url)
-
-        # 2) Resolve URL final (opcional, mas útil para log)
-        # (o download abaixo já retorna finalUrl)
-        try:
-            pdf_final_url = resolve_final_url_from_jsp(jsp_url, referer=case_url)
-            print("✅ URL final (redirect):", pdf_final_url)
-        except Exception as e:
-            # Não bloqueia; o download pode ainda funcionar e descobrir a final
-            print(f"⚠️ Falha ao resolver redirect antes do download: {e}")
-            pdf_final_url = ""
-
-        # 3) Download (stream) - mesma estratégia Session+headers+redirects
-        stf_id = (doc.get("stfDecisionId") or "").strip()
-        filename_base = f"{stf_id or str(doc_id)}_inteiro_teor"
-
-        print(f"⬇️ Baixando PDF para: {DOWNLOAD_DIR} ...")
-        dl_meta = download_pdf(
-            jsp_url=jsp_url,
-            referer=case_url,
-            output_dir=DOWNLOAD_DIR,
-            filename_base=filename_base,
-        )
-
-        pdf_final_url = dl_meta["finalUrl"] or pdf_final_url
-
-        print("✅ URL PDF final:", pdf_final_url)
-        print("✅ Download OK:", dl_meta["filePath"])
-        print("📦 sizeBytes:", dl_meta["sizeBytes"])
-        print("🔐 sha256:", dl_meta["sha256"])
-
-        # 4) Atualiza Mongo
-        mark_case_pdf_success_with_download(
-            col,
-            doc_id,
-            jsp_url=jsp_url,
-            pdf_final_url=pdf_final_url,
-            download_meta=dl_meta,
-        )
+        await collect_doc(col, doc)
 
         print(f"🗃️ Atualizado no MongoDB: status='{STATUS_OK}'")
+        if HTTP_CACHE.enabled:
+            print(f"📦 HTTP cache: {HTTP_CACHE.stats().summary()}")
         return 0
 
     except PyMongoError as e:
@@ -390,6 +697,10 @@ async def main() -> int:
             mark_case_pdf_error(col, doc_id, error_msg=msg)
         return 1
 
+    finally:
+        # Persiste o limite aprendido para a próxima execução
+        save_rate_state()
+
 
 if __name__ == "__main__":
     exit_code = asyncio.run(main())
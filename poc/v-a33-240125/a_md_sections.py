@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_md_sections.py
+
+Tokenizador único das seções "#### Título" do Markdown de um processo:
+- iter_section_spans(): uma passada (regex multiline no texto inteiro, sem
+  split/re.match por linha) que devolve (título, início, fim) do corpo de
+  cada seção, em offsets do próprio texto
+- parse_sections(): {título: conteúdo} com a mesma saída do split antigo
+  linha a linha (títulos com espaços normalizados, linhas com rstrip,
+  conteúdo com strip, títulos repetidos concatenados, seções vazias omitidas)
+
+Os mapeamentos de campos (rawData/caseData, caseContent.*, caseData.*) são
+derivados do mesmo dict, sem re-tokenizar o Markdown.
+
+Uso:
+    sections = parse_sections(md_text)
+    raw_data, case_data = build_raw_and_case_data(sections)
+    content_fields = map_case_content(sections)
+
+CLI (compara com o split linha a linha e mede o tempo):
+    python a_md_sections.py caso1.md [caso2.md ...]
+
+Dependências:
+  nenhuma (stdlib)
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# Quebras de linha de str.splitlines() (o split antigo usava splitlines)
+_NEWLINES = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+# "#### Título" + a quebra de linha que o encerra; o título precisa de ao menos um
+# caractere não-branco (uma linha "####   " não abre seção, como no split antigo
+# após rstrip). Começa pelo literal "####" para a busca rápida do re; o início de
+# linha é conferido em iter_section_spans.
+_HEADER_RE = re.compile(rf"####[^\S{_NEWLINES}]+(\S[^{_NEWLINES}]*)(?:\r\n|[{_NEWLINES}])?")
+
+_WS_RE = re.compile(r"\s+")
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+def _clean_ws(s: str) -> str:
+    return _WS_RE.sub(" ", s or "").strip()
+
+
+class SectionSpan(NamedTuple):
+    title: str
+    start: int  # início do corpo (linha seguinte ao título)
+    end: int    # início da próxima linha de título (ou fim do texto)
+
+
+def iter_section_spans(md_text: str) -> Iterator[SectionSpan]:
+    """Seções em ordem do texto; o corpo de cada uma é md_text[start:end]."""
+    md_text = md_text or ""
+    title: Optional[str] = None
+    start = 0
+    for m in _HEADER_RE.finditer(md_text):
+        if m.start() and md_text[m.start() - 1] not in _NEWLINES:
+            continue
+        if title is not None:
+            yield SectionSpan(title, start, m.start())
+        title = _clean_ws(m.group(1))
+        start = m.end()
+    if title is not None:
+        yield SectionSpan(title, start, len(md_text))
+
+
+def parse_sections(md_text: str) -> Dict[str, str]:
+    """{título: conteúdo} das seções não vazias, na ordem da primeira ocorrência de cada título."""
+    md_text = md_text or ""
+    grouped: Dict[str, List[SectionSpan]] = {}
+    for span in iter_section_spans(md_text):
+        grouped.setdefault(span.title, []).append(span)
+
+    out: Dict[str, str] = {}
+    for title, spans in grouped.items():
+        if len(spans) == 1:
+            lines = md_text[spans[0].start:spans[0].end].splitlines()
+        else:
+            lines = [ln for sp in spans for ln in md_text[sp.start:sp.end].splitlines()]
+        content = "\n".join(map(str.rstrip, lines)).strip()
+        if content:
+            out[title] = content
+    return out
+
+
+# =========================
+# Benchmark
+# =========================
+
+def parse_sections_by_line(md_text: str) -> Dict[str, str]:
+    """Split antigo (re.match por linha + join de listas); referência para conferência e benchmark."""
+    sections: Dict[str, List[str]] = {}
+    current_title: Optional[str] = None
+
+    for raw_line in (md_text or "").splitlines():
+        line = raw_line.rstrip()
+        m = re.match(r"^####\s+(.*)$", line)
+        if m:
+            current_title = _clean_ws(m.group(1))
+            if current_title not in sections:
+                sections[current_title] = []
+            continue
+        if current_title is not None:
+            sections[current_title].append(line)
+
+    out: Dict[str, str] = {}
+    for title, lines in sections.items():
+        content = "\n".join([ln for ln in lines]).strip()
+        if content:
+            out[title] = content
+    return out
+
+
+def benchmark(
+    samples: Iterable[Tuple[str, str]],
+    *,
+    passes_before: int = 2,
+) -> Dict[str, Any]:
+    """
+    Compara, por documento, `passes_before` splits linha a linha (o pipeline
+    antigo tokenizava o mesmo Markdown uma vez por mapeamento) com uma única
+    passada do tokenizador, e confere que as seções coincidem.
+    """
+    before_s = after_s = 0.0
+    docs = 0
+    mismatches: List[str] = []
+    for label, md_text in samples:
+        docs += 1
+        start = time.perf_counter()
+        for _ in range(passes_before):
+            expected = parse_sections_by_line(md_text)
+        before_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = parse_sections(md_text)
+        after_s += time.perf_counter() - start
+
+        if got != expected:
+            mismatches.append(label)
+    n = docs or 1
+    return {
+        "docs": docs,
+        "beforeMsPerDoc": round(before_s * 1000 / n, 3),
+        "afterMsPerDoc": round(after_s * 1000 / n, 3),
+        "speedup": round(before_s / after_s, 1) if after_s else 0.0,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+    samples = [(p, Path(p).read_text(encoding="utf-8", errors="replace")) for p in argv]
+    report = benchmark(samples)
+    log(f"Seções Markdown: {report}")
+    return 0 if not report["mismatches"] else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -9,9 +9,12 @@ Objetivo:
 - Persistir cada decisão na collection "case_data" NO FORMATO ESTRUTURA SOLICITADOS
 - Se um dado não estiver disponível na fonte, o campo correspondente NÃO é criado
 - Atualizar o status do raw_html: new -> extracting -> extracted (ou error)
+  (claim com lease + heartbeat; leases expirados voltam a new, ver a_claim_leases.py)
+- Parser dos cards: lxml quando instalado, senão BeautifulSoup (CARD_PARSER, ver a_card_extractor.py)
 
 Dependências:
 pip install pymongo beautifulsoup4
+pip install lxml  (opcional)
 """
 
 from __future__ import annotations
@@ -22,11 +25,13 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
 
-from bs4 import BeautifulSoup
 from pymongo import MongoClient, ReturnDocument
 from pymongo.collection import Collection
 from pymongo.errors import PyMongoError
 
+from a_card_extractor import CardIndex, ResultCard, result_cards
+from a_claim_leases import RAW_HTML_LEASE, LeaseHeartbeat, lease_fields, owner_filter, reap_expired
+
 
 # ==============================================================================
 # 0) MONGO CONFIG (fixo)
@@ -116,7 +121,7 @@ def claim_next_raw_html(raw_col: Collection) -> Optional[Dict[str, Any]]:
     """
     return raw_col.find_one_and_update(
         {"status": RAW_STATUS_INPUT},
-        {"$set": {"status": RAW_STATUS_PROCESSING, "extractingAt": utc_now()}},
+        {"$set": {"status": RAW_STATUS_PROCESSING, "extractingAt": utc_now(), **lease_fields(RAW_HTML_LEASE)}},
         sort=[("_id", 1)],
         return_document=ReturnDocument.AFTER,
     )
@@ -124,7 +129,7 @@ def claim_next_raw_html(raw_col: Collection) -> Optional[Dict[str, Any]]:
 
 def mark_raw_ok(raw_col: Collection, raw_id, *, extracted_count: int) -> None:
     raw_col.update_one(
-        {"_id": raw_id, "status": RAW_STATUS_PROCESSING},
+        {"_id": raw_id, **owner_filter(RAW_HTML_LEASE)},
         {"$set": {
             "status": RAW_STATUS_OK,
             "processedDate": utc_now(),
@@ -135,7 +140,7 @@ def mark_raw_ok(raw_col: Collection, raw_id, *, extracted_count: int) -> None:
 
 def mark_raw_error(raw_col: Collection, raw_id, *, error_msg: str) -> None:
     raw_col.update_one(
-        {"_id": raw_id, "status": RAW_STATUS_PROCESSING},
+        {"_id": raw_id, **owner_filter(RAW_HTML_LEASE)},
         {"$set": {
             "status": RAW_STATUS_ERROR,
             "processedDate": utc_now(),
@@ -148,14 +153,9 @@ def mark_raw_error(raw_col: Collection, raw_id, *, error_msg: str) -> None:
 # Extração dos cards (result-container)
 # ==============================================================================
 
-def _find_result_containers(soup: BeautifulSoup):
-    return soup.find_all("div", class_="result-container")
-
-
-def _extract_stf_decision_id(container) -> Optional[str]:
-    link = container.find("a", class_="mat-tooltip-trigger")
-    if link and link.has_attr("href"):
-        href = link["href"]
+def _extract_stf_decision_id(card: ResultCard) -> Optional[str]:
+    href = card.link_href()
+    if href is not None:
         parts = [p for p in href.split("/") if p]
         for part in reversed(parts):
             if part.startswith("sjur"):
@@ -165,22 +165,15 @@ def _extract_stf_decision_id(container) -> Optional[str]:
     return None
 
 
-def _extract_case_title(container) -> Optional[str]:
-    h4 = container.find("h4", class_="ng-star-inserted")
-    if h4:
-        return _clean_str(h4.get_text(" ", strip=True))
-    link = container.find("a", class_="mat-tooltip-trigger")
-    if link:
-        h4_in = link.find("h4", class_="ng-star-inserted")
-        if h4_in:
-            return _clean_str(h4_in.get_text(" ", strip=True))
-    return None
+def _extract_case_title(card: ResultCard) -> Optional[str]:
+    title = card.title_text()
+    return _clean_str(title) if title is not None else None
 
 
-def _extract_case_url(container) -> Optional[str]:
-    link = container.find("a", class_="mat-tooltip-trigger")
-    if link and link.has_attr("href"):
-        href = (link["href"] or "").strip()
+def _extract_case_url(card: ResultCard) -> Optional[str]:
+    href = card.link_href()
+    if href is not None:
+        href = (href or "").strip()
         if not href:
             return None
         if href.startswith("http"):
@@ -189,38 +182,34 @@ def _extract_case_url(container) -> Optional[str]:
     return None
 
 
-def _extract_labeled_value(container, label_contains: str) -> Optional[str]:
-    # Heurística simples: achar qualquer nó com texto contendo "Relator", "Órgão julgador" etc.
-    for el in container.find_all(["h4", "span", "div"]):
-        txt = el.get_text(" ", strip=True)
-        if label_contains in txt:
-            # tenta pegar próximo span
-            nxt = el.find_next("span")
-            if nxt:
-                return _clean_str(nxt.get_text(" ", strip=True))
-            # tenta texto após ":"
-            if ":" in txt:
-                return _clean_str(txt.split(":", 1)[1])
+def _extract_labeled_value(index: CardIndex, label_contains: str) -> Optional[str]:
+    # Heurística simples: nós com texto contendo "Relator", "Órgão julgador" etc. (indexados em CardIndex)
+    for item in index.items(label_contains):
+        # tenta pegar próximo span
+        nxt = item.next_span_text()
+        if nxt is not None:
+            return _clean_str(nxt)
+        # tenta texto após ":"
+        if ":" in item.text:
+            return _clean_str(item.text.split(":", 1)[1])
     return None
 
 
-def _extract_date_by_regex(container, label_contains: str) -> Optional[str]:
-    for el in container.find_all(["h4", "span", "div"]):
-        txt = el.get_text(" ", strip=True)
-        if label_contains in txt:
-            m = re.search(r"\d{2}/\d{2}/\d{4}", txt)
-            if m:
-                return m.group(0)
-            nxt = el.find_next("span")
-            if nxt:
-                return _clean_str(nxt.get_text(" ", strip=True))
+def _extract_date_by_regex(index: CardIndex, label_contains: str) -> Optional[str]:
+    for item in index.items(label_contains):
+        m = re.search(r"\d{2}/\d{2}/\d{4}", item.text)
+        if m:
+            return m.group(0)
+        nxt = item.next_span_text()
+        if nxt is not None:
+            return _clean_str(nxt)
     return None
 
 
-def _extract_case_class(container, fallback_title: Optional[str]) -> Optional[str]:
-    for a in container.find_all("a"):
-        if a.has_attr("href") and "classe=" in a["href"]:
-            parsed = urlparse(a["href"])
+def _extract_case_class(index: CardIndex, fallback_title: Optional[str]) -> Optional[str]:
+    for href in index.hrefs:
+        if "classe=" in href:
+            parsed = urlparse(href)
             qs = parse_qs(parsed.query)
             if "classe" in qs and qs["classe"]:
                 return _clean_str(qs["classe"][0])
@@ -232,10 +221,10 @@ def _extract_case_class(container, fallback_title: Optional[str]) -> Optional[st
     return None
 
 
-def _extract_case_number(container, fallback_title: Optional[str]) -> Optional[str]:
-    for a in container.find_all("a"):
-        if a.has_attr("href") and "numeroProcesso=" in a["href"]:
-            parsed = urlparse(a["href"])
+def _extract_case_number(index: CardIndex, fallback_title: Optional[str]) -> Optional[str]:
+    for href in index.hrefs:
+        if "numeroProcesso=" in href:
+            parsed = urlparse(href)
             qs = parse_qs(parsed.query)
             if "numeroProcesso" in qs and qs["numeroProcesso"]:
                 return _clean_str(qs["numeroProcesso"][0])
@@ -246,12 +235,10 @@ def _extract_case_number(container, fallback_title: Optional[str]) -> Optional[s
     return None
 
 
-def _extract_occurrences(container, keyword: str) -> Optional[int]:
+def _extract_occurrences(index: CardIndex, keyword: str) -> Optional[int]:
     # procura "Inteiro teor (X)" / "Indexação (Y)" em qualquer texto
-    texts = container.find_all(string=re.compile(keyword, re.IGNORECASE))
-    for t in texts:
-        s = str(t)
-        m = re.search(r"\((\d+)\)", s)
+    for t in index.strings(keyword):
+        m = re.search(r"\((\d+)\)", t.text)
         if m:
             try:
                 n = int(m.group(1))
@@ -261,10 +248,9 @@ def _extract_occurrences(container, keyword: str) -> Optional[int]:
     return None
 
 
-def _extract_dom_id(node) -> Optional[str]:
-    if node and getattr(node, "attrs", None) and "id" in node.attrs:
-        return _clean_str(node.attrs.get("id"))
-    return None
+def _extract_dom_id(card: ResultCard) -> Optional[str]:
+    dom_id = card.dom_id()
+    return _clean_str(dom_id) if dom_id is not None else None
 
 
 def _derive_from_title(case_title: str) -> Dict[str, str]:
@@ -296,15 +282,13 @@ def _derive_from_title(case_title: str) -> Dict[str, str]:
     return out
 
 
-def extract_cards(html_raw: str, source_raw_id: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html_raw, "html.parser")
-    containers = _find_result_containers(soup)
-
+def extract_cards(html_raw: str, source_raw_id: str, *, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Cards da página de resultados; backend do parser em CARD_PARSER (ver a_card_extractor.py)."""
     out_docs: List[Dict[str, Any]] = []
-    for idx, container in enumerate(containers, start=1):
-        case_title = _extract_case_title(container)
-        stf_id = _extract_stf_decision_id(container)
-        case_url = _extract_case_url(container)
+    for idx, card in enumerate(result_cards(html_raw, backend), start=1):
+        case_title = _extract_case_title(card)
+        stf_id = _extract_stf_decision_id(card)
+        case_url = _extract_case_url(card)
 
         # Regra mínima: sem stfDecisionId não persiste
         if not stf_id:
@@ -336,8 +320,10 @@ def extract_cards(html_raw: str, source_raw_id: str) -> List[Dict[str, Any]]:
         _set_if(doc, "identity", identity)
 
         # dates/
-        judgment_date = _extract_date_by_regex(container, "Julgamento")
-        publication_date = _extract_date_by_regex(container, "Publicação")
+        # Uma passada pelo card indexa rótulos, palavras-chave e links de todos os campos
+        index = CardIndex(card)
+        judgment_date = _extract_date_by_regex(index, "Julgamento")
+        publication_date = _extract_date_by_regex(index, "Publicação")
         dates = _subdoc_if_any([
             ("judgmentDate", judgment_date),
             ("publicationDate", publication_date),
@@ -365,17 +351,17 @@ def extract_cards(html_raw: str, source_raw_id: str) -> List[Dict[str, Any]]:
         _set_if(doc, "caseContent", case_content)
 
         # stfCard/
-        judging_body = _extract_labeled_value(container, "Órgão julgador")
-        rapporteur = _extract_labeled_value(container, "Relator")
-        opinion_writer = _extract_labeled_value(container, "Redator")
+        judging_body = _extract_labeled_value(index, "Órgão julgador")
+        rapporteur = _extract_labeled_value(index, "Relator")
+        opinion_writer = _extract_labeled_value(index, "Redator")
 
-        case_class = _extract_case_class(container, case_title)
-        case_number = _extract_case_number(container, case_title)
+        case_class = _extract_case_class(index, case_title)
+        case_number = _extract_case_number(index, case_title)
 
-        full_text_occ = _extract_occurrences(container, "Inteiro teor")
-        indexing_occ = _extract_occurrences(container, "Indexação")
+        full_text_occ = _extract_occurrences(index, "Inteiro teor")
+        indexing_occ = _extract_occurrences(index, "Indexação")
 
-        dom_result_id = _extract_dom_id(container)
+        dom_result_id = _extract_dom_id(card)
 
         stf_card: Dict[str, Any] = {}
         _set_if(stf_card, "localIndex", idx)
@@ -400,11 +386,11 @@ def extract_cards(html_raw: str, source_raw_id: str) -> List[Dict[str, Any]]:
         _set_if(stf_card, "domResultContainerId", dom_result_id)
         # domClipboardId (se não achar, não cria)
         dom_clip = None
-        for b in container.find_all("button"):
-            if b.has_attr("id") and b.has_attr("mattooltip"):
-                tip = (b.get("mattooltip") or "").lower()
+        for button_id, tooltip in card.buttons():
+            if button_id is not None and tooltip is not None:
+                tip = (tooltip or "").lower()
                 if any(w in tip for w in ("copiar", "copy", "link")):
-                    dom_clip = _clean_str(b["id"])
+                    dom_clip = _clean_str(button_id)
                     break
         _set_if(stf_card, "domClipboardId", dom_clip)
 
@@ -510,6 +496,7 @@ def upsert_case_data(
 
 def main() -> int:
     raw_col, case_col = get_collections()
+    reap_expired(raw_col, RAW_HTML_LEASE)
 
     raw_doc = claim_next_raw_html(raw_col)
     if not raw_doc:
@@ -537,13 +524,17 @@ def main() -> int:
             for d in extracted_docs:
                 _set_if(d, "query", query_sub)
 
-        # persiste
-        for d in extracted_docs:
-            identity = d.get("identity") if isinstance(d.get("identity"), dict) else {}
-            stf_id = _clean_str(identity.get("stfDecisionId"))
-            if not stf_id:
-                continue
-            upsert_case_data(case_col, doc=d, stf_decision_id=stf_id)
+        # persiste (um upsert por decisão: o heartbeat mantém o lease em páginas grandes)
+        with LeaseHeartbeat(raw_col, RAW_HTML_LEASE, raw_id) as hb:
+            for d in extracted_docs:
+                if hb.lost:
+                    # raw_html devolvido pelo reaper: outro worker refaz a página inteira
+                    break
+                identity = d.get("identity") if isinstance(d.get("identity"), dict) else {}
+                stf_id = _clean_str(identity.get("stfDecisionId"))
+                if not stf_id:
+                    continue
+                upsert_case_data(case_col, doc=d, stf_decision_id=stf_id)
 
         mark_raw_ok(raw_col, raw_id, extracted_count=len(extracted_docs))
 
@@ -8,12 +8,13 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Set, Tuple
 
-from bs4 import BeautifulSoup
 from bson import ObjectId
 from pymongo import MongoClient, ReturnDocument
 from pymongo.collection import Collection
 from pymongo.errors import PyMongoError
 
+from a_card_extractor import CardIndex, ResultCard, result_cards
+
 
 # ------------------------------------------------------------
 # 0) MONGO CONFIG (mesmas credenciais/infos do projeto)
@@ -192,20 +193,21 @@ def build_query_from_raw(raw_doc: Dict[str, Any]) -> Dict[str, Any]:
 # Extração (parse dos result-container)
 # ------------------------------------------------------------
 class STFListExtractor:
-    def extract_decisions(self, html: str, source_raw_id: ObjectId) -> List[Dict[str, Any]]:
-        soup = BeautifulSoup(html, "html.parser")
-        containers = soup.find_all("div", class_="result-container")
+    # backend do parser (lxml|bs4); None = CARD_PARSER (ver a_card_extractor.py)
+    def __init__(self, backend: Optional[str] = None) -> None:
+        self.backend = backend
 
+    def extract_decisions(self, html: str, source_raw_id: ObjectId) -> List[Dict[str, Any]]:
         decisions: List[Dict[str, Any]] = []
-        for idx, container in enumerate(containers, start=1):
-            data = self._extract_container_data(container, idx, source_raw_id)
+        for idx, card in enumerate(result_cards(html, self.backend), start=1):
+            data = self._extract_container_data(card, idx, source_raw_id)
             if data:
                 decisions.append(data)
         return decisions
 
     def _extract_container_data(
         self,
-        container: Any,
+        container: ResultCard,
         local_index: int,
         source_raw_id: ObjectId,
     ) -> Optional[Dict[str, Any]]:
@@ -218,20 +220,22 @@ class STFListExtractor:
             if not stf_decision_id or stf_decision_id == "N/A":
                 return None
 
-            judging_body = self._extract_label_value(container, "Órgão julgador")
-            rapporteur = self._extract_label_value(container, "Relator")
-            opinion_writer = self._extract_label_value(container, "Redator")
+            # uma passada pelo card indexa rótulos, palavras-chave e links de todos os campos
+            index = CardIndex(container)
+            judging_body = self._extract_label_value(index, "Órgão julgador")
+            rapporteur = self._extract_label_value(index, "Relator")
+            opinion_writer = self._extract_label_value(index, "Redator")
 
-            judgment_date = self._extract_date_by_label(container, "Julgamento")
-            publication_date = self._extract_date_by_label(container, "Publicação")
+            judgment_date = self._extract_date_by_label(index, "Julgamento")
+            publication_date = self._extract_date_by_label(index, "Publicação")
 
-            case_class = self._extract_case_class(container, case_title)
-            case_number = self._extract_case_number(container, case_title)
+            case_class = self._extract_case_class(index, case_title)
+            case_number = self._extract_case_number(index, case_title)
 
-            full_text_occ = self._extract_occurrences(container, "Inteiro teor")
-            indexing_occ = self._extract_occurrences(container, "Indexação")
+            full_text_occ = self._extract_occurrences(index, "Inteiro teor")
+            indexing_occ = self._extract_occurrences(index, "Indexação")
 
-            dom_result_container_id = container.get("id") if hasattr(container, "get") else None
+            dom_result_container_id = container.dom_id()
             dom_clipboard_id = self._extract_dom_clipboard_id(container)
 
             # Observação: mantém chaves planas aqui; a estrutura final é montada no builder
@@ -257,10 +261,9 @@ class STFListExtractor:
         except Exception:
             return None
 
-    def _extract_stf_decision_id(self, container: Any) -> str:
-        link = container.find("a", class_="mat-tooltip-trigger")
-        if link and link.has_attr("href"):
-            href = link["href"]
+    def _extract_stf_decision_id(self, container: ResultCard) -> str:
+        href = container.link_href()
+        if href is not None:
             parts = [p for p in href.split("/") if p]
             for part in reversed(parts):
                 if part.startswith("sjur"):
@@ -269,21 +272,16 @@ class STFListExtractor:
                 return parts[-1]
         return "N/A"
 
-    def _extract_case_title(self, container: Any) -> str:
-        h4 = container.find("h4", class_="ng-star-inserted")
-        if h4:
-            return h4.get_text(" ", strip=True)
-        link = container.find("a", class_="mat-tooltip-trigger")
-        if link:
-            h4_in = link.find("h4", class_="ng-star-inserted")
-            if h4_in:
-                return h4_in.get_text(" ", strip=True)
+    def _extract_case_title(self, container: ResultCard) -> str:
+        title = container.title_text()
+        if title is not None:
+            return title
         return "N/A"
 
-    def _extract_case_url(self, container: Any) -> str:
-        link = container.find("a", class_="mat-tooltip-trigger")
-        if link and link.has_attr("href"):
-            href = (link["href"] or "").strip()
+    def _extract_case_url(self, container: ResultCard) -> str:
+        href = container.link_href()
+        if href is not None:
+            href = (href or "").strip()
             if not href:
                 return "N/A"
             if href.startswith("http"):
@@ -291,38 +289,30 @@ class STFListExtractor:
             return f"https://jurisprudencia.stf.jus.br{href}"
         return "N/A"
 
-    def _extract_label_value(self, container: Any, label: str) -> str:
-        elements = container.find_all(["h4", "span", "div"])
-        for el in elements:
-            txt = el.get_text(" ", strip=True)
-            if label in txt:
-                nxt = el.find_next("span")
-                if nxt:
-                    return nxt.get_text(" ", strip=True)
-                parts = txt.split(":")
-                if len(parts) > 1:
-                    return parts[1].strip()
+    def _extract_label_value(self, index: CardIndex, label: str) -> str:
+        for item in index.items(label):
+            nxt = item.next_span_text()
+            if nxt is not None:
+                return nxt
+            parts = item.text.split(":")
+            if len(parts) > 1:
+                return parts[1].strip()
         return "N/A"
 
-    def _extract_date_by_label(self, container: Any, label: str) -> str:
-        elements = container.find_all(["h4", "span", "div"])
-        for el in elements:
-            txt = el.get_text(" ", strip=True)
-            if label in txt:
-                nxt = el.find_next("span")
-                if nxt:
-                    d = parse_date_ddmmyyyy(nxt.get_text(" ", strip=True))
-                    if d:
-                        return d
-                d = parse_date_ddmmyyyy(txt)
+    def _extract_date_by_label(self, index: CardIndex, label: str) -> str:
+        for item in index.items(label):
+            nxt = item.next_span_text()
+            if nxt is not None:
+                d = parse_date_ddmmyyyy(nxt)
                 if d:
                     return d
+            d = parse_date_ddmmyyyy(item.text)
+            if d:
+                return d
         return "N/A"
 
-    def _extract_case_class(self, container: Any, case_title: str) -> str:
-        links = container.find_all("a")
-        for link in links:
-            href = link.get("href")
+    def _extract_case_class(self, index: CardIndex, case_title: str) -> str:
+        for href in index.hrefs:
             if href and "classe=" in href:
                 m = re.search(r"classe=([^&]+)", href)
                 if m:
@@ -330,10 +320,8 @@ class STFListExtractor:
         d = derive_case_class_detail(case_title)
         return d or "N/A"
 
-    def _extract_case_number(self, container: Any, case_title: str) -> str:
-        links = container.find_all("a")
-        for link in links:
-            href = link.get("href")
+    def _extract_case_number(self, index: CardIndex, case_title: str) -> str:
+        for href in index.hrefs:
             if href and "numeroProcesso=" in href:
                 m = re.search(r"numeroProcesso=([^&]+)", href)
                 if m:
@@ -341,27 +329,23 @@ class STFListExtractor:
         d = derive_case_number_detail(case_title)
         return d or "N/A"
 
-    def _extract_occurrences(self, container: Any, label: str) -> int:
-        texts = container.find_all(string=re.compile(label, re.IGNORECASE))
-        for t in texts:
-            parent = getattr(t, "parent", None)
-            if parent is not None:
-                txt = parent.get_text(" ", strip=True)
-                m = re.search(r"\((\d+)\)", txt)
-                if m:
-                    try:
-                        return int(m.group(1))
-                    except Exception:
-                        return 0
+    def _extract_occurrences(self, index: CardIndex, label: str) -> int:
+        for t in index.strings(label):
+            txt = t.parent_text()
+            m = re.search(r"\((\d+)\)", txt)
+            if m:
+                try:
+                    return int(m.group(1))
+                except Exception:
+                    return 0
         return 0
 
-    def _extract_dom_clipboard_id(self, container: Any) -> Optional[str]:
-        buttons = container.find_all("button")
-        for b in buttons:
-            tip = b.get("mattooltip", "")
+    def _extract_dom_clipboard_id(self, container: ResultCard) -> Optional[str]:
+        for button_id, tooltip in container.buttons():
+            tip = tooltip if tooltip is not None else ""
             if isinstance(tip, str) and any(w in tip.lower() for w in ["copiar", "copy", "link"]):
-                if b.get("id"):
-                    return b["id"]
+                if button_id:
+                    return button_id
         return None
 
 
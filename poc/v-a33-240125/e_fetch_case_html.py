@@ -8,7 +8,17 @@ Implementações incluídas:
    - Default: processa apenas docs sem caseContent.originalHtml (ou vazio)
    - FORCE_REFETCH=true: permite reprocessar e sobrescrever originalHtml
 
-2) Índices no MongoDB para o padrão de busca/claim
+2) Re-fetch condicional (REVALIDATE=true)
+   - Cada fetch grava caseContent.contentHash (sha256 do HTML sanitizado)
+     e os validadores HTTP (ETag / Last-Modified) quando o STF os envia
+   - Revalidação: requests usa If-None-Match / If-Modified-Since (304 = inalterado);
+     Playwright compara o hash do conteúdo
+   - Conteúdo inalterado: nenhuma escrita de conteúdo e status.pipelineStatus
+     preservado (as etapas seguintes não reprocessam o doc)
+   - Erro transitório na revalidação: só processing.caseHtmlError é gravado;
+     o status e o conteúdo já processados adiante são mantidos
+
+3) Índices no MongoDB para o padrão de busca/claim
    - Cria (idempotente) índice composto: (status.pipelineStatus, _id)
    - Opcionalmente cria índice parcial para documentos sem originalHtml
      (habilite via env CREATE_PARTIAL_INDEX=true)
@@ -16,36 +26,83 @@ Implementações incluídas:
 Fluxo:
 - Claim atômico do doc mais antigo elegível:
     status.pipelineStatus: listExtracted|extracted -> caseScraping
+  com lease (processing.caseHtmlLease: dono + validade) renovado por heartbeat;
+  leases expirados (worker interrompido) voltam a listExtracted ao iniciar
 - Fetch HTML via Playwright (principal) ou requests (opcional)
 - Atualiza o doc:
     - caseContent.originalHtml (sempre sobrescreve quando selecionado)
     - processing.caseHtmlScrapedAt (UTC)
     - status.pipelineStatus: caseScraped
+    - caseContent.contentHash, processing.caseHtmlEtag/caseHtmlLastModified
 - Em erro:
     - processing.caseHtmlError
     - processing.caseHtmlScrapedAt (UTC)
     - status.pipelineStatus: caseScrapeError
 
+Playwright usa um pool persistente de navegadores (AsyncBrowserPool):
+os Chromium são lançados uma vez e reciclados por páginas servidas ou RSS.
+
 Env vars:
 - USE_REQUESTS_FIRST=true|false (default false)
-- STF_SSL_VERIFY=true|false (default true)  # apenas requests
+- STF_SSL_VERIFY=true|false (default true)  # apenas requests (ver a_http_client.py: HTTP_POOL_*, HTTP_RETRIES, HTTP2)
 - FORCE_REFETCH=true|false (default false)
+- REVALIDATE=true|false (default false)        # re-fetch condicional dos docs já coletados
+- REVALIDATE_AFTER_HOURS (default 168)         # idade mínima da última verificação
 - CREATE_PARTIAL_INDEX=true|false (default false)
+- HTML_SANITIZER=stream|bs4 (default stream)   # sanitização em uma passada (ver a_html_sanitizer.py)
+- CONCURRENT_FETCH=true|false (default false)  # workers via claim atômico, sem prompts
+- NON_INTERACTIVE=true|false (default false)   # modo serial sem input(); usa FETCH_OPTION
+- FETCH_OPTION=1|2|3 (default 2)
+- FETCH_WORKERS (default 4)                    # páginas em voo no modo concorrente
+- FETCH_PER_HOST_LIMIT (default 4)             # teto de requisições simultâneas por host
+- STF_RATE_LIMIT=true|false (default true)     # controle adaptativo AIMD abaixo do teto (ver a_rate_limiter.py)
+- FETCH_REPORT_EVERY_SECONDS (default 30)      # relatório de páginas/minuto
+- CLAIM_LEASE_SECONDS / CLAIM_HEARTBEAT_SECONDS / CLAIM_MAX_REAPS (ver a_claim_leases.py)
+- CLAIM_BATCH_SIZE=10  # docs por claim no modo concorrente (um round trip por lote)
+- BROWSER_POOL_SIZE (default 2)
+- BROWSER_POOL_MAX_PAGES (default 200; 0 desabilita)
+- BROWSER_POOL_MAX_RSS_MB (default 1500; 0 desabilita; requer psutil)
+- BROWSER_POOL_ACQUIRE_TIMEOUT (default 300; segundos de espera por um navegador livre)
 """
 
 import asyncio
+import hashlib
 import os
-from datetime import datetime, timezone
-from typing import Optional, Dict, Any, Tuple
+import time
+import uuid
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Dict, Any, List, Tuple
 
-import certifi
-import requests
 from markdownify import markdownify as md  # Install with: pip install markdownify
 from math import ceil
+from urllib.parse import urlparse
 from pymongo import MongoClient, ReturnDocument
 from pymongo.collection import Collection
 from pymongo.errors import PyMongoError
 
+from a_claim_leases import (
+    CLAIM_BATCH_SIZE,
+    FETCH_LEASE,
+    claim_batch,
+    lease_fields,
+    HeartbeatState,
+    lease_heartbeat_async,
+    owner_filter,
+    reap_expired,
+    release_claims,
+)
+from a_html_sanitizer import sanitize_html
+from a_http_client import CONFIG as HTTP_CONFIG, get_text
+from a_rate_limiter import (
+    RateTicket,
+    all_stats as rate_limit_stats,
+    controller_for_url,
+    retry_after_seconds,
+    save_all as save_rate_state,
+    send_with_retries,
+)
+
 
 # ------------------------------------------------------------
 # Mongo (fixo) [recomendado migrar para ENV]
@@ -76,10 +133,26 @@ def _env_bool(name: str, default: bool) -> bool:
 
 
 USE_REQUESTS_FIRST = _env_bool("USE_REQUESTS_FIRST", False)
-SSL_VERIFY = _env_bool("STF_SSL_VERIFY", True)
 FORCE_REFETCH = _env_bool("FORCE_REFETCH", False)
 CREATE_PARTIAL_INDEX = _env_bool("CREATE_PARTIAL_INDEX", False)
 
+# Revalidação: re-fetch condicional de docs que já têm originalHtml
+REVALIDATE = _env_bool("REVALIDATE", False)
+REVALIDATE_AFTER_HOURS = float(os.getenv("REVALIDATE_AFTER_HOURS", "168") or "168")
+
+# Modo concorrente: workers consomem docs via claim atômico, sem prompts
+CONCURRENT_FETCH = _env_bool("CONCURRENT_FETCH", False)
+# Sem input(): usa FETCH_OPTION e processa todos sem confirmação (modo serial)
+NON_INTERACTIVE = _env_bool("NON_INTERACTIVE", False) or CONCURRENT_FETCH
+# Opção do menu usada em NON_INTERACTIVE (1=tudo, 2=novos, 3=existentes)
+FETCH_OPTION = int(os.getenv("FETCH_OPTION", "2") or "2")
+# Páginas em voo simultaneamente (workers)
+FETCH_WORKERS = max(1, int(os.getenv("FETCH_WORKERS", "4") or "4"))
+# Limite de requisições simultâneas por host (STF)
+FETCH_PER_HOST_LIMIT = max(1, int(os.getenv("FETCH_PER_HOST_LIMIT", "4") or "4"))
+# Intervalo (s) entre relatórios de throughput no modo concorrente
+FETCH_REPORT_EVERY_SECONDS = float(os.getenv("FETCH_REPORT_EVERY_SECONDS", "30") or "30")
+
 
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
@@ -111,6 +184,14 @@ def ensure_indexes(col: Collection) -> None:
             background=True,
         )
 
+        if REVALIDATE:
+            # claim_for_revalidation ordena pela verificação mais antiga
+            col.create_index(
+                [("processing.caseHtmlCheckedAt", 1), ("_id", 1)],
+                name="idx_revalidate_checked_at",
+                background=True,
+            )
+
         if CREATE_PARTIAL_INDEX:
             # Índice parcial para acelerar o modo default (sem HTML).
             # Cobre casos em que originalHtml não existe / null / vazio.
@@ -160,6 +241,32 @@ def claim_oldest_extracted(col: Collection) -> Optional[Dict[str, Any]]:
     - FORCE_REFETCH=false (default): só claim se NÃO existir originalHtml (ou estiver vazio)
     - FORCE_REFETCH=true: ignora esse filtro e permite sobrescrever.
     """
+    return col.find_one_and_update(
+        _extracted_filter(),
+        {
+            "$set": {
+                "status.pipelineStatus": PIPELINE_PROCESSING,
+                "processing.caseHtmlScrapingAt": utc_now(),
+                **lease_fields(FETCH_LEASE),
+            }
+        },
+        sort=[("_id", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def claim_batch_extracted(col: Collection, limit: int = CLAIM_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """Mesmos critérios de claim_oldest_extracted, até `limit` docs por round trip."""
+    return claim_batch(
+        col,
+        FETCH_LEASE,
+        _extracted_filter(),
+        limit=limit,
+        set_fields={"processing.caseHtmlScrapingAt": utc_now()},
+    )
+
+
+def _extracted_filter() -> Dict[str, Any]:
     base_filter: Dict[str, Any] = {
         "status.pipelineStatus": {"$in": [PIPELINE_INPUT, "extracted"]},
         "identity.stfDecisionId": {"$exists": True, "$nin": [None, "", "N/A"]},
@@ -173,51 +280,179 @@ def claim_oldest_extracted(col: Collection) -> Optional[Dict[str, Any]]:
             {"caseContent.originalHtml": None},
             {"caseContent.originalHtml": ""},
         ]
+    return base_filter
+
+
+def claim_for_revalidation(col: Collection) -> Optional[Dict[str, Any]]:
+    """
+    Claim atômico do doc já coletado com a verificação mais antiga.
 
+    Critérios:
+    - caseContent.originalHtml presente
+    - processing.caseHtmlCheckedAt ausente ou anterior a REVALIDATE_AFTER_HOURS
+    - status.pipelineStatus diferente de caseScraping (fetch em andamento)
+
+    O claim apenas avança processing.caseHtmlCheckedAt; status.pipelineStatus
+    não muda, para que um doc inalterado siga onde estava no pipeline.
+    """
+    cutoff = utc_now() - timedelta(hours=REVALIDATE_AFTER_HOURS)
     return col.find_one_and_update(
-        base_filter,
         {
-            "$set": {
-                "status.pipelineStatus": PIPELINE_PROCESSING,
-                "processing.caseHtmlScrapingAt": utc_now(),
-            }
+            "caseContent.originalHtml": {"$exists": True, "$nin": [None, ""]},
+            "stfCard.caseUrl": {"$exists": True, "$nin": [None, "", "N/A"]},
+            "status.pipelineStatus": {"$ne": PIPELINE_PROCESSING},
+            "$or": [
+                {"processing.caseHtmlCheckedAt": {"$exists": False}},
+                {"processing.caseHtmlCheckedAt": {"$lt": cutoff}},
+            ],
         },
-        sort=[("_id", 1)],
+        {"$set": {"processing.caseHtmlCheckedAt": utc_now()}},
+        sort=[("processing.caseHtmlCheckedAt", 1), ("_id", 1)],
         return_document=ReturnDocument.AFTER,
     )
 
 
-def mark_success(col: Collection, doc_id, *, html: str) -> None:
+def content_hash(sanitized_html: str) -> str:
+    """
+    sha256 do HTML sanitizado (conteúdo da decisão).
+    O HTML bruto do SPA muda a cada renderização (ids/atributos do Angular),
+    por isso o hash é calculado depois da sanitização.
+    """
+    return hashlib.sha256(sanitized_html.encode("utf-8")).hexdigest()
+
+
+def _http_validators(headers: Optional[Dict[str, str]]) -> Dict[str, Optional[str]]:
+    h = {str(k).lower(): v for k, v in (headers or {}).items()}
+    return {"etag": h.get("etag"), "lastModified": h.get("last-modified")}
+
+
+def _stored_validators(doc: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Validadores gravados; vazio se o doc ainda não tem conteúdo (um 304 não teria o que reaproveitar)."""
+    if not (doc.get("caseContent") or {}).get("originalHtml"):
+        return {}
+    processing = doc.get("processing") or {}
+    return {"etag": processing.get("caseHtmlEtag"), "lastModified": processing.get("caseHtmlLastModified")}
+
+
+def _stored_content_hash(doc: Dict[str, Any]) -> Optional[str]:
+    """Hash gravado; para docs antigos (sem hash) recalcula a partir do originalHtml."""
+    content = doc.get("caseContent") or {}
+    if content.get("contentHash"):
+        return content["contentHash"]
+    if content.get("originalHtml"):
+        return content_hash(sanitize_html_keep_formatting(content["originalHtml"]))
+    return None
+
+
+def _write_filter(doc_id, leased: bool) -> Dict[str, Any]:
+    """Docs com lease (fila de entrada) só são concluídos pelo dono atual do lease."""
+    if leased:
+        return {"_id": doc_id, **owner_filter(FETCH_LEASE)}
+    return {"_id": doc_id}
+
+
+def _is_leased(doc: Dict[str, Any]) -> bool:
+    return (doc.get("status") or {}).get("pipelineStatus") == PIPELINE_PROCESSING
+
+
+def mark_success(
+    col: Collection,
+    doc_id,
+    *,
+    html: str,
+    html_hash: Optional[str] = None,
+    validators: Optional[Dict[str, Optional[str]]] = None,
+    extra_fields: Optional[Dict[str, Any]] = None,
+    leased: bool = False,
+) -> None:
     """
     Grava/atualiza:
     - caseContent.originalHtml (sempre sobrescreve quando selecionado)
-    - processing.caseHtmlScrapedAt
+    - caseContent.contentHash e validadores HTTP (ETag / Last-Modified)
+    - processing.caseHtmlScrapedAt / caseHtmlCheckedAt
     - status.pipelineStatus
+    - extra_fields (na mesma gravação: com leased=True, uma segunda gravação
+      não casaria mais com o filtro do dono, pois o status já mudou)
     Limpa erro anterior, se existir.
     """
+    now = utc_now()
+    fields: Dict[str, Any] = {
+        "caseContent.originalHtml": html,
+        "processing.caseHtmlScrapedAt": now,
+        "processing.caseHtmlCheckedAt": now,
+        "status.pipelineStatus": PIPELINE_OK,
+        "processing.caseHtmlError": None,
+    }
+    if html_hash:
+        fields["caseContent.contentHash"] = html_hash
+    if validators is not None:
+        fields["processing.caseHtmlEtag"] = validators.get("etag")
+        fields["processing.caseHtmlLastModified"] = validators.get("lastModified")
+    fields.update(extra_fields or {})
+    col.update_one(_write_filter(doc_id, leased), {"$set": fields})
+
+
+def mark_unchanged(
+    col: Collection,
+    doc_id,
+    *,
+    validators: Optional[Dict[str, Optional[str]]] = None,
+    html_hash: Optional[str] = None,
+    status: Optional[str] = None,
+    leased: bool = False,
+) -> None:
+    """
+    Conteúdo inalterado: registra apenas a verificação (sem reescrever o conteúdo).
+    status só é informado quando o doc foi movido para caseScraping pelo claim.
+    """
+    fields: Dict[str, Any] = {
+        "processing.caseHtmlCheckedAt": utc_now(),
+        "processing.caseHtmlUnchangedAt": utc_now(),
+        "processing.caseHtmlError": None,
+    }
+    if html_hash:
+        fields["caseContent.contentHash"] = html_hash
+    for key, field in (("etag", "processing.caseHtmlEtag"), ("lastModified", "processing.caseHtmlLastModified")):
+        if validators and validators.get(key):
+            fields[field] = validators[key]
+    if status:
+        fields["status.pipelineStatus"] = status
+    col.update_one(_write_filter(doc_id, leased), {"$set": fields})
+
+
+def _status_after_unchanged(doc: Dict[str, Any]) -> Optional[str]:
+    """Doc movido para caseScraping pelo claim volta a caseScraped; nos demais o status é mantido."""
+    if _is_leased(doc):
+        return PIPELINE_OK
+    return None
+
+
+def mark_error(col: Collection, doc_id, *, error_msg: str, leased: bool = False) -> None:
     col.update_one(
-        {"_id": doc_id},
+        _write_filter(doc_id, leased),
         {
             "$set": {
-                "caseContent.originalHtml": html,
+                "processing.caseHtmlError": error_msg,
                 "processing.caseHtmlScrapedAt": utc_now(),
-                "status.pipelineStatus": PIPELINE_OK,
-                "processing.caseHtmlError": None,
+                "status.pipelineStatus": PIPELINE_ERROR,
             }
         },
     )
 
 
-def mark_error(col: Collection, doc_id, *, error_msg: str) -> None:
+def mark_revalidation_error(col: Collection, doc_id, *, error_msg: str) -> None:
+    """
+    Falha ao revalidar um doc já coletado: registra o erro sem rebaixar
+    status.pipelineStatus (o conteúdo gravado segue válido para as etapas seguintes).
+    processing.caseHtmlCheckedAt já foi avançado pelo claim; a próxima
+    revalidação tenta de novo após REVALIDATE_AFTER_HOURS.
+    """
     col.update_one(
         {"_id": doc_id},
-        {
-            "$set": {
-                "processing.caseHtmlError": error_msg,
-                "processing.caseHtmlScrapedAt": utc_now(),
-                "status.pipelineStatus": PIPELINE_ERROR,
-            }
-        },
+        {"$set": {
+            "processing.caseHtmlError": error_msg,
+            "processing.caseHtmlRevalidateErrorAt": utc_now(),
+        }},
     )
 
 
@@ -227,46 +462,8 @@ def calculate_size_kb(content: str) -> int:
 
 
 def sanitize_html_keep_formatting(html: str) -> str:
-    """Sanitize HTML, keep only main content + formatting + links."""
-    try:
-        from bs4 import BeautifulSoup  # Optional but preferred for clean sanitization
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(["script", "style", "noscript", "iframe", "object", "embed"]):
-            tag.decompose()
-        # Keep only the STF decision tab content
-        content = soup.find("div", class_="mat-tab-body-wrapper")
-        if content is not None:
-            soup = BeautifulSoup(str(content), "html.parser")
-
-        # Remove all tags except formatting and links
-        allowed = {
-            "b", "strong", "i", "em", "u",
-            "p", "br",
-            "ul", "ol", "li",
-            "h1", "h2", "h3", "h4", "h5", "h6",
-            "a",
-            "blockquote",
-        }
-        for tag in list(soup.find_all(True)):
-            if tag.name not in allowed:
-                tag.unwrap()
-            elif tag.name != "a":
-                tag.attrs = {}
-            else:
-                # keep only href on links
-                href = tag.get("href")
-                tag.attrs = {}
-                if href:
-                    tag["href"] = href
-
-        html = str(soup)
-    except Exception:
-        # Fallback: remove script/style blocks via simple heuristics
-        import re
-
-        html = re.sub(r"<(script|style)[^>]*>.*?</\1>", "", html, flags=re.DOTALL | re.IGNORECASE)
-
-    return html.strip()
+    """Sanitize HTML, keep only main content + formatting + links (single pass, see a_html_sanitizer.py)."""
+    return sanitize_html(html)
 
 
 def sanitize_and_convert_to_markdown(html: str) -> str:
@@ -288,7 +485,12 @@ def update_audit_status(col: Collection, doc_id, status: str) -> None:
     )
 
 
-async def process_item(col: Collection, doc: Dict[str, Any], auto_confirm: bool) -> None:
+async def process_item(
+    col: Collection,
+    doc: Dict[str, Any],
+    auto_confirm: bool,
+    pool: Optional["AsyncBrowserPool"] = None,
+) -> None:
     """Process a single item."""
     doc_id = doc["_id"]
     stf_id = _get_stf_decision_id(doc)
@@ -296,22 +498,31 @@ async def process_item(col: Collection, doc: Dict[str, Any], auto_confirm: bool)
     print(f"Processo: {case_title}")
 
     try:
-        # Fetch HTML
+        # Fetch HTML (condicional quando há validadores gravados)
         case_url = _get_case_url(doc)
-        if USE_REQUESTS_FIRST:
-            html = fetch_html_requests(case_url)[0]
-        else:
-            html = await fetch_html_playwright(case_url)
+        html, validators = await fetch_case_html(case_url, pool=pool, validators=_stored_validators(doc))
+        if html is None:
+            mark_unchanged(col, doc_id, validators=validators)
+            print("Obter HTML da decisão:          304 (inalterado)")
+            print("PROCESSAMENTO ITEM FINALIZADO")
+            return
         print("Obter HTML da decisão:          OK")
         html_size_kb = calculate_size_kb(html)
         print(f"Tamanho html:                   {html_size_kb} kb")
 
+        # Sanitize HTML (keep only main content + formatting)
+        sanitized_html = sanitize_html_keep_formatting(html)
+        html_hash = content_hash(sanitized_html)
+        if html_hash == _stored_content_hash(doc):
+            mark_unchanged(col, doc_id, validators=validators, html_hash=html_hash)
+            print("Conteúdo inalterado:            gravação ignorada")
+            print("PROCESSAMENTO ITEM FINALIZADO")
+            return
+
         # Save original HTML
-        mark_success(col, doc_id, html=html)
+        mark_success(col, doc_id, html=html, html_hash=html_hash, validators=validators)
         print("Gravar HTML original:           OK")
 
-        # Sanitize HTML (keep only main content + formatting)
-        sanitized_html = sanitize_html_keep_formatting(html)
         sanitized_size_kb = calculate_size_kb(sanitized_html)
         col.update_one(
             {"_id": doc_id},
@@ -374,30 +585,262 @@ def user_prompt(total: int, new: int, existing: int) -> Tuple[int, bool]:
 # ------------------------------------------------------------
 # requests (opcional)
 # ------------------------------------------------------------
-def fetch_html_requests(url: str) -> Tuple[str, int]:
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Referer": "https://jurisprudencia.stf.jus.br/",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
-    verify_opt = certifi.where() if SSL_VERIFY else False
-    if not SSL_VERIFY:
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-    resp = requests.get(url, headers=headers, timeout=60, verify=verify_opt)
+def fetch_html_requests(
+    url: str,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Tuple[str, int, Dict[str, str]]:
+    """
+    GET da página; com etag/last_modified envia If-None-Match/If-Modified-Since.
+    Retorna (html, status, headers); em 304 o html é vazio.
+    """
+    # Sessão compartilhada (keep-alive, TLS reaproveitado): ver a_http_client.py.
+    # Cada tentativa (429/5xx repetidos) ocupa um ticket do controle de taxa do host
+    headers = {"User-Agent": USER_AGENT, "Upgrade-Insecure-Requests": "1"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    resp = send_with_retries(url, lambda: get_text(url, headers=headers), retries=HTTP_CONFIG.retries)
+    if resp.status_code == 304:
+        return "", resp.status_code, resp.headers
     resp.raise_for_status()
-    resp.encoding = resp.encoding or "utf-8"
-    return resp.text, resp.status_code
+    return resp.text, resp.status_code, resp.headers
+
+
+# ------------------------------------------------------------
+# Playwright: pool persistente de navegadores
+# ------------------------------------------------------------
+BROWSER_LAUNCH_ARGS = ["--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu", "--window-size=1920,1080"]
+BROWSER_CONTEXT_OPTIONS: Dict[str, Any] = {
+    "viewport": {"width": 1920, "height": 1080},
+    "user_agent": USER_AGENT,
+    "extra_http_headers": {"accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"},
+}
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2") or "2")
+# Páginas servidas por navegador antes de reciclar (0 desabilita)
+BROWSER_POOL_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "200") or "0")
+# RSS (MB) do Chromium + filhos que dispara reciclagem (0 desabilita; requer psutil)
+BROWSER_POOL_MAX_RSS_MB = int(os.getenv("BROWSER_POOL_MAX_RSS_MB", "1500") or "0")
+# Espera máxima (s) por um navegador livre antes de falhar o item
+BROWSER_POOL_ACQUIRE_TIMEOUT = float(os.getenv("BROWSER_POOL_ACQUIRE_TIMEOUT", "300") or "300")
+
+# Switch ignorado pelo Chromium; serve apenas para localizar o processo principal de cada slot
+_SLOT_MARKER_ARG = "--cito-pool-slot"
+
+
+class _BrowserSlot:
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.marker = uuid.uuid4().hex
+        self.browser = None
+        self.context = None
+        self.pages_served = 0
+
+    def is_alive(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    def rss_mb(self) -> Optional[float]:
+        """RSS (MB) do Chromium deste slot + filhos; None se psutil indisponível."""
+        try:
+            import psutil
+        except Exception:
+            return None
+        if not self.is_alive():
+            return None
+        token = f"{_SLOT_MARKER_ARG}={self.marker}"
+        for proc in psutil.process_iter(["cmdline"]):
+            try:
+                if token not in (proc.info.get("cmdline") or []):
+                    continue
+                total = proc.memory_info().rss
+                for child in proc.children(recursive=True):
+                    with suppress(Exception):
+                        total += child.memory_info().rss
+                return total / (1024 * 1024)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return None
+
+
+class AsyncBrowserPool:
+    """
+    Pool de navegadores Chromium quentes (Playwright async).
+
+    Cada slot mantém um Browser + BrowserContext abertos e entrega uma Page nova
+    por URL; o navegador é reciclado após max_pages páginas ou quando o RSS
+    ultrapassa max_rss_mb. Evita lançar/encerrar um Chromium por decisão.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int = BROWSER_POOL_SIZE,
+        max_pages: int = BROWSER_POOL_MAX_PAGES,
+        max_rss_mb: int = BROWSER_POOL_MAX_RSS_MB,
+        headless: bool = True,
+        acquire_timeout: float = BROWSER_POOL_ACQUIRE_TIMEOUT,
+    ) -> None:
+        self.size = max(1, size)
+        self.max_pages = max(0, max_pages)
+        self.max_rss_mb = max(0, max_rss_mb)
+        self.headless = headless
+        self.acquire_timeout = acquire_timeout
+        self._pw_cm = None
+        self._pw = None
+        self._slots: List[_BrowserSlot] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._stats: Dict[str, Any] = {
+            "size": self.size,
+            "launches": 0,
+            "recyclesByPages": 0,
+            "recyclesByRss": 0,
+            "recyclesByError": 0,
+            "pagesServed": 0,
+            "inUse": 0,
+        }
+
+    async def start(self) -> "AsyncBrowserPool":
+        try:
+            from playwright.async_api import async_playwright
+        except Exception as e:
+            raise RuntimeError(
+                "Playwright não disponível. Instale com: pip install playwright && playwright install"
+            ) from e
+
+        self._pw_cm = async_playwright()
+        self._pw = await self._pw_cm.__aenter__()
+        self._idle = asyncio.Queue()
+        for i in range(self.size):
+            slot = _BrowserSlot(i)
+            await self._launch(slot)
+            self._slots.append(slot)
+            self._idle.put_nowait(slot)
+        return self
+
+    async def close(self) -> None:
+        for slot in self._slots:
+            await self._shutdown(slot)
+        self._slots.clear()
+        if self._pw_cm is not None:
+            with suppress(Exception):
+                await self._pw_cm.__aexit__(None, None, None)
+        self._pw_cm = None
+        self._pw = None
+
+    async def __aenter__(self) -> "AsyncBrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def _launch(self, slot: _BrowserSlot) -> None:
+        slot.marker = uuid.uuid4().hex
+        slot.browser = await self._pw.chromium.launch(
+            headless=self.headless,
+            args=[*BROWSER_LAUNCH_ARGS, f"{_SLOT_MARKER_ARG}={slot.marker}"],
+        )
+        slot.context = await slot.browser.new_context(**BROWSER_CONTEXT_OPTIONS)
+        slot.pages_served = 0
+        self._stats["launches"] += 1
+
+    async def _shutdown(self, slot: _BrowserSlot) -> None:
+        with suppress(Exception):
+            if slot.context is not None:
+                await slot.context.close()
+        with suppress(Exception):
+            if slot.browser is not None:
+                await slot.browser.close()
+        slot.context = None
+        slot.browser = None
+
+    async def _recycle(self, slot: _BrowserSlot, reason: str) -> None:
+        print(f"♻️ Reciclando navegador {slot.index} ({reason}, páginas={slot.pages_served})")
+        await self._shutdown(slot)
+        key = {"pages": "recyclesByPages", "rss": "recyclesByRss"}.get(reason, "recyclesByError")
+        self._stats[key] += 1
+        await self._launch(slot)
+
+    @asynccontextmanager
+    async def page(self):
+        """Empresta uma Page nova de um navegador quente; fecha a Page ao sair."""
+        if self._idle is None:
+            raise RuntimeError("AsyncBrowserPool não iniciado (use start() ou 'async with').")
+
+        try:
+            slot: _BrowserSlot = await asyncio.wait_for(self._idle.get(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"Nenhum navegador livre no pool após {self.acquire_timeout:.0f}s.")
+        self._stats["inUse"] += 1
+        page = None
+        try:
+            if not slot.is_alive():
+                await self._recycle(slot, "error")
+            page = await slot.context.new_page()
+            yield page
+        finally:
+            if page is not None:
+                with suppress(Exception):
+                    await page.close()
+            slot.pages_served += 1
+            self._stats["pagesServed"] += 1
+            self._stats["inUse"] -= 1
+            try:
+                if not slot.is_alive():
+                    await self._recycle(slot, "error")
+                elif self.max_pages and slot.pages_served >= self.max_pages:
+                    await self._recycle(slot, "pages")
+                elif self.max_rss_mb:
+                    rss = slot.rss_mb()
+                    if rss is not None and rss >= self.max_rss_mb:
+                        await self._recycle(slot, "rss")
+            finally:
+                self._idle.put_nowait(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        out = dict(self._stats)
+        out["idle"] = self.size - out["inUse"]
+        out["slotPages"] = [s.pages_served for s in self._slots]
+        out["slotRssMb"] = [
+            round(rss, 1) if rss is not None else None
+            for rss in (s.rss_mb() for s in self._slots)
+        ]
+        return out
 
 
 # ------------------------------------------------------------
 # Playwright (principal)
 # ------------------------------------------------------------
-async def fetch_html_playwright(url: str) -> str:
+async def fetch_html_playwright(url: str, pool: Optional[AsyncBrowserPool] = None) -> str:
+    return (await fetch_html_playwright_with_headers(url, pool=pool))[0]
+
+
+def _record_response(ticket: Optional[RateTicket], resp) -> None:
+    """Status/Retry-After do documento principal no ticket do controle de taxa."""
+    if ticket is not None and resp is not None:
+        ticket.status = resp.status
+        ticket.retry_after = retry_after_seconds(resp.headers)
+
+
+async def fetch_html_playwright_with_headers(
+    url: str,
+    pool: Optional[AsyncBrowserPool] = None,
+    ticket: Optional[RateTicket] = None,
+) -> Tuple[str, Dict[str, str]]:
+    """
+    Retorna (html renderizado, headers da resposta do documento principal).
+    Com ticket, registra nele o status da resposta (429/5xx reduzem a concorrência).
+    """
+    if pool is not None:
+        async with pool.page() as page:
+            resp = await page.goto(url, wait_until="networkidle", timeout=60_000)
+            _record_response(ticket, resp)
+            await page.wait_for_timeout(3000)
+            return await page.content(), (resp.headers if resp is not None else {})
+
     try:
         from playwright.async_api import async_playwright
     except Exception as e:
@@ -405,8 +848,6 @@ async def fetch_html_playwright(url: str) -> str:
             "Playwright não disponível. Instale com: pip install playwright && playwright install"
         ) from e
 
-    from contextlib import suppress
-
     async with async_playwright() as p:
         browser = await p.chromium.launch(
             headless=True,
@@ -420,9 +861,10 @@ async def fetch_html_playwright(url: str) -> str:
         page = await context.new_page()
 
         try:
-            await page.goto(url, wait_until="networkidle", timeout=60_000)
+            resp = await page.goto(url, wait_until="networkidle", timeout=60_000)
+            _record_response(ticket, resp)
             await page.wait_for_timeout(3000)
-            return await page.content()
+            return await page.content(), (resp.headers if resp is not None else {})
 
         except (asyncio.CancelledError, KeyboardInterrupt):
             raise
@@ -436,6 +878,267 @@ async def fetch_html_playwright(url: str) -> str:
                 await browser.close()
 
 
+async def fetch_case_html(
+    url: str,
+    *,
+    pool: Optional[AsyncBrowserPool] = None,
+    validators: Optional[Dict[str, Optional[str]]] = None,
+) -> Tuple[Optional[str], Dict[str, Optional[str]]]:
+    """
+    Busca o HTML pelo caminho configurado (requests ou Playwright).
+
+    Com validadores gravados, o caminho requests faz GET condicional; o
+    Playwright não envia headers condicionais (a página é renderizada pelo SPA)
+    e a comparação fica a cargo do hash do conteúdo.
+
+    Cada requisição ocupa uma vaga do controle adaptativo de taxa do host
+    (a_rate_limiter.py); 429/5xx/timeouts reduzem a concorrência. No
+    requests, cada tentativa tem o seu ticket (send_with_retries).
+
+    Returns:
+        (html, validadores): html None quando o servidor respondeu 304
+    """
+    validators = validators or {}
+    if USE_REQUESTS_FIRST:
+        html, status, headers = await asyncio.to_thread(
+            fetch_html_requests,
+            url,
+            etag=validators.get("etag"),
+            last_modified=validators.get("lastModified"),
+        )
+        if status == 304:
+            fresh = _http_validators(headers)
+            return None, {k: fresh.get(k) or validators.get(k) for k in ("etag", "lastModified")}
+        return html, _http_validators(headers)
+
+    async with controller_for_url(url).acquire_async() as ticket:
+        html, headers = await fetch_html_playwright_with_headers(url, pool=pool, ticket=ticket)
+        return html, _http_validators(headers)
+
+
+# ------------------------------------------------------------
+# Modo concorrente (claim atômico + N páginas em voo)
+# ------------------------------------------------------------
+class HostLimiter:
+    """
+    Semáforo por host: teto fixo de requisições simultâneas ao mesmo domínio.
+    Abaixo dele, a concorrência efetiva é ajustada pelo controle adaptativo
+    (a_rate_limiter.py) dentro de fetch_case_html.
+    """
+
+    def __init__(self, per_host: int) -> None:
+        self.per_host = per_host
+        self._sems: Dict[str, asyncio.Semaphore] = {}
+
+    def for_url(self, url: str) -> asyncio.Semaphore:
+        host = (urlparse(url).hostname or "").lower()
+        sem = self._sems.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host)
+            self._sems[host] = sem
+        return sem
+
+
+class ThroughputMeter:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.ok = 0
+        self.unchanged = 0
+        self.errors = 0
+
+    @property
+    def pages_per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started
+        if elapsed <= 0:
+            return 0.0
+        return (self.ok + self.unchanged + self.errors) * 60.0 / elapsed
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        return (
+            f"ok={self.ok} | inalterados={self.unchanged} | erros={self.errors} | tempo={elapsed:.1f}s | "
+            f"throughput={self.pages_per_minute:.1f} páginas/min"
+        )
+
+
+def _store_fetched_html(
+    col: Collection,
+    doc: Dict[str, Any],
+    html: str,
+    validators: Optional[Dict[str, Optional[str]]] = None,
+) -> Optional[Tuple[int, int, int]]:
+    """
+    Persiste originalHtml, sanitizedHtml e contentMd (mesmas etapas de process_item).
+    Síncrono: executado em thread para não bloquear o event loop.
+    Retorna os tamanhos (kb) de html, html sanitizado e markdown, ou None quando
+    o hash do conteúdo é igual ao gravado (nada é reescrito).
+    """
+    doc_id = doc["_id"]
+    leased = _is_leased(doc)
+    sanitized_html = sanitize_html_keep_formatting(html)
+    html_hash = content_hash(sanitized_html)
+    if html_hash == _stored_content_hash(doc):
+        mark_unchanged(
+            col, doc_id, validators=validators, html_hash=html_hash,
+            status=_status_after_unchanged(doc), leased=leased,
+        )
+        return None
+
+    markdown = sanitize_and_convert_to_markdown(sanitized_html)
+    mark_success(
+        col, doc_id, html=html, html_hash=html_hash, validators=validators, leased=leased,
+        extra_fields={
+            "caseContent.sanitizedHtml": sanitized_html,
+            "caseContent.contentMd": markdown,
+            "audit.sourceStatus": "Processed",
+        },
+    )
+    return calculate_size_kb(html), calculate_size_kb(sanitized_html), calculate_size_kb(markdown)
+
+
+def _claim_docs(col: Collection, claim: Callable[[Collection], Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Fila de entrada: claim em lote; revalidação segue doc a doc (não muda status nem leva lease)."""
+    if claim is claim_oldest_extracted:
+        return claim_batch_extracted(col)
+    doc = claim(col)
+    return [doc] if doc else []
+
+
+async def _fetch_worker(
+    worker_id: int,
+    col: Collection,
+    pool: Optional[AsyncBrowserPool],
+    limiter: HostLimiter,
+    meter: ThroughputMeter,
+    claim: Callable[[Collection], Optional[Dict[str, Any]]] = claim_oldest_extracted,
+) -> None:
+    while True:
+        batch = await asyncio.to_thread(_claim_docs, col, claim)
+        if not batch:
+            return
+
+        # Claims de revalidação não mudam o status nem levam lease
+        leased_ids = [
+            d["_id"] for d in batch if (d.get("status") or {}).get("pipelineStatus") == PIPELINE_PROCESSING
+        ]
+        try:
+            async with _lease_heartbeat(col, leased_ids) as hb:
+                for i, doc in enumerate(batch):
+                    if hb.lost:
+                        # Lease devolvido pelo reaper (e talvez já com outro worker): não buscar o resto
+                        print(f"[w{worker_id}] Lease perdido; {len(batch) - i} doc(s) do lote descartado(s)")
+                        break
+                    await _fetch_one(worker_id, col, doc, pool, limiter, meter)
+        finally:
+            # Interrompido no meio do lote: os docs não buscados voltam para listExtracted
+            if leased_ids:
+                await asyncio.to_thread(release_claims, col, FETCH_LEASE, leased_ids)
+
+
+async def _fetch_one(
+    worker_id: int,
+    col: Collection,
+    doc: Dict[str, Any],
+    pool: Optional[AsyncBrowserPool],
+    limiter: HostLimiter,
+    meter: ThroughputMeter,
+) -> None:
+    doc_id = doc["_id"]
+    case_url = _get_case_url(doc)
+    try:
+        if not case_url:
+            raise ValueError("stfCard.caseUrl ausente")
+        async with limiter.for_url(case_url):
+            html, validators = await fetch_case_html(case_url, pool=pool, validators=_stored_validators(doc))
+
+        if html is None:
+            await asyncio.to_thread(
+                mark_unchanged, col, doc_id, validators=validators,
+                status=_status_after_unchanged(doc), leased=_is_leased(doc),
+            )
+            sizes = None
+        else:
+            sizes = await asyncio.to_thread(_store_fetched_html, col, doc, html, validators)
+
+        if sizes is None:
+            meter.unchanged += 1
+            print(f"[w{worker_id}] INALTERADO {doc_id}")
+        else:
+            meter.ok += 1
+            print(f"[w{worker_id}] OK {doc_id} | html={sizes[0]}kb sanitizado={sizes[1]}kb md={sizes[2]}kb")
+
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        raise
+    except Exception as e:
+        meter.errors += 1
+        print(f"[w{worker_id}] ERRO {doc_id}: {e}")
+        if _is_leased(doc):
+            await asyncio.to_thread(mark_error, col, doc_id, error_msg=str(e), leased=True)
+        else:
+            # Claim de revalidação (sem lease): doc já coletado, possivelmente processado adiante
+            await asyncio.to_thread(mark_revalidation_error, col, doc_id, error_msg=str(e))
+
+
+@asynccontextmanager
+async def _lease_heartbeat(col: Collection, doc_ids: List[Any]):
+    """Renova o lease dos docs do lote enquanto o worker os processa; hb.lost indica lease perdido."""
+    if not doc_ids:
+        yield HeartbeatState()
+        return
+    async with lease_heartbeat_async(col, FETCH_LEASE, doc_ids) as hb:
+        yield hb
+
+
+async def _report_throughput(meter: ThroughputMeter) -> None:
+    while True:
+        await asyncio.sleep(FETCH_REPORT_EVERY_SECONDS)
+        print(f"📈 {meter.summary()}")
+
+
+async def run_concurrent(
+    col: Collection,
+    claim: Callable[[Collection], Optional[Dict[str, Any]]] = claim_oldest_extracted,
+) -> int:
+    """
+    Consome docs elegíveis (claim_oldest_extracted, ou claim_for_revalidation em
+    REVALIDATE) com FETCH_WORKERS páginas em voo e no máximo FETCH_PER_HOST_LIMIT
+    requisições simultâneas por host.
+    Não faz perguntas ao usuário.
+    """
+    mode = "REVALIDAÇÃO" if claim is claim_for_revalidation else "FETCH CONCORRENTE"
+    print("\n-------------------------------------")
+    print(f"{mode} - workers={FETCH_WORKERS} | por host={FETCH_PER_HOST_LIMIT}")
+    print("-------------------------------------")
+
+    # Docs presos em caseScraping por workers interrompidos voltam para a fila
+    await asyncio.to_thread(reap_expired, col, FETCH_LEASE)
+
+    limiter = HostLimiter(FETCH_PER_HOST_LIMIT)
+    meter = ThroughputMeter()
+    pool = None if USE_REQUESTS_FIRST else await AsyncBrowserPool(size=FETCH_WORKERS).start()
+    reporter = asyncio.create_task(_report_throughput(meter))
+    try:
+        await asyncio.gather(*(
+            _fetch_worker(i, col, pool, limiter, meter, claim) for i in range(1, FETCH_WORKERS + 1)
+        ))
+    finally:
+        reporter.cancel()
+        with suppress(asyncio.CancelledError):
+            await reporter
+        if pool is not None:
+            print(f"Browser pool: {pool.stats()}")
+            await pool.close()
+
+    for host, st in rate_limit_stats().items():
+        print(f"Controle de taxa {host}: {st}")
+    save_rate_state()
+
+    print("\n-------------------------------------")
+    print(f"{mode} FINALIZADO | {meter.summary()}")
+    print("-------------------------------------")
+    return 0
+
+
 # ------------------------------------------------------------
 # Main
 # ------------------------------------------------------------
@@ -446,9 +1149,17 @@ async def main() -> int:
         col = get_collection()
         ensure_indexes(col)
 
+        if REVALIDATE:
+            return await run_concurrent(col, claim=claim_for_revalidation)
+        if CONCURRENT_FETCH:
+            return await run_concurrent(col)
+
         # Get processing options
         total, new, existing = get_processing_options(col)
-        option, auto_confirm = user_prompt(total, new, existing)
+        if NON_INTERACTIVE:
+            option, auto_confirm = FETCH_OPTION, True
+        else:
+            option, auto_confirm = user_prompt(total, new, existing)
 
         # Filter documents based on user choice
         if option == 1:
@@ -467,13 +1178,20 @@ async def main() -> int:
         print(f"PROCESSAMENTO INICIADO - ITENS {total_to_process}")
         print(f"-------------------------------------")
 
-        for i, doc in enumerate(docs, start=1):
-            print(f"\nItem {i}/{total_to_process}: {doc['_id']}")
-            await process_item(col, doc, auto_confirm)
-            if not auto_confirm:
-                confirm = input("Processar próximo item? (s/n): ").strip().lower()
-                if confirm != "s":
-                    break
+        pool = None if USE_REQUESTS_FIRST else await AsyncBrowserPool().start()
+        try:
+            for i, doc in enumerate(docs, start=1):
+                print(f"\nItem {i}/{total_to_process}: {doc['_id']}")
+                await process_item(col, doc, auto_confirm, pool=pool)
+                if not auto_confirm:
+                    confirm = input("Processar próximo item? (s/n): ").strip().lower()
+                    if confirm != "s":
+                        break
+        finally:
+            if pool is not None:
+                print(f"Browser pool: {pool.stats()}")
+                await pool.close()
+            save_rate_state()
 
         print("\n-------------------------------------")
         print("PROCESSAMENTO FINALIZADO")
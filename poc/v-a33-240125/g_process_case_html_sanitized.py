@@ -5,11 +5,18 @@ g_process_case_html_sanitized.py
 
 Processa caseHtmlSanitized (case_data):
 - Loop: buscar documento mais antigo com status="caseSanitized"
+  (claim com lease + heartbeat; leases expirados voltam a caseSanitized, ver a_claim_leases.py)
 - Extrair campos conforme especificação (caseCode, rapporteur, ementa, etc.)
+  a partir de um índice título -> bloco montado numa única passada pelo HTML
+  (SectionIndex), em vez de re-varrer os div.jud-text a cada seção
 - Atualizar o mesmo documento em case_data com os novos campos
 - Alterar status para "caseHtmlProcessed"
 - Logar no terminal apenas os eventos solicitados
 
+Uso:
+    python g_process_case_html_sanitized.py
+    python g_process_case_html_sanitized.py bench [N]   # índice vs varredura por seção nos N primeiros caseHtmlSanitized
+
 Dependências:
 pip install pymongo beautifulsoup4
 """
@@ -18,13 +25,22 @@ import re
 import sys
 import time
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List, Set
+from typing import Optional, Dict, Any, List, Set, Tuple
 
 from bs4 import BeautifulSoup
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.errors import PyMongoError
-from pymongo import ReturnDocument
+
+from a_claim_leases import (
+    CLAIM_BATCH_SIZE,
+    PROCESS_LEASE,
+    LeaseHeartbeat,
+    claim_batch,
+    owner_filter,
+    reap_expired,
+    release_claims,
+)
 
 
 # =========================
@@ -41,6 +57,29 @@ STATUS_OK = "caseHtmlProcessed"
 STATUS_ERROR = "caseHtmlProcessError"
 STATUS_PROCESSING = "caseProcessing"
 
+# Campos do cabeçalho (h4 "Rótulo: valor") e seções por título do h4, na ordem gravada
+HEADER_LABELS: Tuple[Tuple[str, str], ...] = (
+    ("rapporteur", "Relator(a):"),
+    ("judgmentDate", "Julgamento:"),
+    ("publicationDate", "Publicação:"),
+    ("judgingBody", "Órgão julgador:"),
+)
+PRE_WRAP_SECTIONS: Tuple[Tuple[str, str], ...] = (
+    ("publicationBlock", "Publicação"),
+    ("partiesBlock", "Partes"),
+    ("indexingText", "Indexação"),
+    ("legislationText", "Legislação"),
+    ("observationText", "Observação"),
+    ("similarCasesBlock", "Acórdãos no mesmo sentido"),
+    ("doctrineBlock", "Doutrina"),
+)
+NEXT_DIV_SECTIONS: Tuple[Tuple[str, str], ...] = (
+    ("ementaText", "Ementa"),
+    ("decisionText", "Decisão"),
+)
+
+ODS_TOOLTIP = "Conheça a Agenda 2030 da ONU"
+
 
 # =========================
 # Utils
@@ -73,14 +112,14 @@ def get_collection() -> Collection:
     return db[COLLECTION]
 
 
-# def fetch_oldest_to_process(col: Collection) -> Optional[Dict[str, Any]]:
-#     return col.find_one({"status": STATUS_INPUT}, sort=[("_id", 1)])
-def claim_oldest_to_process(col: Collection) -> Optional[Dict[str, Any]]:
-    return col.find_one_and_update(
-        {"status": STATUS_INPUT},  # caseSanitized
-        {"$set": {"status": STATUS_PROCESSING, "caseHtmlProcessingAt": datetime.now(timezone.utc)}},
-        sort=[("_id", 1)],
-        return_document=ReturnDocument.AFTER,
+def claim_batch_to_process(col: Collection, limit: int = CLAIM_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """Claim em lote (caseSanitized -> caseProcessing) de até `limit` docs, do mais antigo."""
+    return claim_batch(
+        col,
+        PROCESS_LEASE,
+        {"status": STATUS_INPUT},
+        limit=limit,
+        set_fields={"caseHtmlProcessingAt": datetime.now(timezone.utc)},
     )
 
 """ 
@@ -96,7 +135,7 @@ def mark_error(col: Collection, doc_id, *, error_msg: str) -> None:
  """
 def mark_error(col: Collection, doc_id, *, error_msg: str) -> None:
     col.update_one(
-        {"_id": doc_id, "status": STATUS_PROCESSING},
+        {"_id": doc_id, **owner_filter(PROCESS_LEASE)},
         {"$set": {
             "caseHtmlProcessedAt": datetime.now(timezone.utc),
             "caseHtmlProcessError": error_msg,
@@ -226,7 +265,7 @@ def _extract_ui_tooltips(soup: BeautifulSoup) -> List[str]:
 
 def _extract_ods_tags(soup: BeautifulSoup) -> List[str]:
     out: List[str] = []
-    imgs = soup.select('a[mattooltip="Conheça a Agenda 2030 da ONU"] img')
+    imgs = soup.select(f'a[mattooltip="{ODS_TOOLTIP}"] img')
     for img in imgs:
         alt = (img.get("alt") or "").strip()
         src = (img.get("src") or "").strip()
@@ -244,49 +283,142 @@ def _extract_ods_tags(soup: BeautifulSoup) -> List[str]:
     return uniq
 
 
+# =========================
+# Índice por documento
+# =========================
+class SectionIndex:
+    """
+    Uma passada pelos div.jud-text e pelas tags com mattooltip do HTML sanitizado:
+    - blocks: título do primeiro h4 do bloco -> bloco (primeira ocorrência vence,
+      como em _section_container_for_title)
+    - header_div / header_h4s: bloco do cabeçalho (primeiro com "Relator(a):") e
+      os textos dos seus h4, já normalizados
+    - tooltip_tags: tags com mattooltip, em ordem do documento
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        self.blocks: Dict[str, Any] = {}
+        self.header_div = None
+        for div in soup.select("div.jud-text"):
+            h4 = div.find("h4")
+            if h4:
+                self.blocks.setdefault(_clean_text(h4.get_text(" ", strip=True)), div)
+            if self.header_div is None and "Relator(a):" in div.get_text(" ", strip=True):
+                self.header_div = div
+
+        self.header_h4s: List[str] = []
+        if self.header_div is not None:
+            self.header_h4s = [_clean_text(h4.get_text(" ", strip=True)) for h4 in self.header_div.find_all("h4")]
+
+        self.tooltip_tags = soup.find_all(attrs={"mattooltip": True})
+
+    def labeled_value(self, label: str) -> str:
+        for t in self.header_h4s:
+            if t.startswith(label):
+                return _clean_text(t.split(":", 1)[1] if ":" in t else t.replace(label, "").strip())
+        return ""
+
+    def pre_wrap_text(self, title: str) -> str:
+        div = self.blocks.get(title)
+        if not div:
+            return ""
+        tpw = div.select_one("div.text-pre-wrap")
+        return _text_with_newlines(tpw) if tpw else ""
+
+    def next_div_text(self, title: str) -> str:
+        div = self.blocks.get(title)
+        if not div:
+            return ""
+        # a chave do índice já garante o h4
+        nxt = div.find("h4").find_next_sibling("div")
+        return _text_with_newlines(nxt) if nxt else ""
+
+    def ui_tooltips(self) -> List[str]:
+        tooltips: Set[str] = set()
+        for tag in self.tooltip_tags:
+            val = (tag.get("mattooltip") or "").strip()
+            if val:
+                tooltips.add(val)
+        return sorted(tooltips)
+
+    def ods_tags(self) -> List[str]:
+        out: List[str] = []
+        for tag in self.tooltip_tags:
+            if tag.name != "a" or tag.get("mattooltip") != ODS_TOOLTIP:
+                continue
+            for img in tag.find_all("img"):
+                alt = (img.get("alt") or "").strip()
+                src = (img.get("src") or "").strip()
+                if alt:
+                    out.append(alt)
+                elif src:
+                    out.append(src)
+        # remove duplicatas preservando ordem (também cobre <a> aninhados)
+        return list(dict.fromkeys(out))
+
+
 # =========================
 # Core extraction
 # =========================
 def extract_all_fields(case_html_sanitized: str) -> Dict[str, Any]:
     soup = BeautifulSoup(case_html_sanitized, "html.parser")
+    index = SectionIndex(soup)
 
-    header_div = _find_header_block(soup)
-
-    case_code = _extract_case_code(header_div)
-    derived = _extract_from_case_code(case_code)
+    case_code = index.header_h4s[0] if index.header_h4s else ""
 
     data: Dict[str, Any] = {}
 
     # Cabeçalho / IDs
     data["caseCode"] = case_code
-    data["caseDecisionType"] = _extract_decision_type(header_div)
+    data["caseDecisionType"] = index.header_h4s[1] if len(index.header_h4s) > 1 else ""
 
     # Labels do header
-    data["rapporteur"] = _extract_labeled_value(header_div, "Relator(a):")
-    data["judgmentDate"] = _extract_labeled_value(header_div, "Julgamento:")
-    data["publicationDate"] = _extract_labeled_value(header_div, "Publicação:")
-    data["judgingBody"] = _extract_labeled_value(header_div, "Órgão julgador:")
+    for field, label in HEADER_LABELS:
+        data[field] = index.labeled_value(label)
 
     # Derivados do caseCode
-    data.update(derived)
+    data.update(_extract_from_case_code(case_code))
 
     # UI/tooltips e ODS
-    data["uiTooltips"] = _extract_ui_tooltips(soup)
-    data["odsTags"] = _extract_ods_tags(soup)
+    data["uiTooltips"] = index.ui_tooltips()
+    data["odsTags"] = index.ods_tags()
 
     # Blocos text-pre-wrap
-    data["publicationBlock"] = _extract_text_pre_wrap_section(soup, "Publicação")
-    data["partiesBlock"] = _extract_text_pre_wrap_section(soup, "Partes")
-    data["indexingText"] = _extract_text_pre_wrap_section(soup, "Indexação")
-    data["legislationText"] = _extract_text_pre_wrap_section(soup, "Legislação")
-    data["observationText"] = _extract_text_pre_wrap_section(soup, "Observação")
-    data["similarCasesBlock"] = _extract_text_pre_wrap_section(soup, "Acórdãos no mesmo sentido")
-    data["doctrineBlock"] = _extract_text_pre_wrap_section(soup, "Doutrina")
+    for field, title in PRE_WRAP_SECTIONS:
+        data[field] = index.pre_wrap_text(title)
 
     # Blocos (div irmão do h4)
-    data["ementaText"] = _extract_next_div_section(soup, "Ementa")
-    data["decisionText"] = _extract_next_div_section(soup, "Decisão")
+    for field, title in NEXT_DIV_SECTIONS:
+        data[field] = index.next_div_text(title)
+
+    return _drop_empty(data)
+
+
+def extract_all_fields_by_scan(case_html_sanitized: str) -> Dict[str, Any]:
+    """Extração antiga (varre os div.jud-text a cada seção); referência para conferência e benchmark."""
+    soup = BeautifulSoup(case_html_sanitized, "html.parser")
 
+    header_div = _find_header_block(soup)
+
+    case_code = _extract_case_code(header_div)
+
+    data: Dict[str, Any] = {}
+    data["caseCode"] = case_code
+    data["caseDecisionType"] = _extract_decision_type(header_div)
+    for field, label in HEADER_LABELS:
+        data[field] = _extract_labeled_value(header_div, label)
+    data.update(_extract_from_case_code(case_code))
+    data["uiTooltips"] = _extract_ui_tooltips(soup)
+    data["odsTags"] = _extract_ods_tags(soup)
+    for field, title in PRE_WRAP_SECTIONS:
+        data[field] = _extract_text_pre_wrap_section(soup, title)
+    for field, title in NEXT_DIV_SECTIONS:
+        data[field] = _extract_next_div_section(soup, title)
+
+    return _drop_empty(data)
+
+
+def _drop_empty(data: Dict[str, Any]) -> Dict[str, Any]:
     # Remove chaves vazias (mantém listas vazias? remove também)
     cleaned: Dict[str, Any] = {}
     for k, v in data.items():
@@ -301,75 +433,142 @@ def extract_all_fields(case_html_sanitized: str) -> Dict[str, Any]:
 
 
 # =========================
-# Loop principal (status=caseSanitized)
+# Benchmark
 # =========================
-def run_loop() -> int:
+def benchmark(samples: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Compara, por documento, a extração por varredura (um scan dos div.jud-text por
+    seção) com a extração pelo SectionIndex, e confere que os campos coincidem.
+    """
+    before_s = after_s = 0.0
+    mismatches: List[str] = []
+    for label, html in samples:
+        start = time.perf_counter()
+        expected = extract_all_fields_by_scan(html)
+        before_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = extract_all_fields(html)
+        after_s += time.perf_counter() - start
+
+        if got != expected:
+            mismatches.append(label)
+    n = len(samples) or 1
+    return {
+        "docs": len(samples),
+        "scanMsPerDoc": round(before_s * 1000 / n, 3),
+        "indexMsPerDoc": round(after_s * 1000 / n, 3),
+        "speedup": round(before_s / after_s, 1) if after_s else 0.0,
+        "mismatches": mismatches,
+    }
+
+
+def bench_extract(limit: int = 200) -> int:
     col = get_collection()
-    total = 0
-
-    while True:
-#        doc = fetch_oldest_to_process(col)
-        doc = claim_oldest_to_process(col)
-
-        if not doc:
-            break
-
-        start = time.time()
+    cursor = col.find(
+        {"caseHtmlSanitized": {"$nin": [None, ""]}},
+        projection={"caseHtmlSanitized": 1},
+        limit=limit,
+    )
+    samples = [(str(d["_id"]), d["caseHtmlSanitized"].strip()) for d in cursor]
+    if not samples:
+        print(f"{ts()} - Nenhum documento com caseHtmlSanitized para comparar.")
+        return 1
+    report = benchmark(samples)
+    print(f"{ts()} - Extração de campos: {report}")
+    return 0 if not report["mismatches"] else 2
 
-        doc_id = doc["_id"]
-        title = (doc.get("caseTitle") or doc.get("caseCode") or "Sem título").strip()
 
-        print(f"{ts()} - Iniciando processamento do documento '{doc_id}': '{title}'")
+# =========================
+# Loop principal (status=caseSanitized)
+# =========================
+def process_doc(col: Collection, doc: Dict[str, Any]) -> bool:
+    """Extrai e grava um documento já em caseProcessing. Retorna True em sucesso."""
+    start = time.time()
 
-        try:
-            html_sanitized = (doc.get("caseHtmlSanitized") or "").strip()
-            if not html_sanitized:
-                raise ValueError("Documento não possui 'caseHtmlSanitized' preenchido.")
+    doc_id = doc["_id"]
+    title = (doc.get("caseTitle") or doc.get("caseCode") or "Sem título").strip()
 
-            extracted = extract_all_fields(html_sanitized)
+    print(f"{ts()} - Iniciando processamento do documento '{doc_id}': '{title}'")
 
-            # Atualiza documento com campos extraídos + status final
-            update_fields = dict(extracted)
-            update_fields["caseHtmlProcessedAt"] = datetime.now(timezone.utc)
-            update_fields["status"] = STATUS_OK
+    try:
+        html_sanitized = (doc.get("caseHtmlSanitized") or "").strip()
+        if not html_sanitized:
+            raise ValueError("Documento não possui 'caseHtmlSanitized' preenchido.")
+
+        extracted = extract_all_fields(html_sanitized)
+
+        # Atualiza documento com campos extraídos + status final
+        update_fields = dict(extracted)
+        update_fields["caseHtmlProcessedAt"] = datetime.now(timezone.utc)
+        update_fields["status"] = STATUS_OK
+
+        #col.update_one({"_id": doc_id}, {"$set": update_fields})
+        col.update_one(
+            {"_id": doc_id, **owner_filter(PROCESS_LEASE)},
+            {"$set": update_fields}
+        )
+
+
+        elapsed = time.time() - start
+
+        print(f"{ts()} - Extração concluída para o documento '{doc_id}': '{title}'")
+        print(f"{ts()} - Dados obtidos:")
+        for field_name in sorted(extracted.keys()):
+            print(f"    - {field_name}")
+        # se não extraiu nada, ainda imprime a lista vazia (conforme requisito: listar nomes)
+        if not extracted:
+            print("    - (nenhum campo extraído)")
+
+        # tempo
+        if elapsed >= 60:
+            mins = elapsed / 60.0
+            tempo_str = f"{mins:.2f} minutos"
+        else:
+            tempo_str = f"{elapsed:.2f} segundos"
 
-            #col.update_one({"_id": doc_id}, {"$set": update_fields})
-            col.update_one(
-                {"_id": doc_id, "status": STATUS_PROCESSING},
-                {"$set": update_fields}
-            )
+        print(f"{ts()} - Tempo total de processamento: '{tempo_str}'")
+        print(f"{ts()} - Status final: '{STATUS_OK}'")
 
+    except Exception as e:
+        mark_error(col, doc_id, error_msg=str(e))
+        # Requisito não pede log de erro. Mantido silencioso no terminal.
+        return False
 
-            elapsed = time.time() - start
-            total += 1
+    return True
 
-            print(f"{ts()} - Extração concluída para o documento '{doc_id}': '{title}'")
-            print(f"{ts()} - Dados obtidos:")
-            for field_name in sorted(extracted.keys()):
-                print(f"    - {field_name}")
-            # se não extraiu nada, ainda imprime a lista vazia (conforme requisito: listar nomes)
-            if not extracted:
-                print("    - (nenhum campo extraído)")
 
-            # tempo
-            if elapsed >= 60:
-                mins = elapsed / 60.0
-                tempo_str = f"{mins:.2f} minutos"
-            else:
-                tempo_str = f"{elapsed:.2f} segundos"
+def run_loop() -> int:
+    col = get_collection()
+    total = 0
+    reap_expired(col, PROCESS_LEASE)
 
-            print(f"{ts()} - Tempo total de processamento: '{tempo_str}'")
-            print(f"{ts()} - Status final: '{STATUS_OK}'")
+    while True:
+        # Um claim por lote (3 round trips) em vez de um find_one_and_update por documento
+        batch = claim_batch_to_process(col)
+        if not batch:
+            break
 
-        except Exception as e:
-            mark_error(col, doc_id, error_msg=str(e))
-            # Requisito não pede log de erro. Mantido silencioso no terminal.
+        batch_ids = [d["_id"] for d in batch]
+        try:
+            with LeaseHeartbeat(col, PROCESS_LEASE, batch_ids) as hb:
+                for doc in batch:
+                    if hb.lost:
+                        # Lote devolvido pelo reaper: o restante pode já estar com outro worker
+                        break
+                    if process_doc(col, doc):
+                        total += 1
+        finally:
+            # Interrupção no meio do lote: devolve os pendentes para a fila
+            release_claims(col, PROCESS_LEASE, batch_ids)
 
     return 0
 
 
 if __name__ == "__main__":
     try:
+        if len(sys.argv) > 1 and sys.argv[1] == "bench":
+            sys.exit(bench_extract(int(sys.argv[2]) if len(sys.argv) > 2 else 200))
         sys.exit(run_loop())
     except PyMongoError:
         # sem logs extras conforme requisito
@@ -4,11 +4,13 @@
 i_mine_casecontent_md.py
 
 Minera dados a partir de caseContent.contentMd (Markdown) em case_data:
-- Identifica seções com títulos ####
+- Identifica seções com títulos #### (tokenizador de uma passada, ver a_md_sections.py)
 - Extrai conteúdo para caseData.* conforme mapeamento
 - Partes: linha a linha, separa tipo/nome pelo ':'
 - Indexação: palavras-chave separadas por vírgula
 - Títulos não mapeados: salva em caseData.<titulo>
+- Claim com lease + heartbeat; leases expirados são devolvidos ao iniciar (ver a_claim_leases.py)
+- Claim em lote (CLAIM_BATCH_SIZE docs por round trip); pendentes do lote voltam à fila ao sair
 
 Dependências:
 pip install pymongo
@@ -21,9 +23,20 @@ import re
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-from pymongo import MongoClient, ReturnDocument
+from pymongo import MongoClient
 from pymongo.collection import Collection
 
+from a_claim_leases import (
+    CLAIM_BATCH_SIZE,
+    MINE_LEASE,
+    LeaseHeartbeat,
+    claim_batch,
+    owner_filter,
+    reap_expired,
+    release_claims,
+)
+from a_md_sections import parse_sections
+
 
 # =========================
 # Mongo (fixo)
@@ -66,29 +79,6 @@ def _safe_field_name(title: str) -> str:
     return name
 
 
-def parse_sections(md: str) -> Dict[str, str]:
-    sections: Dict[str, List[str]] = {}
-    current_title: Optional[str] = None
-
-    for raw_line in (md or "").splitlines():
-        line = raw_line.rstrip()
-        m = re.match(r"^####\s+(.*)$", line)
-        if m:
-            current_title = _clean_line(m.group(1))
-            if current_title not in sections:
-                sections[current_title] = []
-            continue
-        if current_title is not None:
-            sections[current_title].append(line)
-
-    out: Dict[str, str] = {}
-    for title, lines in sections.items():
-        content = "\n".join([ln for ln in lines]).strip()
-        if content:
-            out[title] = content
-    return out
-
-
 def parse_parties(text: str) -> List[Dict[str, str]]:
     out: List[Dict[str, str]] = []
     for line in (text or "").splitlines():
@@ -147,19 +137,23 @@ def build_case_data(sections: Dict[str, str]) -> Dict[str, Any]:
     return mapped
 
 
-def claim_next_doc(col: Collection) -> Optional[Dict[str, Any]]:
+def _pending_filter() -> Dict[str, Any]:
     base_filter: Dict[str, Any] = {
         "caseContent.contentMd": {"$exists": True, "$ne": ""},
         "processing.caseContentMineStatus": {"$ne": "processing"},
     }
     if not FORCE_REPROCESS:
         base_filter["processing.caseContentMinedAt"] = {"$exists": False}
+    return base_filter
+
 
-    return col.find_one_and_update(
-        base_filter,
-        {"$set": {"processing.caseContentMineStatus": "processing", "processing.caseContentMiningAt": utc_now()}},
-        sort=[("_id", 1)],
-        return_document=ReturnDocument.AFTER,
+def claim_batch_docs(col: Collection, limit: int = CLAIM_BATCH_SIZE) -> List[Dict[str, Any]]:
+    return claim_batch(
+        col,
+        MINE_LEASE,
+        _pending_filter(),
+        limit=limit,
+        set_fields={"processing.caseContentMiningAt": utc_now()},
     )
 
 
@@ -173,12 +167,12 @@ def mark_success(col: Collection, doc_id, case_data: Dict[str, Any]) -> None:
     for key, value in case_data.items():
         update_fields[f"caseData.{key}"] = value
 
-    col.update_one({"_id": doc_id}, {"$set": update_fields})
+    col.update_one({"_id": doc_id, **owner_filter(MINE_LEASE)}, {"$set": update_fields})
 
 
 def mark_error(col: Collection, doc_id, error_msg: str) -> None:
     col.update_one(
-        {"_id": doc_id},
+        {"_id": doc_id, **owner_filter(MINE_LEASE)},
         {"$set": {
             "processing.caseContentMinedAt": utc_now(),
             "processing.caseContentMineStatus": "error",
@@ -187,42 +181,61 @@ def mark_error(col: Collection, doc_id, error_msg: str) -> None:
     )
 
 
+def mine_doc(col: Collection, doc: Dict[str, Any]) -> bool:
+    doc_id = doc.get("_id")
+    title = (doc.get("caseTitle") or "Sem título").strip()
+
+    try:
+        md = (doc.get("caseContent", {}) or {}).get("contentMd") or ""
+        md = md.strip()
+        if not md:
+            raise ValueError("Campo caseContent.contentMd vazio.")
+
+        sections = parse_sections(md)
+        if not sections:
+            raise ValueError("Nenhuma seção #### encontrada no contentMd.")
+
+        case_data = build_case_data(sections)
+        if not case_data:
+            raise ValueError("Nenhum dado mapeado a partir das seções.")
+
+        mark_success(col, doc_id, case_data)
+        print(f"OK: {doc_id} - {title}")
+        return True
+
+    except Exception as e:
+        mark_error(col, doc_id, str(e))
+        print(f"ERRO: {doc_id} - {title}: {e}")
+        return False
+
+
 def main() -> int:
     col = get_collection()
     processed = 0
+    reap_expired(col, MINE_LEASE)
 
     while True:
-        if LIMIT and processed >= LIMIT:
-            break
-
-        doc = claim_next_doc(col)
-        if not doc:
+        limit = CLAIM_BATCH_SIZE
+        if LIMIT:
+            if processed >= LIMIT:
+                break
+            limit = min(limit, LIMIT - processed)
+
+        batch = claim_batch_docs(col, limit)
+        if not batch:
             break
 
-        doc_id = doc.get("_id")
-        title = (doc.get("caseTitle") or "Sem título").strip()
-
+        batch_ids = [d["_id"] for d in batch]
         try:
-            md = (doc.get("caseContent", {}) or {}).get("contentMd") or ""
-            md = md.strip()
-            if not md:
-                raise ValueError("Campo caseContent.contentMd vazio.")
-
-            sections = parse_sections(md)
-            if not sections:
-                raise ValueError("Nenhuma seção #### encontrada no contentMd.")
-
-            case_data = build_case_data(sections)
-            if not case_data:
-                raise ValueError("Nenhum dado mapeado a partir das seções.")
-
-            mark_success(col, doc_id, case_data)
-            processed += 1
-            print(f"OK: {doc_id} - {title}")
-
-        except Exception as e:
-            mark_error(col, doc_id, str(e))
-            print(f"ERRO: {doc_id} - {title}: {e}")
+            with LeaseHeartbeat(col, MINE_LEASE, batch_ids) as hb:
+                for doc in batch:
+                    if hb.lost:
+                        # Lote devolvido pelo reaper: o restante pode já estar com outro worker
+                        break
+                    if mine_doc(col, doc):
+                        processed += 1
+        finally:
+            release_claims(col, MINE_LEASE, batch_ids)
 
     print(f"Processamento finalizado. Total: {processed}")
     return 0
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_browser_pool.py
+
+Pool persistente de navegadores Chromium (Playwright, API síncrona):
+- Mantém N navegadores/contextos "quentes" e entrega páginas sob demanda
+- Recicla um navegador após um número configurável de páginas servidas
+  ou quando o RSS do processo Chromium (+ filhos) ultrapassa o limite
+- Expõe estatísticas do pool (lançamentos, reciclagens, páginas, espera)
+
+Uso:
+    with BrowserPool(size=2) as pool:
+        with pool.page() as page:
+            page.goto(url)
+            html = page.content()
+        log(pool.stats().summary())
+
+Env vars (defaults de BrowserPool.from_env):
+- BROWSER_POOL_SIZE=2
+- BROWSER_POOL_MAX_PAGES=200      # 0 desabilita reciclagem por páginas
+- BROWSER_POOL_MAX_RSS_MB=1500    # 0 desabilita reciclagem por memória (requer psutil)
+- BROWSER_POOL_HEADLESS=true|false
+
+Dependências:
+  pip install playwright
+  pip install psutil  (opcional, para reciclagem por RSS)
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import time
+import uuid
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from playwright.sync_api import Browser, BrowserContext, Page, Playwright, sync_playwright
+
+try:
+    import psutil
+except Exception:
+    psutil = None  # type: ignore
+
+
+USER_AGENT: str = (
+    "Mozilla/5.0 (X11; Linux x86_64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+DEFAULT_LAUNCH_ARGS: List[str] = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--window-size=1920,1080",
+]
+
+DEFAULT_CONTEXT_OPTIONS: Dict[str, Any] = {
+    "viewport": {"width": 1920, "height": 1080},
+    "user_agent": USER_AGENT,
+    "extra_http_headers": {"accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"},
+}
+
+# Switch ignorado pelo Chromium; serve apenas para localizar o processo principal de cada slot
+_SLOT_MARKER_ARG = "--cito-pool-slot"
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    v = os.getenv(name)
+    if v is None:
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+# =========================
+# Stats
+# =========================
+
+@dataclass
+class PoolStats:
+    size: int
+    launches: int = 0
+    recycles_by_pages: int = 0
+    recycles_by_rss: int = 0
+    recycles_by_error: int = 0
+    pages_served: int = 0
+    in_use: int = 0
+    total_acquire_wait_sec: float = 0.0
+    slot_pages: List[int] = field(default_factory=list)
+    slot_rss_mb: List[Optional[float]] = field(default_factory=list)
+
+    @property
+    def avg_acquire_wait_ms(self) -> float:
+        if not self.pages_served:
+            return 0.0
+        return (self.total_acquire_wait_sec / self.pages_served) * 1000.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "launches": self.launches,
+            "recyclesByPages": self.recycles_by_pages,
+            "recyclesByRss": self.recycles_by_rss,
+            "recyclesByError": self.recycles_by_error,
+            "pagesServed": self.pages_served,
+            "inUse": self.in_use,
+            "idle": self.size - self.in_use,
+            "avgAcquireWaitMs": round(self.avg_acquire_wait_ms, 2),
+            "slotPages": list(self.slot_pages),
+            "slotRssMb": list(self.slot_rss_mb),
+        }
+
+    def summary(self) -> str:
+        return (
+            f"pool size={self.size} | páginas={self.pages_served} | lançamentos={self.launches} | "
+            f"reciclagens(páginas/rss/erro)={self.recycles_by_pages}/{self.recycles_by_rss}/{self.recycles_by_error} | "
+            f"em uso={self.in_use} | espera média={self.avg_acquire_wait_ms:.1f} ms"
+        )
+
+
+# =========================
+# Slot (1 browser + 1 context)
+# =========================
+
+class _BrowserSlot:
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.marker = uuid.uuid4().hex
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.pages_served = 0
+
+    def is_alive(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    def rss_mb(self) -> Optional[float]:
+        """
+        RSS (MB) do processo principal do Chromium deste slot + todos os filhos
+        (renderers, GPU, utilitários). Retorna None se psutil não estiver disponível.
+        """
+        if psutil is None or not self.is_alive():
+            return None
+        token = f"{_SLOT_MARKER_ARG}={self.marker}"
+        for proc in psutil.process_iter(["cmdline"]):
+            try:
+                cmdline = proc.info.get("cmdline") or []
+                if token not in cmdline:
+                    continue
+                total = proc.memory_info().rss
+                for child in proc.children(recursive=True):
+                    with suppress(Exception):
+                        total += child.memory_info().rss
+                return total / (1024 * 1024)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return None
+
+
+# =========================
+# Pool
+# =========================
+
+class BrowserPool:
+    """
+    Pool de navegadores Chromium reaproveitados entre páginas.
+
+    Cada slot mantém um Browser e um BrowserContext abertos; cada chamada a
+    page() cria uma Page nova no contexto do slot e a fecha ao final, de modo
+    que o custo de lançar o Chromium é pago uma vez por slot (e por reciclagem),
+    não uma vez por URL.
+
+    A API síncrona do Playwright é presa à thread que a iniciou: use o pool
+    a partir de uma única thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int = 2,
+        max_pages_per_browser: int = 200,
+        max_rss_mb: int = 1500,
+        headless: bool = True,
+        launch_args: Optional[List[str]] = None,
+        context_options: Optional[Dict[str, Any]] = None,
+        acquire_timeout: float = 300.0,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size deve ser >= 1")
+        self.size = size
+        self.max_pages_per_browser = max(0, max_pages_per_browser)
+        self.max_rss_mb = max(0, max_rss_mb)
+        self.headless = headless
+        self.launch_args = list(launch_args or DEFAULT_LAUNCH_ARGS)
+        self.context_options = dict(context_options or DEFAULT_CONTEXT_OPTIONS)
+        self.acquire_timeout = acquire_timeout
+
+        self._pw_cm = None
+        self._pw: Optional[Playwright] = None
+        self._slots: List[_BrowserSlot] = []
+        self._idle: "queue.Queue[_BrowserSlot]" = queue.Queue()
+        self._stats = PoolStats(size=size)
+        self._closed = True
+
+        if self.max_rss_mb and psutil is None:
+            log("Aviso: psutil não instalado; reciclagem por RSS desabilitada no BrowserPool.")
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "BrowserPool":
+        params: Dict[str, Any] = {
+            "size": _env_int("BROWSER_POOL_SIZE", 2),
+            "max_pages_per_browser": _env_int("BROWSER_POOL_MAX_PAGES", 200),
+            "max_rss_mb": _env_int("BROWSER_POOL_MAX_RSS_MB", 1500),
+            "headless": _env_bool("BROWSER_POOL_HEADLESS", True),
+        }
+        params.update(overrides)
+        return cls(**params)
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> "BrowserPool":
+        if not self._closed:
+            return self
+        self._pw_cm = sync_playwright()
+        self._pw = self._pw_cm.__enter__()
+        self._closed = False
+        for i in range(self.size):
+            slot = _BrowserSlot(i)
+            self._launch(slot)
+            self._slots.append(slot)
+            self._idle.put(slot)
+        log(f"BrowserPool iniciado com {self.size} navegador(es).")
+        return self
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for slot in self._slots:
+            self._shutdown(slot)
+        self._slots.clear()
+        with suppress(Exception):
+            if self._pw_cm is not None:
+                self._pw_cm.__exit__(None, None, None)
+        self._pw_cm = None
+        self._pw = None
+        log(f"BrowserPool encerrado | {self._stats.summary()}")
+
+    def __enter__(self) -> "BrowserPool":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # ---------- slot management ----------
+
+    def _launch(self, slot: _BrowserSlot) -> None:
+        assert self._pw is not None
+        slot.marker = uuid.uuid4().hex
+        slot.browser = self._pw.chromium.launch(
+            headless=self.headless,
+            args=[*self.launch_args, f"{_SLOT_MARKER_ARG}={slot.marker}"],
+        )
+        slot.context = slot.browser.new_context(**self.context_options)
+        slot.pages_served = 0
+        self._stats.launches += 1
+
+    def _shutdown(self, slot: _BrowserSlot) -> None:
+        with suppress(Exception):
+            if slot.context is not None:
+                slot.context.close()
+        with suppress(Exception):
+            if slot.browser is not None:
+                slot.browser.close()
+        slot.context = None
+        slot.browser = None
+
+    def _recycle(self, slot: _BrowserSlot, reason: str) -> None:
+        log(f"BrowserPool: reciclando slot {slot.index} ({reason}, páginas={slot.pages_served})")
+        self._shutdown(slot)
+        if reason == "pages":
+            self._stats.recycles_by_pages += 1
+        elif reason == "rss":
+            self._stats.recycles_by_rss += 1
+        else:
+            self._stats.recycles_by_error += 1
+        self._launch(slot)
+
+    def _maybe_recycle(self, slot: _BrowserSlot, *, failed: bool) -> None:
+        if failed and not slot.is_alive():
+            self._recycle(slot, "error")
+            return
+        if self.max_pages_per_browser and slot.pages_served >= self.max_pages_per_browser:
+            self._recycle(slot, "pages")
+            return
+        if self.max_rss_mb:
+            rss = slot.rss_mb()
+            if rss is not None and rss >= self.max_rss_mb:
+                self._recycle(slot, "rss")
+
+    # ---------- public API ----------
+
+    @contextmanager
+    def page(self) -> Iterator[Page]:
+        """
+        Empresta uma Page nova de um navegador quente do pool.
+
+        A Page é fechada ao sair do bloco; o navegador volta ao pool e é
+        reciclado se atingir o limite de páginas ou de RSS.
+
+        Raises:
+            RuntimeError: se o pool não estiver iniciado ou se nenhum slot
+                ficar livre dentro de acquire_timeout
+        """
+        if self._closed:
+            raise RuntimeError("BrowserPool não iniciado (use start() ou 'with').")
+
+        t0 = time.monotonic()
+        try:
+            slot = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise RuntimeError(f"Nenhum navegador livre no pool após {self.acquire_timeout:.0f}s.")
+        self._stats.total_acquire_wait_sec += time.monotonic() - t0
+        self._stats.in_use += 1
+
+        failed = False
+        page: Optional[Page] = None
+        try:
+            if not slot.is_alive():
+                self._recycle(slot, "error")
+            assert slot.context is not None
+            page = slot.context.new_page()
+            yield page
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if page is not None:
+                with suppress(Exception):
+                    page.close()
+            slot.pages_served += 1
+            self._stats.pages_served += 1
+            self._stats.in_use -= 1
+            try:
+                if not self._closed:
+                    self._maybe_recycle(slot, failed=failed)
+            finally:
+                self._idle.put(slot)
+
+    def stats(self) -> PoolStats:
+        self._stats.slot_pages = [s.pages_served for s in self._slots]
+        self._stats.slot_rss_mb = [
+            round(rss, 1) if rss is not None else None
+            for rss in (s.rss_mb() for s in self._slots)
+        ]
+        return self._stats
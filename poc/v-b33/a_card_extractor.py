@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_card_extractor.py
+
+Backends de parsing para os cards da página de resultados do STF
+(div.result-container), usados pelos extract_cards dos estágios de busca:
+- "bs4": BeautifulSoup com html.parser (implementação original, Python puro)
+- "lxml": parser C do libxml2 + XPath pré-compilados; a página é percorrida uma
+  vez para indexar a ordem dos elementos (find_next("span") vira bisect) e o
+  texto de todos os nós de um card sai de uma única passada pela subárvore
+
+Os dois backends expõem a mesma visão do card (ResultCard), com a semântica
+do BeautifulSoup (get_text(" ", strip=True), find_next, ordem do documento),
+de modo que os extratores produzem dicts idênticos em qualquer backend.
+benchmark() confere isso em amostras reais e mede o tempo de cada backend.
+
+Uso:
+    for card in result_cards(html_raw):            # backend de CARD_PARSER
+        href = card.link_href()
+        for item in card.label_items():
+            if "Relator" in item.text:
+                valor = item.next_span_text()
+
+    report = benchmark(samples, lambda html, backend: extract_cards(html, backend=backend))
+    log(report.summary())
+
+CardIndex monta, numa passada por card, o mapa rótulo -> candidatos
+("Relator", "Julgamento", ...) e palavra-chave -> nós de texto usado por
+todos os extratores de campo.
+
+CLI (compara a visão genérica dos cards em arquivos HTML salvos):
+    python a_card_extractor.py pagina1.html [pagina2.html ...]
+    python a_card_extractor.py --fields pagina1.html [...]   # varredura por campo vs CardIndex
+
+Env vars:
+- CARD_PARSER=auto|lxml|bs4   (default auto: lxml se instalado, senão bs4)
+
+Dependências:
+  pip install beautifulsoup4
+  pip install lxml  (opcional, backend rápido)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except Exception:
+    lxml = None  # type: ignore
+    etree = None  # type: ignore
+
+
+BACKENDS: Tuple[str, ...] = ("bs4", "lxml")
+
+# Tags cujo texto o get_text() do BeautifulSoup ignora (Script/Stylesheet strings)
+_NON_TEXT_TAGS = frozenset({"script", "style"})
+
+# Elementos candidatos a rótulo ("Relator", "Julgamento", ...)
+_LABEL_TAGS = ("h4", "span", "div")
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+def lxml_available() -> bool:
+    return etree is not None
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Backend efetivo: argumento > CARD_PARSER > auto (lxml se instalado)."""
+    name = (backend or os.getenv("CARD_PARSER") or "auto").strip().lower()
+    if name == "auto":
+        return "lxml" if lxml_available() else "bs4"
+    if name not in BACKENDS:
+        raise ValueError(f"CARD_PARSER inválido: {name!r} (use auto|lxml|bs4)")
+    if name == "lxml" and not lxml_available():
+        log("Aviso: CARD_PARSER=lxml mas lxml não está instalado; usando bs4.")
+        return "bs4"
+    return name
+
+
+# =========================
+# Visão do card
+# =========================
+
+_UNSET: Any = object()
+
+
+class LabelItem:
+    """Um h4/span/div do card: texto (get_text) e o próximo <span> do documento."""
+
+    __slots__ = ("text", "_next_span", "_next_span_text")
+
+    def __init__(self, text: str, next_span: Callable[[], Optional[str]]) -> None:
+        self.text = text
+        self._next_span = next_span
+        self._next_span_text = _UNSET
+
+    def next_span_text(self) -> Optional[str]:
+        """Texto do próximo <span> em ordem do documento (find_next); None se não houver."""
+        if self._next_span_text is _UNSET:
+            self._next_span_text = self._next_span()
+        return self._next_span_text
+
+
+class StringItem:
+    """Um nó de texto do card e o texto do elemento pai."""
+
+    __slots__ = ("text", "_parent_text")
+
+    def __init__(self, text: str, parent_text: Callable[[], str]) -> None:
+        self.text = text
+        self._parent_text = parent_text
+
+    def parent_text(self) -> str:
+        return self._parent_text()
+
+
+class ResultCard:
+    """Operações sobre um div.result-container usadas pelos extratores."""
+
+    def dom_id(self) -> Optional[str]:
+        """Atributo id do container (sem limpeza)."""
+        raise NotImplementedError
+
+    def link_href(self) -> Optional[str]:
+        """href do primeiro a.mat-tooltip-trigger; None se não há link ou o link não tem href."""
+        raise NotImplementedError
+
+    def title_text(self) -> Optional[str]:
+        """get_text(" ", strip=True) do primeiro h4.ng-star-inserted; None se não houver."""
+        raise NotImplementedError
+
+    def label_items(self) -> List[LabelItem]:
+        """h4/span/div do card em ordem do documento (find_all(["h4", "span", "div"]))."""
+        raise NotImplementedError
+
+    def hrefs(self) -> List[str]:
+        """href de todos os <a> com o atributo, em ordem do documento."""
+        raise NotImplementedError
+
+    def strings_matching(self, pattern: Pattern[str]) -> List[StringItem]:
+        """Nós de texto em que pattern.search() casa (find_all(string=pattern))."""
+        raise NotImplementedError
+
+    def buttons(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """(id, mattooltip) de cada <button>, None para atributo ausente."""
+        raise NotImplementedError
+
+
+# =========================
+# Backend bs4 (original)
+# =========================
+
+class _SoupCard(ResultCard):
+    def __init__(self, tag: Any) -> None:
+        self._tag = tag
+
+    def dom_id(self) -> Optional[str]:
+        return self._tag.get("id")
+
+    def link_href(self) -> Optional[str]:
+        link = self._tag.find("a", class_="mat-tooltip-trigger")
+        if link and link.has_attr("href"):
+            return link["href"]
+        return None
+
+    def title_text(self) -> Optional[str]:
+        h4 = self._tag.find("h4", class_="ng-star-inserted")
+        return h4.get_text(" ", strip=True) if h4 else None
+
+    def label_items(self) -> List[LabelItem]:
+        return [
+            LabelItem(el.get_text(" ", strip=True), lambda el=el: _soup_next_span_text(el))
+            for el in self._tag.find_all(list(_LABEL_TAGS))
+        ]
+
+    def hrefs(self) -> List[str]:
+        return [a["href"] for a in self._tag.find_all("a") if a.has_attr("href")]
+
+    def strings_matching(self, pattern: Pattern[str]) -> List[StringItem]:
+        return [
+            StringItem(str(t), lambda t=t: t.parent.get_text(" ", strip=True) if t.parent is not None else "")
+            for t in self._tag.find_all(string=pattern)
+        ]
+
+    def buttons(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        return [(b.get("id"), b.get("mattooltip")) for b in self._tag.find_all("button")]
+
+
+def _soup_next_span_text(el: Any) -> Optional[str]:
+    nxt = el.find_next("span")
+    return nxt.get_text(" ", strip=True) if nxt else None
+
+
+def _soup_cards(html_raw: str) -> List[ResultCard]:
+    soup = BeautifulSoup(html_raw, "html.parser")
+    return [_SoupCard(tag) for tag in soup.find_all("div", class_="result-container")]
+
+
+# =========================
+# Backend lxml
+# =========================
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if etree is not None:
+    _XP_CONTAINERS = etree.XPath(f"//div[{_has_class('result-container')}]")
+    _XP_TOOLTIP_LINK = etree.XPath(f".//a[{_has_class('mat-tooltip-trigger')}]")
+    _XP_TITLE_H4 = etree.XPath(f".//h4[{_has_class('ng-star-inserted')}]")
+    _XP_LABELS = etree.XPath(".//*[self::h4 or self::span or self::div]")
+    _XP_HREFS = etree.XPath(".//a/@href")
+    _XP_BUTTONS = etree.XPath(".//button")
+    _LXML_PARSER = lxml.html.HTMLParser(encoding="utf-8", huge_tree=True)
+
+
+class _LxmlDocument:
+    """Índice da página: posição de cada nó e dos <span> em ordem do documento."""
+
+    def __init__(self, root: Any) -> None:
+        self._root = root
+        self._order: Optional[Dict[Any, int]] = None
+        self._span_pos: List[int] = []
+        self._spans: List[Any] = []
+        self._text_cache: Dict[Any, str] = {}
+
+    def _index(self) -> Dict[Any, int]:
+        if self._order is None:
+            order: Dict[Any, int] = {}
+            for i, node in enumerate(self._root.iter()):
+                order[node] = i
+                if node.tag == "span":
+                    self._span_pos.append(i)
+                    self._spans.append(node)
+            self._order = order
+        return self._order
+
+    def next_span(self, el: Any) -> Optional[Any]:
+        pos = self._index()[el]
+        i = bisect_right(self._span_pos, pos)
+        return self._spans[i] if i < len(self._spans) else None
+
+    def text(self, el: Any) -> str:
+        """Equivalente a get_text(" ", strip=True) do BeautifulSoup."""
+        cached = self._text_cache.get(el)
+        if cached is None:
+            cached = _lxml_text(el)
+            self._text_cache[el] = cached
+        return cached
+
+    def index_texts(self, container: Any) -> None:
+        """
+        Texto de todos os elementos do container numa única passada: os trechos
+        de texto são acumulados em ordem do documento e o texto de cada elemento
+        é o join da sua faixa de trechos (sem re-percorrer a subárvore).
+        """
+        chunks: List[str] = []
+        starts: Dict[Any, int] = {}
+        for event, node in etree.iterwalk(container, events=("start", "end", "comment", "pi")):
+            if event == "start":
+                starts[node] = len(chunks)
+                if node.tag not in _NON_TEXT_TAGS and node.text:
+                    _append_stripped(chunks, node.text)
+                continue
+            if event == "end":
+                self._text_cache[node] = " ".join(chunks[starts.pop(node):])
+            if node is not container and node.tail:
+                _append_stripped(chunks, node.tail)
+
+
+def _append_stripped(chunks: List[str], text: str) -> None:
+    text = text.strip()
+    if text:
+        chunks.append(text)
+
+
+def _lxml_text(el: Any) -> str:
+    parts: List[str] = []
+    for text, _parent in _lxml_strings(el):
+        _append_stripped(parts, text)
+    return " ".join(parts)
+
+
+def _lxml_strings(el: Any) -> Iterable[Tuple[str, Any]]:
+    """Nós de texto sob el em ordem do documento, com o elemento pai (sem comentários/script/style)."""
+    for node in el.iter():
+        if isinstance(node.tag, str) and node.tag not in _NON_TEXT_TAGS and node.text:
+            yield node.text, node
+        if node is not el and node.tail:
+            yield node.tail, node.getparent()
+
+
+class _LxmlCard(ResultCard):
+    def __init__(self, el: Any, doc: _LxmlDocument) -> None:
+        self._el = el
+        self._doc = doc
+        self._texts_indexed = False
+
+    def _text(self, el: Any) -> str:
+        if not self._texts_indexed:
+            self._doc.index_texts(self._el)
+            self._texts_indexed = True
+        return self._doc.text(el)
+
+    def dom_id(self) -> Optional[str]:
+        return self._el.get("id")
+
+    def link_href(self) -> Optional[str]:
+        links = _XP_TOOLTIP_LINK(self._el)
+        return links[0].get("href") if links else None
+
+    def title_text(self) -> Optional[str]:
+        h4s = _XP_TITLE_H4(self._el)
+        return self._text(h4s[0]) if h4s else None
+
+    def label_items(self) -> List[LabelItem]:
+        return [
+            LabelItem(self._text(el), lambda el=el: self._next_span_text(el))
+            for el in _XP_LABELS(self._el)
+        ]
+
+    def _next_span_text(self, el: Any) -> Optional[str]:
+        nxt = self._doc.next_span(el)
+        return self._text(nxt) if nxt is not None else None
+
+    def hrefs(self) -> List[str]:
+        return [str(h) for h in _XP_HREFS(self._el)]
+
+    def strings_matching(self, pattern: Pattern[str]) -> List[StringItem]:
+        return [
+            StringItem(text, lambda parent=parent: self._text(parent))
+            for text, parent in _lxml_strings(self._el)
+            if pattern.search(text)
+        ]
+
+    def buttons(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        return [(b.get("id"), b.get("mattooltip")) for b in _XP_BUTTONS(self._el)]
+
+
+def _lxml_cards(html_raw: str) -> List[ResultCard]:
+    if not html_raw.strip():
+        return []
+    root = lxml.html.document_fromstring(html_raw.encode("utf-8"), parser=_LXML_PARSER)
+    doc = _LxmlDocument(root)
+    return [_LxmlCard(el, doc) for el in _XP_CONTAINERS(root)]
+
+
+def result_cards(html_raw: str, backend: Optional[str] = None) -> List[ResultCard]:
+    """Cards (div.result-container) da página, em ordem do documento."""
+    if resolve_backend(backend) == "lxml":
+        return _lxml_cards(html_raw or "")
+    return _soup_cards(html_raw or "")
+
+
+# =========================
+# Índice de campos por card
+# =========================
+
+# Rótulos e palavras-chave lidos pelos extratores de cards
+CARD_LABELS: Tuple[str, ...] = ("Órgão julgador", "Relator", "Redator", "Julgamento", "Publicação")
+CARD_KEYWORDS: Tuple[str, ...] = ("Inteiro teor", "Indexação")
+
+
+class CardIndex:
+    """
+    Índice dos campos de um card montado numa única passada: cada h4/span/div
+    é testado contra todos os rótulos de uma vez (rótulo -> candidatos, do
+    mais interno para o mais externo) e os nós de texto contra todas as palavras-chave
+    (uma regex combinada). Os extratores aplicam suas regras só aos
+    candidatos, no lugar de reescanear o card por campo.
+    """
+
+    def __init__(
+        self,
+        card: ResultCard,
+        labels: Iterable[str] = CARD_LABELS,
+        keywords: Iterable[str] = CARD_KEYWORDS,
+    ) -> None:
+        self.card = card
+        self._labels: Dict[str, List[LabelItem]] = {label: [] for label in labels}
+        for item in card.label_items():
+            text = item.text
+            for label, bucket in self._labels.items():
+                if label in text:
+                    bucket.append(item)
+        # Mais interno primeiro (texto mais curto; empate em ordem do documento): o div
+        # do cabeçalho também contém "Relator"/"Publicação", e o primeiro <span> depois
+        # dele é o do Órgão julgador
+        for bucket in self._labels.values():
+            bucket.sort(key=lambda item: len(item.text))
+
+        patterns = {kw: re.compile(kw, re.IGNORECASE) for kw in keywords}
+        self._strings: Dict[str, List[StringItem]] = {kw: [] for kw in patterns}
+        if patterns:
+            combined = re.compile("|".join(f"(?:{kw})" for kw in patterns), re.IGNORECASE)
+            for item in card.strings_matching(combined):
+                for kw, pattern in patterns.items():
+                    if pattern.search(item.text):
+                        self._strings[kw].append(item)
+
+        self.hrefs: List[str] = card.hrefs()
+
+    def items(self, label: str) -> List[LabelItem]:
+        """h4/span/div cujo texto contém o rótulo, do mais interno para o mais externo."""
+        return self._labels[label]
+
+    def strings(self, keyword: str) -> List[StringItem]:
+        """Nós de texto que casam com a palavra-chave (sem diferenciar maiúsculas)."""
+        return self._strings[keyword]
+
+
+def _scan_label(card: ResultCard, label: str) -> Optional[str]:
+    matches = [item for item in card.label_items() if label in item.text]
+    if not matches:
+        return None
+    return min(matches, key=lambda item: len(item.text)).next_span_text()
+
+
+def _indexed_label(index: CardIndex, label: str) -> Optional[str]:
+    for item in index.items(label):
+        return item.next_span_text()
+    return None
+
+
+def benchmark_field_index(
+    samples: Iterable[Tuple[str, str]],
+    *,
+    backend: Optional[str] = None,
+    labels: Iterable[str] = CARD_LABELS,
+) -> Dict[str, Any]:
+    """
+    Micro-benchmark dos campos de rótulo: varredura por campo (uma passada pelo
+    card por rótulo) vs CardIndex (uma passada para todos), sobre os mesmos
+    cards já parseados. Também confere que os valores coincidem.
+    """
+    labels = tuple(labels)
+    cards = [card for _label, html in samples for card in result_cards(html, backend)]
+    scan_s = index_s = 0.0
+    mismatches = 0
+    for card in cards:
+        start = time.perf_counter()
+        scanned = [_scan_label(card, label) for label in labels]
+        scan_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = CardIndex(card, labels)
+        indexed = [_indexed_label(index, label) for label in labels]
+        index_s += time.perf_counter() - start
+
+        mismatches += scanned != indexed
+    n = len(cards) or 1
+    return {
+        "backend": resolve_backend(backend),
+        "cards": len(cards),
+        "scanMsPerCard": round(scan_s * 1000 / n, 3),
+        "indexMsPerCard": round(index_s * 1000 / n, 3),
+        "speedup": round(scan_s / index_s, 1) if index_s else 0.0,
+        "mismatches": mismatches,
+    }
+
+
+# =========================
+# Verificação + benchmark
+# =========================
+
+@dataclass
+class BackendTiming:
+    seconds: float = 0.0
+    pages: int = 0
+    cards: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "seconds": round(self.seconds, 3),
+            "pages": self.pages,
+            "cards": self.cards,
+            "msPerPage": round(self.seconds * 1000 / self.pages, 1) if self.pages else 0.0,
+        }
+
+
+@dataclass
+class BenchReport:
+    timings: Dict[str, BackendTiming] = field(default_factory=dict)
+    mismatches: List[str] = field(default_factory=list)
+
+    @property
+    def identical(self) -> bool:
+        return not self.mismatches
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "timings": {name: t.as_dict() for name, t in self.timings.items()},
+            "identical": self.identical,
+            "mismatches": list(self.mismatches),
+        }
+
+    def summary(self) -> str:
+        parts = [
+            f"{name}: {t.pages} página(s), {t.cards} card(s), {t.as_dict()['msPerPage']} ms/página"
+            for name, t in self.timings.items()
+        ]
+        base, fast = self.timings.get("bs4"), self.timings.get("lxml")
+        if base and fast and fast.seconds > 0:
+            parts.append(f"speedup lxml={base.seconds / fast.seconds:.1f}x")
+        parts.append("saídas idênticas" if self.identical else f"{len(self.mismatches)} divergência(s)")
+        return " | ".join(parts)
+
+
+def _first_difference(a: List[Dict[str, Any]], b: List[Dict[str, Any]]) -> Optional[str]:
+    if len(a) != len(b):
+        return f"{len(a)} vs {len(b)} cards"
+    for i, (ca, cb) in enumerate(zip(a, b)):
+        if ca != cb:
+            keys = sorted(k for k in set(ca) | set(cb) if ca.get(k) != cb.get(k))
+            k = keys[0] if keys else "?"
+            return f"card {i}: {k}={ca.get(k)!r} vs {cb.get(k)!r}"
+    return None
+
+
+def benchmark(
+    samples: Iterable[Tuple[str, str]],
+    extract: Callable[[str, str], List[Dict[str, Any]]],
+    *,
+    backends: Iterable[str] = BACKENDS,
+) -> BenchReport:
+    """
+    Roda extract(html, backend) em cada amostra (rótulo, html) com todos os
+    backends, somando o tempo, e registra as amostras cujos cards diferem
+    do primeiro backend (a referência, bs4 por padrão).
+    """
+    names = [b for b in backends if b != "lxml" or lxml_available()]
+    report = BenchReport(timings={name: BackendTiming() for name in names})
+    for label, html in samples:
+        outputs: Dict[str, List[Dict[str, Any]]] = {}
+        for name in names:
+            start = time.perf_counter()
+            cards = extract(html, name)
+            timing = report.timings[name]
+            timing.seconds += time.perf_counter() - start
+            timing.pages += 1
+            timing.cards += len(cards)
+            outputs[name] = cards
+        reference = outputs[names[0]]
+        for name in names[1:]:
+            diff = _first_difference(reference, outputs[name])
+            if diff:
+                report.mismatches.append(f"{label} [{name}]: {diff}")
+    return report
+
+
+_OCCURRENCE_RE = re.compile(r"Inteiro teor|Indexação", re.IGNORECASE)
+
+
+def card_view_dict(card: ResultCard) -> Dict[str, Any]:
+    """Projeção genérica de um card (todas as operações da visão), para comparar backends."""
+    return {
+        "domId": card.dom_id(),
+        "linkHref": card.link_href(),
+        "title": card.title_text(),
+        "labels": [(item.text, item.next_span_text()) for item in card.label_items()],
+        "hrefs": card.hrefs(),
+        "strings": [(item.text, item.parent_text()) for item in card.strings_matching(_OCCURRENCE_RE)],
+        "buttons": card.buttons(),
+    }
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+    fields = argv[0] == "--fields"
+    paths = argv[1:] if fields else argv
+    samples = [(p, Path(p).read_text(encoding="utf-8", errors="replace")) for p in paths]
+    if fields:
+        for backend in BACKENDS:
+            if backend == "lxml" and not lxml_available():
+                continue
+            log(f"Campos por rótulo: {benchmark_field_index(samples, backend=backend)}")
+        return 0
+    report = benchmark(
+        samples,
+        lambda html, backend: [card_view_dict(c) for c in result_cards(html, backend)],
+    )
+    for line in report.mismatches:
+        log(f"Divergência: {line}")
+    log(report.summary())
+    return 0 if report.identical else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_case_notes_parser.py
+
+Parser determinístico da seção "Observação" (rawData.rawNotes), com a mesma
+estrutura de caseData.caseNotes produzida por normalize_notes_refs
+(m_extract_case_notes_groq.py):
+- cabeçalhos "- Acórdão(s) citado(s):", "... - outros tribunais:",
+  "- Decisão(ões) monocrática(s) citada(s):" abrem blocos de referências
+- "(DESCRITOR, DESCRITOR)" vale para as linhas seguintes até o próximo
+  cabeçalho ou bloco de descritores
+- linhas "ADI 6579 (TP), RE 477554 AgR (2ªT)." / "STJ: AREsp 1553933." viram
+  um item por referência (classe, número, sufixo, órgão)
+- "- Veja ...", "- Legislação estrangeira citada: ...", "- Decisão estrangeira
+  citada: ..." são notas de uma linha; "RE 778889 (Tema 782 de RG)" e listas
+  "HC 1 e HC 2 do STF" são decompostas, o resto fica como item único
+- "Número de páginas: N." e "Análise: DD/MM/AAAA, SIGLA." vão para o info
+
+Linhas que a gramática não reconhece ficam em `rejected` (com o cabeçalho e os
+descritores vigentes) para o fallback via LLM; NOTES_COVERAGE acumula a
+cobertura do run.
+
+Uso:
+    parsed = parse_notes(raw_notes)
+    parsed.notes      # lista no formato de caseData.caseNotes
+    parsed.info       # {"pageCount": 38, "analysisDate": "17/10/2024", "analyst": "SOF"}
+    parsed.rejected   # linhas não reconhecidas (RejectedLine)
+
+CLI (mede e mostra a cobertura):
+    python a_case_notes_parser.py notas1.txt [notas2.txt ...]
+
+Dependências:
+  nenhuma (stdlib)
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+# Palavras que fazem um item virar treaty_or_recommendation (mesma regra do normalize_notes_refs)
+TREATY_WORDS = ("Carta", "Recomendação", "Plano", "ONU", "CNJ")
+
+NOTE_STF_ACORDAO = "stf_acordao"
+NOTE_STF_MONOCRATICA = "stf_monocratica"
+NOTE_OUTROS_TRIBUNAIS = "outros_tribunais"
+NOTE_DECISAO_ESTRANGEIRA = "decisao_estrangeira"
+NOTE_LEGISLACAO_ESTRANGEIRA = "legislacao_estrangeira"
+NOTE_VEJA = "veja"
+
+ITEM_STF_CASE = "stf_case"
+ITEM_STF_THEME = "stf_tema_rg"
+ITEM_OTHER_COURT_CASE = "other_court_case"
+ITEM_FOREIGN_DECISION = "foreign_decision"
+ITEM_FOREIGN_LEGISLATION = "foreign_legislation"
+ITEM_REFERENCE = "reference"
+ITEM_TREATY = "treaty_or_recommendation"
+
+# Cabeçalhos de bloco (linha só com o cabeçalho)
+_ACORDAO_RE = re.compile(
+    r"^-\s*Acórdãos?(?:\(s\))?\s+citados?(?:\(s\))?\s*(?P<other>-\s*outros\s+tribunais)?\s*:$",
+    re.IGNORECASE,
+)
+_MONOCRATICA_RE = re.compile(
+    r"^-\s*Decis(?:ão|ões)(?:\(ões\))?\s+monocráticas?(?:\(s\))?\s+citadas?(?:\(s\))?\s*:$",
+    re.IGNORECASE,
+)
+# Notas de uma linha
+_FOREIGN_RE = re.compile(
+    r"^-\s*(?P<kind>Legisla|Decis)\w*(?:\([^)]*\))?\s+estrangeiras?(?:\(s\))?\s+citadas?(?:\(s\))?\s*:\s*(?P<body>.+)$",
+    re.IGNORECASE,
+)
+_VEJA_RE = re.compile(r"^-\s*Veja\s+(?P<body>.+)$", re.IGNORECASE)
+
+_DESCRIPTORS_RE = re.compile(r"^\((?P<body>[^()]+)\)\.?$")
+_PAGES_RE = re.compile(r"^Número de páginas:\s*(?P<n>\d+)\.?$", re.IGNORECASE)
+_ANALYSIS_RE = re.compile(r"^Análise:\s*(?P<date>\d{2}/\d{2}/\d{4})\s*,\s*(?P<who>[^.,]+?)\s*\.?$", re.IGNORECASE)
+
+# "ADI 1344 MC (TP)", "RE 477554 AgR (2ªT)", "ADI 6590 MC-Ref (TP)", "RE 778889 (Tema 782 de RG)"
+_REF_RE = re.compile(
+    r"(?P<cls>[A-Z][A-Za-z]{0,9})\s+(?P<num>\d+(?:\.\d{3})*(?:/[A-Z]{2})?)"
+    r"(?P<suffix>(?:\s+[A-Z][A-Za-z]*(?:-[A-Za-z]+)*)*)"
+    r"(?:\s*\((?:(?P<org>TP|\d[ªa]\s?T)|Tema\s+(?P<theme>\d+)\s+de\s+RG)\))?"
+)
+_REF_SPLIT_RE = re.compile(r",\s+|\s+e\s+")
+_OTHER_COURT_RE = re.compile(r"^(?P<court>[A-Z][A-Za-z]{1,9})\s*:\s*(?P<refs>.+)$")
+_STF_TAIL_RE = re.compile(r"\s+do\s+STF$")
+_FOREIGN_DECISION_SPLIT_RE = re.compile(r",?\s+(?:e\s+)?(?=Caso\s)")
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+class RejectedLine(NamedTuple):
+    line: str
+    header: Optional[str]        # cabeçalho de bloco vigente (texto original)
+    descriptors: Optional[str]   # linha "(...)" vigente (texto original)
+
+    def context(self) -> str:
+        """Trecho autocontido para o fallback (cabeçalho + descritores + linha)."""
+        return "\n".join(x for x in (self.header, self.descriptors, self.line) if x)
+
+
+class ParsedNotes(NamedTuple):
+    notes: List[Dict[str, Any]]
+    info: Dict[str, Any]
+    rejected: List[RejectedLine]
+    lines: int
+
+
+# =========================
+# Itens
+# =========================
+
+def _item(item_type: str, raw_ref: str, *, case_class=None, case_number=None, suffix=None, org_tag=None) -> Dict[str, Any]:
+    if any(word in raw_ref for word in TREATY_WORDS):
+        item_type = ITEM_TREATY
+    return {
+        "itemType": item_type,
+        "caseClass": case_class or None,
+        "caseNumber": case_number or None,
+        "suffix": suffix or None,
+        "orgTag": org_tag or None,
+        "rawRef": raw_ref or None,
+    }
+
+
+def _strip_end(text: str) -> str:
+    return text.strip().rstrip(".").rstrip()
+
+
+def parse_refs(text: str, *, item_type: str = ITEM_STF_CASE, org_tag: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """Itens de uma lista "ADI 1 (TP), RE 2 AgR (1ªT) e HC 3"; None se alguma parte não for referência."""
+    items: List[Dict[str, Any]] = []
+    for part in _REF_SPLIT_RE.split(_strip_end(text)):
+        m = _REF_RE.fullmatch(part.strip())
+        if not m:
+            return None
+        org = m.group("org")
+        items.append(_item(
+            ITEM_STF_THEME if m.group("theme") else item_type,
+            part.strip(),
+            case_class=m.group("cls"),
+            case_number=m.group("num"),
+            suffix=" ".join(m.group("suffix").split()),
+            org_tag=org.replace(" ", "").replace("a", "ª") if org else org_tag,
+        ))
+    return items or None
+
+
+def _note(note_type: str, descriptors: List[str], raw_line: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"noteType": note_type, "descriptors": list(descriptors), "rawLine": raw_line, "items": items}
+
+
+def _inline_items(note_type: str, body: str) -> List[Dict[str, Any]]:
+    body = _strip_end(body)
+    if note_type == NOTE_VEJA:
+        refs = parse_refs(_STF_TAIL_RE.sub("", body))
+        return refs if refs is not None else [_item(ITEM_REFERENCE, body)]
+    if note_type == NOTE_LEGISLACAO_ESTRANGEIRA:
+        return [_item(ITEM_FOREIGN_LEGISLATION, p.strip()) for p in body.split(";") if p.strip()]
+    return [_item(ITEM_FOREIGN_DECISION, p.strip()) for p in _FOREIGN_DECISION_SPLIT_RE.split(body) if p.strip()]
+
+
+# =========================
+# Parser
+# =========================
+
+def parse_notes(raw_notes: str) -> ParsedNotes:
+    notes: List[Dict[str, Any]] = []
+    info: Dict[str, Any] = {}
+    rejected: List[RejectedLine] = []
+
+    block_type: Optional[str] = None
+    header_line: Optional[str] = None
+    descriptors: List[str] = []
+    descriptors_line: Optional[str] = None
+    count = 0
+
+    for raw_line in (raw_notes or "").splitlines():
+        line = raw_line.strip()
+        if not line or line == "Observação":
+            continue
+        count += 1
+
+        m = _ACORDAO_RE.match(line)
+        if m or _MONOCRATICA_RE.match(line):
+            block_type = (NOTE_OUTROS_TRIBUNAIS if m.group("other") else NOTE_STF_ACORDAO) if m else NOTE_STF_MONOCRATICA
+            header_line, descriptors, descriptors_line = line, [], None
+            continue
+
+        m = _DESCRIPTORS_RE.match(line)
+        if m and block_type is not None:
+            descriptors = [d.strip() for d in m.group("body").split(",") if d.strip()]
+            descriptors_line = line
+            continue
+
+        m = _FOREIGN_RE.match(line) or _VEJA_RE.match(line)
+        if m:
+            if "kind" in m.groupdict():
+                note_type = NOTE_LEGISLACAO_ESTRANGEIRA if m.group("kind").lower() == "legisla" else NOTE_DECISAO_ESTRANGEIRA
+            else:
+                note_type = NOTE_VEJA
+            notes.append(_note(note_type, [], line, _inline_items(note_type, m.group("body"))))
+            block_type, header_line, descriptors, descriptors_line = None, None, [], None
+            continue
+
+        m = _PAGES_RE.match(line)
+        if m:
+            info["pageCount"] = int(m.group("n"))
+            continue
+        m = _ANALYSIS_RE.match(line)
+        if m:
+            info["analysisDate"] = m.group("date")
+            info["analyst"] = m.group("who")
+            continue
+
+        items: Optional[List[Dict[str, Any]]] = None
+        if block_type == NOTE_OUTROS_TRIBUNAIS:
+            mc = _OTHER_COURT_RE.match(line)
+            if mc:
+                items = parse_refs(mc.group("refs"), item_type=ITEM_OTHER_COURT_CASE, org_tag=mc.group("court"))
+        elif block_type is not None:
+            items = parse_refs(line)
+
+        if items is None:
+            rejected.append(RejectedLine(line, header_line, descriptors_line))
+            continue
+        notes.append(_note(block_type, descriptors, line, items))
+
+    return ParsedNotes(notes, info, rejected, count)
+
+
+# =========================
+# Cobertura
+# =========================
+
+class NotesCoverage:
+    """Cobertura acumulada do parser no run (para logs/métricas)."""
+
+    def __init__(self) -> None:
+        self.docs = 0
+        self.docs_full = 0
+        self.lines = 0
+        self.rejected_lines = 0
+        self.fallback_docs = 0
+        self.fallback_errors = 0
+
+    def add(self, parsed: ParsedNotes) -> None:
+        self.docs += 1
+        self.lines += parsed.lines
+        self.rejected_lines += len(parsed.rejected)
+        if not parsed.rejected:
+            self.docs_full += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "docs": self.docs,
+            "docsFullyParsed": self.docs_full,
+            "lines": self.lines,
+            "rejectedLines": self.rejected_lines,
+            "lineCoverage": round(1 - self.rejected_lines / self.lines, 4) if self.lines else 1.0,
+            "fallbackDocs": self.fallback_docs,
+            "fallbackErrors": self.fallback_errors,
+        }
+
+
+NOTES_COVERAGE = NotesCoverage()
+
+
+# =========================
+# CLI
+# =========================
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+    samples: List[Tuple[str, str]] = [(p, Path(p).read_text(encoding="utf-8", errors="replace")) for p in argv]
+    coverage = NotesCoverage()
+    start = time.perf_counter()
+    results = [parse_notes(text) for _label, text in samples]
+    elapsed = time.perf_counter() - start
+    for (label, _text), parsed in zip(samples, results):
+        coverage.add(parsed)
+        for rej in parsed.rejected:
+            log(f"{label}: linha rejeitada: {rej.line}")
+    if len(samples) == 1:
+        print(json.dumps({"caseNotes": results[0].notes, "info": results[0].info}, ensure_ascii=False, indent=2))
+    log(f"Cobertura: {coverage.summary()} | {len(samples) / elapsed if elapsed else 0.0:.0f} docs/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
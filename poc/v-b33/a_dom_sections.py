@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_dom_sections.py
+
+Seções do processo direto do DOM do HTML sanitizado (caseHtmlClean), sem
+gerar o Markdown do documento:
+- uma passada do html.parser monta uma árvore mínima (nós com nome/attrs/
+  filhos, textos como str), sem BeautifulSoup
+- cada <h4> de primeiro nível abre uma seção (no HTML sanitizado os div.jud-text
+  foram desembrulhados e os h4 de título ficam na raiz); o corpo são os nós
+  até o próximo h4
+- o texto de cada corpo segue as regras do markdownify usadas por
+  convert_to_markdown (espaços, <br>, parágrafos, listas, links, ênfase,
+  escape de * e _), de modo que parse_dom_sections(html) == parse_sections(md(html))
+  e os campos rawData/caseData/caseContent.* não mudam
+
+O Markdown completo passa a ser só para exibição (gerado sob demanda).
+
+Uso:
+    sections = parse_dom_sections(sanitized_html)
+    raw_data, case_data = build_raw_and_case_data(sections)
+
+CLI (compara com markdownify + parse_sections e mede o tempo):
+    python a_dom_sections.py caso1.html [caso2.html ...]   # HTML já sanitizado
+
+Dependências:
+  nenhuma (stdlib); markdownify só para a comparação do CLI/benchmark
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+from datetime import datetime
+from html import unescape
+from html.entities import html5 as _HTML5_ENTITIES
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from a_md_sections import iter_section_spans, join_section_bodies, parse_sections
+
+
+# Tag que abre seção ("#### Título" no Markdown)
+SECTION_TAG = "h4"
+
+# Elementos vazios do html.parser do BeautifulSoup
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr",
+    "basefont", "bgsound", "command", "frame", "image", "isindex", "nextid", "spacer",
+})
+
+_PRESERVE_WS_TAGS = frozenset({"pre", "textarea"})
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# Blocos em que o markdownify remove espaços nas bordas (should_remove_whitespace_inside)
+_BLOCK_TAGS = frozenset({
+    "p", "blockquote", "article", "div", "section", "ol", "ul", "li",
+    "dl", "dt", "dd", "table", "thead", "tbody", "tfoot", "tr", "td", "th",
+})
+
+_LIST_BULLETS = "*+-"
+
+_HEADING_RE = re.compile(r"h(\d+)")
+_WHITESPACE_RE = re.compile(r"[\t ]+")
+_ALL_WHITESPACE_RE = re.compile(r"[\t \r\n]+")
+_NEWLINE_WHITESPACE_RE = re.compile(r"[\t \r\n]*[\r\n][\t \r\n]*")
+_EXTRACT_NEWLINES_RE = re.compile(r"^(\n*)((?:.*[^\n])?)(\n*)$", re.DOTALL)
+_LINE_WITH_CONTENT_RE = re.compile(r"^(.*)", re.MULTILINE)
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+# =========================
+# Árvore mínima
+# =========================
+
+class _Node:
+    __slots__ = ("name", "attrs", "children", "parent")
+
+    def __init__(self, name: str, attrs: Dict[str, str], parent: Optional["_Node"]) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.children: List[Any] = []
+        self.parent = parent
+
+
+# Comentário/doctype/PI: irmão sem conteúdo (conta para vizinhança, não gera texto)
+_MARKUP = object()
+
+_Child = Union[_Node, str, object]
+
+
+class _TreeBuilder(HTMLParser):
+    """Mesma estrutura que o BeautifulSoup/html.parser monta para o HTML sanitizado."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.root = _Node("[document]", {}, None)
+        self._cur = self.root
+        self._text: List[str] = []
+        self._closed_voids: Dict[str, int] = {}
+        self._preserve = 0
+
+    def _end_data(self) -> None:
+        if not self._text:
+            return
+        data = "".join(self._text)
+        self._text = []
+        if not self._preserve and not data.strip(_ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        self._cur.children.append(data)
+
+    def _open(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> _Node:
+        self._end_data()
+        node = _Node(tag, {k: v or "" for k, v in attrs}, self._cur)
+        self._cur.children.append(node)
+        return node
+
+    def _pop_to(self, tag: str) -> None:
+        node = self._cur
+        while node is not self.root and node.name != tag:
+            node = node.parent
+        if node is self.root:
+            return
+        cur = self._cur
+        while cur is not node.parent:
+            if cur.name in _PRESERVE_WS_TAGS:
+                self._preserve -= 1
+            cur = cur.parent
+        self._cur = node.parent
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        node = self._open(tag, attrs)
+        if tag in _VOID_TAGS:
+            self._closed_voids[tag] = self._closed_voids.get(tag, 0) + 1
+            return
+        self._cur = node
+        if tag in _PRESERVE_WS_TAGS:
+            self._preserve += 1
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._open(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._closed_voids.get(tag):
+            self._closed_voids[tag] -= 1
+            return
+        self._end_data()
+        self._pop_to(tag)
+
+    def handle_data(self, data: str) -> None:
+        self._text.append(data)
+
+    def handle_charref(self, name: str) -> None:
+        self._text.append(unescape(f"&#{name};"))
+
+    def handle_entityref(self, name: str) -> None:
+        self._text.append(_HTML5_ENTITIES.get(name + ";") or f"&{name}")
+
+    def _markup(self, data: str) -> None:
+        self._end_data()
+        self._cur.children.append(_MARKUP)
+
+    handle_comment = handle_decl = unknown_decl = handle_pi = _markup
+
+    def finish(self) -> _Node:
+        self.close()
+        self._end_data()
+        return self.root
+
+
+def build_tree(html: str) -> _Node:
+    builder = _TreeBuilder()
+    builder.feed(html or "")
+    return builder.finish()
+
+
+# =========================
+# Texto (regras do markdownify)
+# =========================
+
+def _is_heading(name: str) -> bool:
+    return name[:1] == "h" and _HEADING_RE.match(name) is not None
+
+
+def _ws_inside(el: Optional[_Child]) -> bool:
+    """Bloco cujas bordas internas perdem espaços."""
+    return el.__class__ is _Node and (el.name in _BLOCK_TAGS or _is_heading(el.name))
+
+
+def _ws_outside(el: Optional[_Child]) -> bool:
+    return el.__class__ is _Node and (el.name == "pre" or el.name in _BLOCK_TAGS or _is_heading(el.name))
+
+
+def _chomp(text: str) -> Tuple[str, str, str]:
+    prefix = " " if text and text[0] == " " else ""
+    suffix = " " if text and text[-1] == " " else ""
+    return prefix, suffix, text.strip()
+
+
+def _sibling(children: List[_Child], i: int) -> Optional[_Child]:
+    return children[i] if 0 <= i < len(children) else None
+
+
+def _next_block_content(children: List[_Child], i: int) -> Optional[_Child]:
+    for el in children[i + 1:]:
+        if isinstance(el, _Node) or (isinstance(el, str) and el.strip()):
+            return el
+    return None
+
+
+def _child_strings(node: _Node, parent_tags: frozenset) -> List[str]:
+    """Textos dos filhos já convertidos, com as quebras nas fronteiras colapsadas (máx. 2)."""
+    children = node.children
+    inside = _ws_inside(node)
+    tags = set(parent_tags)
+    tags.add(node.name)
+    if _is_heading(node.name) or node.name in ("td", "th"):
+        tags.add("_inline")
+    if node.name in ("pre", "code", "kbd", "samp"):
+        tags.add("_noformat")
+    child_tags = frozenset(tags)
+
+    strings: List[str] = []
+    for i, el in enumerate(children):
+        if el is _MARKUP:
+            continue
+        if isinstance(el, str):
+            prev, nxt = _sibling(children, i - 1), _sibling(children, i + 1)
+            if not el.strip() and (
+                (inside and (prev is None or nxt is None)) or _ws_outside(prev) or _ws_outside(nxt)
+            ):
+                continue
+            s = _convert_text(el, node, prev, nxt, child_tags)
+        else:
+            s = _convert_node(el, i, child_tags)
+        if s:
+            strings.append(s)
+
+    if node.name == "pre" or "pre" in parent_tags:
+        return strings
+    collapsed = [""]
+    for s in strings:
+        lead, content, trail = _split_newlines(s)
+        if collapsed[-1] and lead:
+            prev_trail = collapsed.pop()
+            lead = "\n" * min(2, max(len(prev_trail), len(lead)))
+        collapsed.extend((lead, content, trail))
+    return collapsed
+
+
+def _split_newlines(s: str) -> Tuple[str, str, str]:
+    """(quebras iniciais, conteúdo, quebras finais)."""
+    if s[0] != "\n" and s[-1] != "\n":
+        return "", s, ""
+    return _EXTRACT_NEWLINES_RE.match(s).groups()
+
+
+def _convert_text(text: str, parent: _Node, prev: Optional[_Child], nxt: Optional[_Child], tags: frozenset) -> str:
+    if "pre" not in tags:
+        if "\n" in text or "\r" in text:
+            text = _NEWLINE_WHITESPACE_RE.sub("\n", text)
+        if "\t" in text or "  " in text:
+            text = _WHITESPACE_RE.sub(" ", text)
+    if "_noformat" not in tags:
+        if "*" in text:
+            text = text.replace("*", r"\*")
+        if "_" in text:
+            text = text.replace("_", r"\_")
+    inside = _ws_inside(parent)
+    if _ws_outside(prev) or (inside and prev is None):
+        text = text.lstrip(" \t\r\n")
+    if _ws_outside(nxt) or (inside and nxt is None):
+        text = text.rstrip()
+    return text
+
+
+def _convert_node(node: _Node, index: int, parent_tags: frozenset) -> str:
+    text = "".join(_child_strings(node, parent_tags))
+    name = node.name
+    inline = "_inline" in parent_tags
+
+    if name in ("b", "strong", "em", "i"):
+        if "_noformat" in parent_tags:
+            return text
+        prefix, suffix, text = _chomp(text)
+        if not text:
+            return ""
+        mark = "**" if name in ("b", "strong") else "*"
+        return f"{prefix}{mark}{text}{mark}{suffix}"
+    if name == "a":
+        if "_noformat" in parent_tags:
+            return text
+        prefix, suffix, text = _chomp(text)
+        if not text:
+            return ""
+        href = node.attrs.get("href")
+        title = node.attrs.get("title")
+        if text.replace(r"\_", "_") == href and not title:
+            return f"<{href}>"
+        title_part = ' "%s"' % title.replace('"', r"\"") if title else ""
+        return f"{prefix}[{text}]({href}{title_part}){suffix}" if href else text
+    if name == "br":
+        return (text + " " if text else " ") if inline else "  \n" + text
+    if name == "p":
+        if inline:
+            return " " + text.strip(" \t\r\n") + " "
+        text = text.strip(" \t\r\n")
+        return f"\n\n{text}\n\n" if text else ""
+    if name in ("div", "article", "section"):
+        if inline:
+            return " " + text.strip() + " "
+        text = text.strip()
+        return f"\n\n{text}\n\n" if text else ""
+    if name == "blockquote":
+        text = (text or "").strip(" \t\r\n")
+        if inline:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        text = _LINE_WITH_CONTENT_RE.sub(lambda m: "> " + m.group(1) if m.group(1) else ">", text)
+        return "\n" + text + "\n\n"
+    if name in ("ul", "ol"):
+        siblings = node.parent.children if node.parent is not None else []
+        nxt = _next_block_content(siblings, index)
+        before_paragraph = nxt is not None and not (isinstance(nxt, _Node) and nxt.name in ("ul", "ol"))
+        if "li" in parent_tags:
+            return "\n" + text.rstrip()
+        return "\n\n" + text + ("\n" if before_paragraph else "")
+    if name == "li":
+        return _convert_li(node, index, text)
+    if _is_heading(name):
+        if inline:
+            return text
+        n = max(1, min(6, int(_HEADING_RE.match(name).group(1))))
+        text = _ALL_WHITESPACE_RE.sub(" ", text.strip())
+        return f"\n\n{'#' * n} {text}\n\n"
+    return text
+
+
+def _convert_li(node: _Node, index: int, text: str) -> str:
+    text = (text or "").strip()
+    if not text:
+        return "\n"
+    parent = node.parent
+    if parent is not None and parent.name == "ol":
+        start = parent.attrs.get("start")
+        first = int(start) if start and start.isnumeric() else 1
+        previous = sum(1 for el in parent.children[:index] if isinstance(el, _Node) and el.name == "li")
+        bullet = f"{first + previous}."
+    else:
+        depth = -1
+        el: Optional[_Node] = node
+        while el is not None:
+            if el.name == "ul":
+                depth += 1
+            el = el.parent
+        bullet = _LIST_BULLETS[depth % len(_LIST_BULLETS)]
+    bullet += " "
+    indent = " " * len(bullet)
+    text = _LINE_WITH_CONTENT_RE.sub(lambda m: indent + m.group(1) if m.group(1) else "", text)
+    return f"{bullet}{text[len(bullet):]}\n"
+
+
+# =========================
+# Seções
+# =========================
+
+def iter_dom_section_bodies(html_clean: str) -> Iterator[Tuple[str, str]]:
+    """
+    (título, corpo) em ordem do documento. O corpo tem as mesmas linhas que o
+    trecho do Markdown entre "#### título" e o próximo título.
+    """
+    root = build_tree(html_clean)
+    top_tags = frozenset({root.name})
+    pieces: List[str] = []
+    headers: List[int] = []  # índice em pieces da linha "#### título" de cada h4 de primeiro nível
+
+    children = root.children
+    collapsed_tail = ""
+    for i, el in enumerate(children):
+        if el is _MARKUP:
+            continue
+        if isinstance(el, str):
+            prev, nxt = _sibling(children, i - 1), _sibling(children, i + 1)
+            if not el.strip() and (_ws_outside(prev) or _ws_outside(nxt)):
+                continue
+            s = _convert_text(el, root, prev, nxt, top_tags)
+        else:
+            s = _convert_node(el, i, top_tags)
+        if not s:
+            continue
+        lead, content, trail = _split_newlines(s)
+        if collapsed_tail and lead:
+            pieces.pop()
+            lead = "\n" * min(2, max(len(collapsed_tail), len(lead)))
+        pieces.extend((lead, content))
+        if isinstance(el, _Node) and el.name == SECTION_TAG and content.startswith("#### ") and content[5:].strip():
+            headers.append(len(pieces) - 1)
+        pieces.append(trail)
+        collapsed_tail = trail
+
+    # Fim do documento: o markdownify remove as quebras finais (strip_document)
+    while pieces and not pieces[-1].strip("\n"):
+        pieces.pop()
+
+    bounds = [0] + headers + [len(pieces)]
+    for k in range(len(bounds) - 1):
+        chunk = "".join(pieces[bounds[k]:bounds[k + 1]])
+        if k == 0:
+            # Antes do primeiro h4 só vale um título que já esteja no texto
+            # (convert_to_markdown faz strip() do documento)
+            chunk = chunk.lstrip()
+            if "####" not in chunk:
+                continue
+        else:
+            title_line, _, body = chunk.partition("\n")
+            if "####" not in body and len(title_line.splitlines()) == 1:
+                yield _clean_title(title_line[5:]), body
+                continue
+        # Linha "####" dentro do corpo (h4 aninhado, texto literal): mesma regra do tokenizador Markdown
+        for span in iter_section_spans(chunk):
+            yield span.title, chunk[span.start:span.end]
+
+
+def _clean_title(s: str) -> str:
+    return " ".join(s.split())
+
+
+def parse_dom_sections(html_clean: str) -> Dict[str, str]:
+    """{título: conteúdo} do HTML sanitizado, igual a parse_sections(convert_to_markdown(html_clean))."""
+    return join_section_bodies(iter_dom_section_bodies(html_clean))
+
+
+# =========================
+# Benchmark
+# =========================
+
+def benchmark(
+    samples: Iterable[Tuple[str, str]],
+    to_markdown: Callable[[str], str],
+) -> Dict[str, Any]:
+    """
+    Compara, por documento, o caminho antigo (to_markdown + parse_sections)
+    com parse_dom_sections e confere que as seções coincidem.
+    """
+    before_s = after_s = 0.0
+    docs = 0
+    mismatches: List[str] = []
+    for label, html_clean in samples:
+        docs += 1
+        start = time.perf_counter()
+        expected = parse_sections(to_markdown(html_clean))
+        before_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = parse_dom_sections(html_clean)
+        after_s += time.perf_counter() - start
+
+        if got != expected:
+            mismatches.append(label)
+    n = docs or 1
+    return {
+        "docs": docs,
+        "markdownMsPerDoc": round(before_s * 1000 / n, 3),
+        "domMsPerDoc": round(after_s * 1000 / n, 3),
+        "speedup": round(before_s / after_s, 1) if after_s else 0.0,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+    from markdownify import markdownify as md
+
+    def to_markdown(html: str) -> str:
+        return md(
+            html,
+            heading_style="ATX",
+            bullet="*",
+            strong_em_symbol="*",
+            strip=["script", "style", "noscript", "iframe", "object", "embed"],
+        ).strip()
+
+    samples = [(p, Path(p).read_text(encoding="utf-8", errors="replace")) for p in argv]
+    report = benchmark(samples, to_markdown)
+    log(f"Seções do DOM: {report}")
+    return 0 if not report["mismatches"] else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
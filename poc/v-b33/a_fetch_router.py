@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_fetch_router.py
+
+Roteamento aprendido entre o caminho barato (requests) e o navegador
+(Playwright) para páginas de processo do STF:
+- Valida o HTML devolvido pelo requests pelos marcadores de conteúdo
+  (div.mat-tab-body-wrapper e div.jud-text, os mesmos da prontidão no
+  Playwright); sem eles a resposta é o shell vazio do SPA
+- Registra tentativas/sucessos por padrão de URL (host + path com ids
+  normalizados) e por caminho
+- Padrões em que o requests nunca entrega conteúdo passam a ir direto ao
+  navegador; a cada ROUTER_EXPLORE_EVERY fetches o requests é testado de
+  novo (o site pode mudar)
+- Estatísticas persistidas em disco entre execuções (ROUTER_STATE_FILE)
+
+Uso:
+    if FETCH_ROUTER.prefer_requests(url):
+        html = fetch_requests(url)
+        ok = has_content_markers(html)
+        FETCH_ROUTER.record(url, "requests", ok)
+    ...
+    FETCH_ROUTER.save(force=True)
+
+Env vars:
+- ROUTER_MIN_ATTEMPTS=5          (tentativas antes de confiar na taxa)
+- ROUTER_MIN_SUCCESS_RATE=0.5    (abaixo disso o requests é pulado)
+- ROUTER_EXPLORE_EVERY=25        (re-testa o requests a cada N fetches; 0 desabilita)
+- ROUTER_STATE_FILE=/caminho.json (default ./.fetch_routes.json ao lado deste arquivo)
+
+Dependências:
+  nenhuma (stdlib)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+
+DEFAULT_STATE_FILE = Path(__file__).resolve().parent / ".fetch_routes.json"
+
+# Marcadores exigidos no HTML de um processo renderizado
+CASE_CONTENT_MARKERS: Tuple[str, ...] = ("mat-tab-body-wrapper", "jud-text")
+
+ROUTES: Tuple[str, ...] = ("requests", "playwright")
+
+# Intervalo mínimo entre gravações do estado em disco
+_SAVE_EVERY_SECONDS = 10.0
+
+# Segmentos de path com dígitos (sjur123456, 4567, ...) viram {id}
+_ID_SEGMENT_RE = re.compile(r"\d")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+def has_content_markers(html: Optional[str], markers: Iterable[str] = CASE_CONTENT_MARKERS) -> bool:
+    """True se todos os marcadores (nomes de classe) aparecem no HTML."""
+    if not html:
+        return False
+    # Exige o nome como classe de um elemento: o shell do SPA pode citá-lo em CSS/JS inline
+    return all(re.search(rf"""class=["'][^"']*\b{re.escape(m)}\b""", html) for m in markers)
+
+
+def url_pattern(url: str) -> str:
+    """Host + path com segmentos de id normalizados: jurisprudencia.stf.jus.br/pages/search/{id}/false."""
+    parsed = urlparse(url)
+    parts = ["{id}" if _ID_SEGMENT_RE.search(p) else p for p in parsed.path.split("/") if p]
+    return f"{(parsed.hostname or '').lower()}/{'/'.join(parts)}"
+
+
+# =========================
+# Stats por padrão/caminho
+# =========================
+
+@dataclass
+class RouteStats:
+    attempts: int = 0
+    successes: int = 0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "successRate": round(self.success_rate, 3),
+        }
+
+
+class FetchRouter:
+    """Decide por padrão de URL se vale tentar o requests antes do navegador. Thread-safe."""
+
+    def __init__(
+        self,
+        *,
+        min_attempts: int = 5,
+        min_success_rate: float = 0.5,
+        explore_every: int = 25,
+        state_file: Optional[Path] = None,
+    ) -> None:
+        self.min_attempts = max(1, min_attempts)
+        self.min_success_rate = min_success_rate
+        self.explore_every = max(0, explore_every)
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, RouteStats]] = {}
+        self._skipped: Dict[str, int] = {}
+        self._last_save = 0.0
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> "FetchRouter":
+        return cls(
+            min_attempts=_env_int("ROUTER_MIN_ATTEMPTS", 5),
+            min_success_rate=_env_float("ROUTER_MIN_SUCCESS_RATE", 0.5),
+            explore_every=_env_int("ROUTER_EXPLORE_EVERY", 25),
+            state_file=Path(os.getenv("ROUTER_STATE_FILE") or DEFAULT_STATE_FILE),
+        )
+
+    # ---------- persistence ----------
+
+    def _load(self) -> None:
+        if self.state_file is None or not self.state_file.exists():
+            return
+        try:
+            data = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for pattern, routes in (data.get("patterns") or {}).items():
+            self._routes[pattern] = {
+                route: RouteStats(attempts=int(st.get("attempts", 0)), successes=int(st.get("successes", 0)))
+                for route, st in (routes or {}).items()
+                if route in ROUTES
+            }
+        if self._routes:
+            log(f"FetchRouter: {len(self._routes)} padrão(ões) de URL carregados de {self.state_file.name}")
+
+    def save(self, *, force: bool = False) -> None:
+        if self.state_file is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < _SAVE_EVERY_SECONDS:
+            return
+        self._last_save = now
+        data = {"updatedAt": datetime.now(timezone.utc).isoformat(), "patterns": self.stats()}
+        try:
+            tmp = self.state_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            log(f"Aviso: falha ao gravar estado do FetchRouter: {e}")
+
+    # ---------- decisão ----------
+
+    def prefer_requests(self, url: str) -> bool:
+        """False quando o requests já falhou o bastante neste padrão (salvo rodada de exploração)."""
+        pattern = url_pattern(url)
+        with self._lock:
+            st = self._routes.get(pattern, {}).get("requests")
+            if st is None or st.attempts < self.min_attempts or st.success_rate >= self.min_success_rate:
+                return True
+            skipped = self._skipped.get(pattern, 0) + 1
+            if self.explore_every and skipped >= self.explore_every:
+                self._skipped[pattern] = 0
+                return True
+            self._skipped[pattern] = skipped
+            return False
+
+    def record(self, url: str, route: str, ok: bool) -> None:
+        pattern = url_pattern(url)
+        with self._lock:
+            st = self._routes.setdefault(pattern, {}).setdefault(route, RouteStats())
+            st.attempts += 1
+            if ok:
+                st.successes += 1
+        self.save()
+
+    # ---------- metrics ----------
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                pattern: {route: st.as_dict() for route, st in routes.items()}
+                for pattern, routes in self._routes.items()
+            }
+
+    def summary(self) -> str:
+        parts = []
+        for pattern, routes in self.stats().items():
+            req = routes.get("requests") or {}
+            pw = routes.get("playwright") or {}
+            parts.append(
+                f"{pattern}: requests {req.get('successes', 0)}/{req.get('attempts', 0)} | "
+                f"playwright {pw.get('successes', 0)}/{pw.get('attempts', 0)}"
+            )
+        return "; ".join(parts) or "sem fetches"
+
+
+FETCH_ROUTER = FetchRouter.from_env()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_html_sanitizer.py
+
+Sanitização do HTML do processo numa única passada:
+- sanitize_html_stream(): tokenizador em streaming (html.parser da stdlib, o
+  mesmo que o BeautifulSoup usa), sem árvore; descarta script/style/noscript/
+  iframe/object/embed pela profundidade, isola o primeiro
+  div.mat-tab-body-wrapper e aplica a allowlist de tags/atributos enquanto lê.
+  Quando o wrapper fecha, o resto da página nem é tokenizado
+- sanitize_html_bs4(): implementação original (parse completo, decompose,
+  str(wrapper) + segundo parse, unwrap/attrs tag a tag); referência para
+  conferência e benchmark
+
+O sanitizador em streaming reproduz a semântica da árvore do BeautifulSoup
+com html.parser (pilha de tags abertas com fechamento até a tag
+correspondente, elementos vazios, colapso de strings só de espaços, inclusive
+o que o segundo parse faz com textos que ficavam separados por um script
+removido) e a serialização (<br/>, escape de &<>, aspas do href), de modo
+que a saída é byte a byte a mesma da referência.
+
+Uso:
+    sanitized = sanitize_html(html)          # backend de HTML_SANITIZER
+
+CLI (compara com a referência bs4 e mede o tempo):
+    python a_html_sanitizer.py caso1.html [caso2.html ...]
+
+Env vars:
+- HTML_SANITIZER=stream|bs4   (default stream)
+
+Dependências:
+  nenhuma (stdlib); beautifulsoup4 só para o backend bs4 (referência)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from html import unescape
+from html.entities import html5 as _HTML5_ENTITIES
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+BACKENDS: Tuple[str, ...] = ("bs4", "stream")
+
+# Subárvores descartadas por inteiro (decompose)
+REMOVED_TAGS = frozenset({"script", "style", "noscript", "iframe", "object", "embed"})
+
+# Tags mantidas na saída; as demais são desembrulhadas (unwrap)
+ALLOWED_TAGS = frozenset({
+    "b", "strong", "i", "em", "u",
+    "p", "br",
+    "ul", "ol", "li",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+    "a",
+    "blockquote",
+})
+
+# Conteúdo do processo (aba de decisão do STF)
+WRAPPER_TAG = "div"
+WRAPPER_CLASS = "mat-tab-body-wrapper"
+
+# Elementos vazios do html.parser do BeautifulSoup (fechados no próprio start tag, serializados <x/>)
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr",
+    "basefont", "bgsound", "command", "frame", "image", "isindex", "nextid", "spacer",
+})
+
+# Tags em que strings só de espaços não são colapsadas
+_PRESERVE_WS_TAGS = frozenset({"pre", "textarea"})
+
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# Tipos de entrada na pilha de tags abertas
+_DROPPED, _UNWRAPPED, _KEPT = 0, 1, 2
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Backend efetivo: argumento > HTML_SANITIZER > stream."""
+    name = (backend or os.getenv("HTML_SANITIZER") or "stream").strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"HTML_SANITIZER inválido: {name!r} (use stream|bs4)")
+    return name
+
+
+def _collapse(s: str) -> str:
+    """String só de espaços ASCII vira "\\n" (se tiver quebra de linha) ou " ", como no endData do bs4."""
+    if s.strip(_ASCII_SPACES):
+        return s
+    return "\n" if "\n" in s else " "
+
+
+def _escape_text(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _quote_attr(value: str) -> str:
+    value = _escape_text(value)
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"' + value.replace('"', "&quot;") + '"'
+
+
+def _has_wrapper_class(attrs: List[Tuple[str, Optional[str]]]) -> bool:
+    classes = None
+    for key, value in attrs:
+        if key == "class":
+            classes = value  # atributo repetido: vale o último
+    return bool(classes) and WRAPPER_CLASS in classes.split()
+
+
+# =========================
+# Streaming
+# =========================
+
+class _WrapperClosed(Exception):
+    """Interrompe a tokenização quando o wrapper fecha."""
+
+
+class _StreamSanitizer(HTMLParser):
+    """
+    Eventos do html.parser aplicados direto na saída. Textos são acumulados
+    como no bs4 (um nó por trecho entre marcações) e, dentro do wrapper,
+    agrupados em "runs": trechos separados só por elementos removidos viram um
+    único texto no segundo parse do original e são colapsados de novo.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self._out: List[str] = []
+        self._text: List[str] = []
+        self._run: Optional[List[str]] = None  # None fora do wrapper
+        self._stack: List[Tuple[str, int]] = []
+        self._open: Dict[str, int] = {}
+        self._closed_voids: Dict[str, int] = {}
+        self._drop_at: Optional[int] = None  # índice na pilha da raiz removida
+        self._wrapper_at: Optional[int] = None
+        self._preserve = 0
+        self._preserve_in_wrapper = 0
+
+    def result(self) -> str:
+        return "".join(self._out)
+
+    # ---------- texto ----------
+
+    def _end_data(self) -> None:
+        if not self._text:
+            return
+        data = "".join(self._text)
+        self._text = []
+        if self._drop_at is not None:
+            return
+        if not self._preserve:
+            data = _collapse(data)
+        if self._run is None:
+            self._out.append(_escape_text(data))
+        else:
+            self._run.append(data)
+
+    def _flush_run(self) -> None:
+        run = self._run
+        if not run:
+            return
+        data = run[0] if len(run) == 1 else "".join(run)
+        if not self._preserve_in_wrapper:
+            data = _collapse(data)
+        self._out.append(_escape_text(data))
+        run.clear()
+
+    def _special(self, data: str, prefix: str, suffix: str) -> None:
+        """Comentário/doctype/CDATA/PI: nó próprio, sem escape."""
+        self._end_data()
+        if self._drop_at is not None:
+            return
+        self._flush_run()
+        preserve = self._preserve if self._run is None else self._preserve_in_wrapper
+        self._out.append(prefix + (data if preserve else _collapse(data)) + suffix)
+
+    # ---------- pilha ----------
+
+    def _push(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        depth = len(self._stack)
+        if self._drop_at is not None:
+            kind = _DROPPED
+        elif tag in REMOVED_TAGS:
+            kind = _DROPPED
+            self._drop_at = depth
+        elif self._wrapper_at is None and tag == WRAPPER_TAG and _has_wrapper_class(attrs):
+            # Daqui em diante a saída é só o conteúdo do wrapper
+            kind = _UNWRAPPED
+            self._wrapper_at = depth
+            self._out = []
+            self._run = []
+        elif tag in ALLOWED_TAGS:
+            kind = _KEPT
+            self._flush_run()
+            if tag == "br":
+                self._out.append("<br/>")
+            elif tag == "a":
+                href = None
+                for key, value in attrs:
+                    if key == "href":
+                        href = value
+                self._out.append(f"<a href={_quote_attr(href)}>" if href else "<a>")
+            else:
+                self._out.append(f"<{tag}>")
+        else:
+            kind = _UNWRAPPED
+            self._flush_run()
+        self._stack.append((tag, kind))
+        self._open[tag] = self._open.get(tag, 0) + 1
+        if tag in _PRESERVE_WS_TAGS:
+            self._preserve += 1
+            if self._wrapper_at is not None:
+                self._preserve_in_wrapper += 1
+
+    def _pop(self) -> None:
+        tag, kind = self._stack.pop()
+        self._open[tag] -= 1
+        if kind != _DROPPED:
+            self._flush_run()  # antes de sair do pre/textarea
+        if tag in _PRESERVE_WS_TAGS:
+            self._preserve -= 1
+            if self._wrapper_at is not None:
+                self._preserve_in_wrapper -= 1
+        depth = len(self._stack)
+        if kind == _DROPPED:
+            if depth == self._drop_at:
+                self._drop_at = None
+            return
+        if kind == _KEPT and tag not in _VOID_TAGS:
+            self._out.append(f"</{tag}>")
+        if depth == self._wrapper_at:
+            raise _WrapperClosed()
+
+    def _pop_to(self, tag: str) -> None:
+        """Fecha até a ocorrência mais recente de tag (sem nenhuma aberta, ignora), como o _popToTag do bs4."""
+        if not self._open.get(tag):
+            return
+        while self._stack[-1][0] != tag:
+            self._pop()
+        self._pop()
+
+    def close_all(self) -> None:
+        self._end_data()
+        try:
+            while self._stack:
+                self._pop()
+        except _WrapperClosed:
+            pass
+        self._flush_run()
+
+    # ---------- eventos do html.parser ----------
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._end_data()
+        self._push(tag, attrs)
+        if tag in _VOID_TAGS:
+            self._pop_to(tag)
+            self._closed_voids[tag] = self._closed_voids.get(tag, 0) + 1
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._end_data()
+        self._push(tag, attrs)
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._closed_voids.get(tag):
+            # </br> depois de <br>: o elemento já foi fechado no start tag
+            self._closed_voids[tag] -= 1
+            return
+        self._end_data()
+        self._pop_to(tag)
+
+    def handle_data(self, data: str) -> None:
+        self._text.append(data)
+
+    def handle_charref(self, name: str) -> None:
+        self._text.append(unescape(f"&#{name};"))
+
+    def handle_entityref(self, name: str) -> None:
+        # Entidade desconhecida fica como texto literal "&nome" (sem o ";"), como no bs4
+        self._text.append(_HTML5_ENTITIES.get(name + ";") or f"&{name}")
+
+    def handle_comment(self, data: str) -> None:
+        self._special(data, "<!--", "-->")
+
+    def handle_decl(self, decl: str) -> None:
+        self._special(decl[len("DOCTYPE "):], "<!DOCTYPE ", ">\n")
+        if self._drop_at is None and self._run is not None:
+            self._run.append("\n")  # o "\n" serializado vira texto no segundo parse
+
+    def unknown_decl(self, data: str) -> None:
+        if data.upper().startswith("CDATA["):
+            self._special(data[len("CDATA["):], "<![CDATA[", "]]>")
+        else:
+            self._special(data, "<?", "?>")
+
+    def handle_pi(self, data: str) -> None:
+        self._special(data, "<?", ">")
+
+
+def sanitize_html_stream(html: str) -> str:
+    parser = _StreamSanitizer()
+    try:
+        parser.feed(html)
+        parser.close()
+        parser.close_all()
+    except _WrapperClosed:
+        pass
+    return parser.result().strip()
+
+
+# =========================
+# Referência (BeautifulSoup)
+# =========================
+
+def sanitize_html_bs4(html: str) -> str:
+    """Implementação original: dois parses completos e uma varredura de todas as tags."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(sorted(REMOVED_TAGS)):
+        tag.decompose()
+    content = soup.find(WRAPPER_TAG, class_=WRAPPER_CLASS)
+    if content is not None:
+        soup = BeautifulSoup(str(content), "html.parser")
+
+    for tag in list(soup.find_all(True)):
+        if tag.name not in ALLOWED_TAGS:
+            tag.unwrap()
+        elif tag.name != "a":
+            tag.attrs = {}
+        else:
+            href = tag.get("href")
+            tag.attrs = {}
+            if href:
+                tag["href"] = href
+
+    return str(soup).strip()
+
+
+def sanitize_html(html: str, *, backend: Optional[str] = None) -> str:
+    """
+    Mantém só o conteúdo do processo (div.mat-tab-body-wrapper, ou a página
+    inteira sem ele) com formatação e links. Em erro de parse, cai para a
+    remoção de script/style por regex.
+    """
+    try:
+        if resolve_backend(backend) == "bs4":
+            return sanitize_html_bs4(html)
+        return sanitize_html_stream(html)
+    except ValueError:
+        raise
+    except Exception:
+        html = re.sub(r"<(script|style)[^>]*>.*?</\1>", "", html, flags=re.DOTALL | re.IGNORECASE)
+        return html.strip()
+
+
+# =========================
+# Benchmark
+# =========================
+
+_TAG_WS_RE = re.compile(r">\s+<")
+
+
+def normalize_html(html: str) -> str:
+    """Forma normalizada para conferência: entidades resolvidas, espaços colapsados."""
+    return _TAG_WS_RE.sub("><", " ".join(unescape(html or "").split()))
+
+
+def benchmark(samples: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Sanitiza cada amostra (rótulo, html) com a referência bs4 e com o
+    streaming, somando o tempo. Amostras com saída diferente byte a byte vão
+    para "normalized" (iguais após normalize_html) ou "mismatches".
+    """
+    before_s = after_s = 0.0
+    docs = 0
+    normalized: List[str] = []
+    mismatches: List[str] = []
+    for label, html in samples:
+        docs += 1
+        start = time.perf_counter()
+        expected = sanitize_html_bs4(html)
+        before_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = sanitize_html_stream(html)
+        after_s += time.perf_counter() - start
+
+        if got != expected:
+            if normalize_html(got) == normalize_html(expected):
+                normalized.append(label)
+            else:
+                mismatches.append(label)
+    n = docs or 1
+    return {
+        "docs": docs,
+        "bs4MsPerDoc": round(before_s * 1000 / n, 3),
+        "streamMsPerDoc": round(after_s * 1000 / n, 3),
+        "speedup": round(before_s / after_s, 1) if after_s else 0.0,
+        "normalized": normalized,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+    samples = [(p, Path(p).read_text(encoding="utf-8", errors="replace")) for p in argv]
+    report = benchmark(samples)
+    log(f"Sanitização HTML: {report}")
+    return 0 if not report["mismatches"] else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
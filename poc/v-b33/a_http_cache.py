@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_http_cache.py
+
+Cache local de respostas HTTP (em disco, endereçado por conteúdo):
+- Chave: tipo de fetch ("search", "case_requests", "case_playwright", "pdf", ...)
+  + URL normalizada (esquema/host em minúsculas, porta default removida,
+  query ordenada, sem fragmento)
+- Corpo gravado comprimido (gzip) em blobs/<sha[:2]>/<sha256>.gz; URLs com o
+  mesmo conteúdo compartilham o blob
+- Índice em SQLite (entries + blobs), seguro para uso entre threads
+- Expiração por TTL e eviction por tamanho (LRU pelo último acesso)
+- Relatório de hits/misses (HTTP_CACHE.stats())
+
+Uso:
+    html = cached_text(url, kind="case_requests", fetch=lambda: baixar(url))
+    log(HTTP_CACHE.stats().summary())
+
+CLI:
+    python a_http_cache.py stats|evict|clear
+
+Env vars (HttpCache.from_env):
+- HTTP_CACHE=true|false          (default false; desligado = sempre busca na rede)
+- HTTP_CACHE_DIR=/caminho        (default ./.http_cache ao lado deste arquivo)
+- HTTP_CACHE_TTL_HOURS=168       (0 = não expira)
+- HTTP_CACHE_MAX_MB=2048         (0 = sem limite)
+
+Dependências:
+  nenhuma (stdlib)
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".http_cache"
+
+# Eviction por tamanho roda a cada N gravações (e sob demanda via evict())
+_EVICT_EVERY_PUTS = 50
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    raw_bytes INTEGER NOT NULL,
+    stored_bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+    status INTEGER,
+    content_type TEXT,
+    meta TEXT,
+    stored_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_sha256 ON entries(sha256);
+"""
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    v = os.getenv(name)
+    if v is None:
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+def normalize_url(url: str) -> str:
+    """URL canônica para a chave do cache (não altera o path nem os valores da query)."""
+    parts = urlsplit((url or "").strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    netloc = host
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+# =========================
+# Stats
+# =========================
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    stores: int = 0
+    evicted_entries: int = 0
+    evicted_blobs: int = 0
+    bytes_served: int = 0
+    bytes_stored: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return (self.hits / total) if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hitRate": round(self.hit_rate, 4),
+            "stores": self.stores,
+            "evictedEntries": self.evicted_entries,
+            "evictedBlobs": self.evicted_blobs,
+            "bytesServed": self.bytes_served,
+            "bytesStored": self.bytes_stored,
+        }
+
+    def summary(self) -> str:
+        return (
+            f"cache hits={self.hits} | misses={self.misses} (expirados={self.expired}) | "
+            f"hit rate={self.hit_rate * 100:.1f}% | gravações={self.stores} | "
+            f"servido={self.bytes_served / 1024:.0f} kb | evictions={self.evicted_entries}"
+        )
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    kind: str
+    body: bytes
+    sha256: str
+    status: Optional[int]
+    content_type: Optional[str]
+    meta: Dict[str, Any]
+    stored_at: float
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+
+# =========================
+# Cache
+# =========================
+
+class HttpCache:
+    """
+    Cache de respostas em disco. Com enabled=False todas as leituras são miss
+    e as gravações são ignoradas (o chamador sempre vai à rede).
+    """
+
+    def __init__(
+        self,
+        root: Path = DEFAULT_CACHE_DIR,
+        *,
+        ttl_seconds: float = 168 * 3600,
+        max_bytes: int = 2048 * 1024 * 1024,
+        enabled: bool = True,
+    ) -> None:
+        self.root = Path(root)
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self.max_bytes = max(0, max_bytes)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._puts_since_evict = 0
+        self._stats = CacheStats()
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "HttpCache":
+        params: Dict[str, Any] = {
+            "root": Path(os.getenv("HTTP_CACHE_DIR") or DEFAULT_CACHE_DIR),
+            "ttl_seconds": _env_float("HTTP_CACHE_TTL_HOURS", 168) * 3600,
+            "max_bytes": int(_env_float("HTTP_CACHE_MAX_MB", 2048) * 1024 * 1024),
+            "enabled": _env_bool("HTTP_CACHE", False),
+        }
+        params.update(overrides)
+        return cls(**params)
+
+    # ---------- storage ----------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.root / "blobs" / sha[:2] / f"{sha}.gz"
+
+    @staticmethod
+    def _key(kind: str, url: str) -> str:
+        return f"{kind} {normalize_url(url)}"
+
+    # ---------- public API ----------
+
+    def get(self, url: str, *, kind: str = "http") -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        key = self._key(kind, url)
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT sha256, status, content_type, meta, stored_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                return None
+            sha, status, content_type, meta, stored_at = row
+            if self.ttl_seconds and time.time() - stored_at > self.ttl_seconds:
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                db.commit()
+                self._stats.misses += 1
+                self._stats.expired += 1
+                return None
+            try:
+                body = gzip.decompress(self._blob_path(sha).read_bytes())
+            except (OSError, EOFError):
+                # blob ausente/corrompido: trata como miss e remove a entrada
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                db.commit()
+                self._stats.misses += 1
+                return None
+            db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            self._stats.hits += 1
+            self._stats.bytes_served += len(body)
+        return CachedResponse(
+            url=url,
+            kind=kind,
+            body=body,
+            sha256=sha,
+            status=status,
+            content_type=content_type,
+            meta=json.loads(meta) if meta else {},
+            stored_at=stored_at,
+        )
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        *,
+        kind: str = "http",
+        status: Optional[int] = 200,
+        content_type: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """Grava o corpo e retorna o sha256 (None se o cache estiver desligado)."""
+        if not self.enabled:
+            return None
+        sha = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            path = self._blob_path(sha)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(gzip.compress(body, compresslevel=6))
+                os.replace(tmp, path)
+            db.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, raw_bytes, stored_bytes) VALUES (?, ?, ?)",
+                (sha, len(body), path.stat().st_size),
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, kind, url, sha256, status, content_type, meta, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(kind, url), kind, normalize_url(url), sha, status, content_type,
+                    json.dumps(meta, ensure_ascii=False, default=str) if meta else None, now, now,
+                ),
+            )
+            db.commit()
+            self._stats.stores += 1
+            self._stats.bytes_stored += len(body)
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= _EVICT_EVERY_PUTS
+        if due:
+            self.evict()
+        return sha
+
+    def get_text(self, url: str, *, kind: str = "http") -> Optional[str]:
+        hit = self.get(url, kind=kind)
+        return hit.text if hit is not None else None
+
+    def put_text(self, url: str, text: str, *, kind: str = "http", **kwargs: Any) -> Optional[str]:
+        return self.put(url, text.encode("utf-8"), kind=kind, **kwargs)
+
+    def evict(self) -> Dict[str, int]:
+        """
+        Remove entradas expiradas (TTL) e, acima de max_bytes, as menos acessadas.
+        Blobs sem nenhuma entrada apontando são apagados do disco.
+        """
+        if not self.enabled:
+            return {"entries": 0, "blobs": 0}
+        with self._lock:
+            db = self._db()
+            removed_entries = 0
+            if self.ttl_seconds:
+                cur = db.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - self.ttl_seconds,))
+                removed_entries += cur.rowcount or 0
+
+            removed_blobs = self._drop_orphan_blobs(db)
+
+            if self.max_bytes:
+                total = db.execute("SELECT COALESCE(SUM(stored_bytes), 0) FROM blobs").fetchone()[0]
+                if total > self.max_bytes:
+                    lru = db.execute("SELECT key, sha256 FROM entries ORDER BY last_access ASC").fetchall()
+                    for key, sha in lru:
+                        if total <= self.max_bytes:
+                            break
+                        db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        removed_entries += 1
+                        # o blob só libera espaço quando a última entrada que o referencia sai
+                        if db.execute("SELECT 1 FROM entries WHERE sha256 = ? LIMIT 1", (sha,)).fetchone() is None:
+                            row = db.execute("SELECT stored_bytes FROM blobs WHERE sha256 = ?", (sha,)).fetchone()
+                            total -= row[0] if row else 0
+                    removed_blobs += self._drop_orphan_blobs(db)
+
+            db.commit()
+            self._puts_since_evict = 0
+            self._stats.evicted_entries += removed_entries
+            self._stats.evicted_blobs += removed_blobs
+        return {"entries": removed_entries, "blobs": removed_blobs}
+
+    def _drop_orphan_blobs(self, db: sqlite3.Connection) -> int:
+        orphans = db.execute(
+            "SELECT sha256 FROM blobs WHERE sha256 NOT IN (SELECT DISTINCT sha256 FROM entries)"
+        ).fetchall()
+        for (sha,) in orphans:
+            try:
+                self._blob_path(sha).unlink()
+            except FileNotFoundError:
+                pass
+        db.executemany("DELETE FROM blobs WHERE sha256 = ?", orphans)
+        return len(orphans)
+
+    def clear(self) -> None:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM entries")
+            db.commit()
+        self.evict()
+
+    def usage(self) -> Dict[str, Any]:
+        """Ocupação atual do cache em disco (por tipo de fetch)."""
+        with self._lock:
+            db = self._db()
+            raw, stored, blobs = db.execute(
+                "SELECT COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(stored_bytes), 0), COUNT(*) FROM blobs"
+            ).fetchone()
+            by_kind = dict(db.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+        return {
+            "root": str(self.root),
+            "entriesByKind": by_kind,
+            "blobs": blobs,
+            "rawBytes": raw,
+            "storedBytes": stored,
+        }
+
+    def stats(self) -> CacheStats:
+        return self._stats
+
+
+HTTP_CACHE = HttpCache.from_env()
+
+
+def cached_text(url: str, *, kind: str, fetch: Callable[[], str], cache: Optional[HttpCache] = None) -> str:
+    """Retorna o texto do cache ou executa fetch() e grava o resultado."""
+    cache = cache or HTTP_CACHE
+    hit = cache.get_text(url, kind=kind)
+    if hit is not None:
+        return hit
+    text = fetch()
+    if text:
+        cache.put_text(url, text, kind=kind)
+    return text
+
+
+def main(argv: List[str]) -> int:
+    cmd = argv[1] if len(argv) > 1 else "stats"
+    cache = HttpCache.from_env(enabled=True)
+    if cmd == "stats":
+        print(json.dumps(cache.usage(), ensure_ascii=False, indent=2))
+    elif cmd == "evict":
+        log(f"Eviction: {cache.evict()}")
+        print(json.dumps(cache.usage(), ensure_ascii=False, indent=2))
+    elif cmd == "clear":
+        cache.clear()
+        log(f"Cache limpo: {cache.root}")
+    else:
+        print("Uso: python a_http_cache.py stats|evict|clear")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_http_client.py
+
+Cliente HTTP compartilhado para os caminhos sem navegador (USE_REQUESTS_FIRST,
+API JSON, download de PDFs):
+- Uma requests.Session por processo com pool de conexões keep-alive
+  (HTTPAdapter) e retries com backoff para falhas de conexão/leitura
+- 429/5xx não são repetidos dentro da sessão: voltam ao chamador, que repete
+  com um ticket do controle de taxa por tentativa
+  (a_rate_limiter.send_with_retries), para o AIMD ver cada resposta
+- SSLContext único (CA bundle do certifi carregado uma vez) compartilhado por
+  todas as conexões do pool, no lugar de resolver certifi.where() por chamada
+- STF_SSL_VERIFY=false desabilita a verificação e o aviso do urllib3 uma vez
+  na importação
+- HTTP/2 opcional (HTTP2=true, requer httpx[http2]) para get_text()
+
+Uso:
+    resp = get_text(url, headers={"Referer": "..."})
+    resp.raise_for_status()
+    html = resp.text
+
+    # streaming / controle fino: sessão requests do pool
+    with get_session().get(url, stream=True, timeout=60) as r:
+        ...
+
+Env vars:
+- HTTP_POOL_CONNECTIONS=8     (hosts mantidos no pool)
+- HTTP_POOL_MAXSIZE=32        (conexões keep-alive por host)
+- HTTP_RETRIES=3              (0 desabilita; também usado por send_with_retries)
+- HTTP_RETRY_BACKOFF=0.5      (segundos; exponencial)
+- HTTP_TIMEOUT=60
+- HTTP2=true|false            (default false)
+- STF_SSL_VERIFY=true|false   (default true)
+
+Dependências:
+  pip install requests certifi
+  pip install "httpx[http2]"  (opcional, para HTTP2=true)
+"""
+
+from __future__ import annotations
+
+import os
+import ssl
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import certifi
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except Exception:
+    httpx = None  # type: ignore
+
+
+USER_AGENT: str = (
+    "Mozilla/5.0 (X11; Linux x86_64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+DEFAULT_HEADERS: Dict[str, str] = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Referer": "https://jurisprudencia.stf.jus.br/",
+    "Connection": "keep-alive",
+}
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    v = os.getenv(name)
+    if v is None:
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+# =========================
+# Config
+# =========================
+
+@dataclass(frozen=True)
+class HttpClientConfig:
+    pool_connections: int = 8
+    pool_maxsize: int = 32
+    retries: int = 3
+    retry_backoff: float = 0.5
+    timeout: float = 60.0
+    http2: bool = False
+    ssl_verify: bool = True
+    headers: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_HEADERS))
+
+    @classmethod
+    def from_env(cls) -> "HttpClientConfig":
+        return cls(
+            pool_connections=max(1, _env_int("HTTP_POOL_CONNECTIONS", 8)),
+            pool_maxsize=max(1, _env_int("HTTP_POOL_MAXSIZE", 32)),
+            retries=max(0, _env_int("HTTP_RETRIES", 3)),
+            retry_backoff=max(0.0, _env_float("HTTP_RETRY_BACKOFF", 0.5)),
+            timeout=_env_float("HTTP_TIMEOUT", 60.0),
+            http2=_env_bool("HTTP2", False),
+            ssl_verify=_env_bool("STF_SSL_VERIFY", True),
+        )
+
+
+CONFIG = HttpClientConfig.from_env()
+
+if not CONFIG.ssl_verify:
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+# =========================
+# requests (pool keep-alive + TLS compartilhado)
+# =========================
+
+_SSL_CONTEXT: Optional[ssl.SSLContext] = None
+
+
+def _ssl_context() -> ssl.SSLContext:
+    """SSLContext único do processo (CA bundle lido do disco uma só vez)."""
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        _SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+    return _SSL_CONTEXT
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter que entrega o SSLContext compartilhado ao PoolManager do urllib3."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        if CONFIG.ssl_verify:
+            kwargs["ssl_context"] = _ssl_context()
+        super().init_poolmanager(*args, **kwargs)
+
+    def cert_verify(self, conn: Any, url: str, verify: Any, cert: Any) -> None:
+        super().cert_verify(conn, url, verify, cert)
+        # Com o contexto compartilhado, ca_certs faria o urllib3 recarregar o bundle a cada conexão
+        if CONFIG.ssl_verify and verify is True:
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+
+
+def build_session(
+    headers: Optional[Dict[str, str]] = None,
+    config: HttpClientConfig = CONFIG,
+) -> requests.Session:
+    """
+    Cria uma requests.Session com pool, retries e TLS compartilhado.
+    Use get_session() para a sessão padrão; build_session() apenas quando o
+    chamador precisa de headers default próprios (ex.: cliente da API JSON).
+    """
+    retry = Retry(
+        total=config.retries,
+        connect=config.retries,
+        read=config.retries,
+        # Sem retry por status: um 429/5xx repetido aqui ficaria escondido do
+        # controle AIMD (uma só resposta, latência com o backoff embutida)
+        status=0,
+        backoff_factor=config.retry_backoff,
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        raise_on_status=False,
+    )
+    adapter = _PooledAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        max_retries=retry,
+        pool_block=False,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(config.headers)
+    if headers:
+        session.headers.update(headers)
+    session.verify = bool(config.ssl_verify)
+    return session
+
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Sessão requests compartilhada pelo processo (criada sob demanda)."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = build_session()
+    return _SESSION
+
+
+# =========================
+# HTTP/2 opcional (httpx)
+# =========================
+
+_HTTPX_CLIENT = None
+
+
+def _get_httpx_client():
+    global _HTTPX_CLIENT
+    if _HTTPX_CLIENT is None:
+        with _SESSION_LOCK:
+            if _HTTPX_CLIENT is None:
+                # Com transport explícito, http2/verify/limits precisam ir no transport
+                transport = httpx.HTTPTransport(
+                    http2=True,
+                    verify=_ssl_context() if CONFIG.ssl_verify else False,
+                    limits=httpx.Limits(
+                        max_connections=CONFIG.pool_maxsize,
+                        max_keepalive_connections=CONFIG.pool_maxsize,
+                    ),
+                    retries=CONFIG.retries,
+                )
+                _HTTPX_CLIENT = httpx.Client(
+                    headers=CONFIG.headers,
+                    timeout=CONFIG.timeout,
+                    follow_redirects=True,
+                    transport=transport,
+                )
+    return _HTTPX_CLIENT
+
+
+def http2_enabled() -> bool:
+    if CONFIG.http2 and httpx is None:
+        log("Aviso: HTTP2=true mas httpx não está instalado; usando requests (HTTP/1.1).")
+        return False
+    return CONFIG.http2
+
+
+_HTTP2 = http2_enabled()
+
+
+# =========================
+# API
+# =========================
+
+@dataclass
+class TextResponse:
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    text: str
+    http_version: str
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code} para {self.url}")
+
+
+def get_text(
+    url: str,
+    *,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    allow_redirects: bool = True,
+) -> TextResponse:
+    """
+    GET de uma página de texto pelo cliente compartilhado (HTTP/2 quando
+    habilitado, senão requests com keep-alive). Não levanta em status >= 400:
+    chame raise_for_status() (um 304 condicional chega como status 304).
+    """
+    timeout = CONFIG.timeout if timeout is None else timeout
+    if _HTTP2:
+        resp = _get_httpx_client().get(url, headers=headers, timeout=timeout, follow_redirects=allow_redirects)
+        return TextResponse(
+            url=str(resp.url),
+            status_code=resp.status_code,
+            headers=dict(resp.headers),
+            text=resp.text,
+            http_version=resp.http_version,
+        )
+
+    resp = get_session().get(url, headers=headers, timeout=timeout, allow_redirects=allow_redirects)
+    resp.encoding = resp.encoding or "utf-8"
+    return TextResponse(
+        url=resp.url,
+        status_code=resp.status_code,
+        headers=dict(resp.headers),
+        text=resp.text,
+        http_version="HTTP/1.1",
+    )
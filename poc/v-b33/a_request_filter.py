@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_request_filter.py
+
+Política de filtragem de requisições para páginas/contextos Playwright:
+- Aborta requisições por tipo de recurso (image, font, media, ...) ou por
+  padrão de URL (analytics, tag managers, arquivos de fonte/imagem)
+- Allowlist de URLs que nunca são bloqueadas, restrita a requisições
+  XHR/fetch/script (APIs e bundles do SPA do STF); imagens e fontes dos
+  mesmos hosts continuam bloqueadas
+- Contabilidade por página: requisições bloqueadas/permitidas, bytes
+  recebidos (content-length) e bytes economizados (estimados por tipo)
+
+Uso (API síncrona):
+    stats = install_route_filter(page, RequestFilterPolicy.from_env())
+    page.goto(url)
+    log(stats.summary())
+
+Uso (API async):
+    stats = await install_route_filter_async(context, policy)
+
+Env vars (RequestFilterPolicy.from_env):
+- STF_BLOCK_RESOURCE_TYPES="image,media,font"   (lista separada por vírgula)
+- STF_BLOCK_URL_PATTERNS="regex1,regex2"        (acrescentados aos padrões default)
+- STF_ALLOW_URL_PATTERNS="regex1,regex2"        (acrescentados à allowlist default)
+- STF_REQUEST_FILTER=true|false                 (default true; false desabilita)
+
+Dependências:
+  pip install playwright
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+
+DEFAULT_BLOCKED_RESOURCE_TYPES: Tuple[str, ...] = ("image", "media", "font")
+
+DEFAULT_BLOCKED_URL_PATTERNS: Tuple[str, ...] = (
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"analytics\.google\.com",
+    r"doubleclick\.net",
+    r"hotjar\.com",
+    r"facebook\.(net|com)/",
+    r"clarity\.ms",
+    r"\.(png|jpe?g|gif|svg|ico|webp)(\?|$)",
+    r"\.(woff2?|ttf|otf|eot)(\?|$)",
+    r"\.(mp4|webm|mp3)(\?|$)",
+)
+
+# XHR/JS do SPA que precisam passar mesmo se casarem com algum bloqueio
+# (a allowlist só vale para ALLOWLIST_RESOURCE_TYPES)
+DEFAULT_ALLOW_URL_PATTERNS: Tuple[str, ...] = (
+    r"^https://jurisprudencia\.stf\.jus\.br/api/",
+    r"^https://jurisprudencia\.stf\.jus\.br/pages/",
+    r"^https://jurisprudencia\.stf\.jus\.br/[^?]*\.js(\?|$)",
+    r"^https://redir\.stf\.jus\.br/",
+    r"^https://portal\.stf\.jus\.br/",
+)
+
+# Tipos de recurso a que a allowlist se aplica; documentos nunca são bloqueados
+ALLOWLIST_RESOURCE_TYPES: Tuple[str, ...] = ("xhr", "fetch", "script")
+
+# Tamanho médio (bytes) por tipo, usado para estimar a economia de requisições abortadas
+ESTIMATED_BYTES_BY_TYPE: Dict[str, int] = {
+    "image": 30_000,
+    "font": 40_000,
+    "media": 250_000,
+    "stylesheet": 20_000,
+    "script": 50_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 5_000,
+}
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    v = os.getenv(name)
+    if v is None:
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
+
+
+def _env_list(name: str) -> List[str]:
+    raw = os.getenv(name) or ""
+    return [p.strip() for p in raw.split(",") if p.strip()]
+
+
+# =========================
+# Policy
+# =========================
+
+@dataclass(frozen=True)
+class RequestFilterPolicy:
+    blocked_resource_types: frozenset = frozenset(DEFAULT_BLOCKED_RESOURCE_TYPES)
+    blocked_url_patterns: Tuple[str, ...] = DEFAULT_BLOCKED_URL_PATTERNS
+    allow_url_patterns: Tuple[str, ...] = DEFAULT_ALLOW_URL_PATTERNS
+    enabled: bool = True
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_blocked_re", _compile(self.blocked_url_patterns))
+        object.__setattr__(self, "_allow_re", _compile(self.allow_url_patterns))
+
+    @classmethod
+    def from_env(cls) -> "RequestFilterPolicy":
+        types = _env_list("STF_BLOCK_RESOURCE_TYPES") or list(DEFAULT_BLOCKED_RESOURCE_TYPES)
+        return cls(
+            blocked_resource_types=frozenset(t.lower() for t in types),
+            blocked_url_patterns=DEFAULT_BLOCKED_URL_PATTERNS + tuple(_env_list("STF_BLOCK_URL_PATTERNS")),
+            allow_url_patterns=DEFAULT_ALLOW_URL_PATTERNS + tuple(_env_list("STF_ALLOW_URL_PATTERNS")),
+            enabled=_env_bool("STF_REQUEST_FILTER", True),
+        )
+
+    def decide(self, url: str, resource_type: str) -> Optional[str]:
+        """
+        Retorna o motivo do bloqueio ("type:<tipo>" | "url:<padrão>") ou None para permitir.
+        A allowlist tem precedência para XHR/fetch/script; requisições de
+        documento nunca são bloqueadas.
+        """
+        if not self.enabled or resource_type == "document":
+            return None
+        if resource_type in ALLOWLIST_RESOURCE_TYPES:
+            for rx in self._allow_re:  # type: ignore[attr-defined]
+                if rx.search(url):
+                    return None
+        if resource_type in self.blocked_resource_types:
+            return f"type:{resource_type}"
+        for rx in self._blocked_re:  # type: ignore[attr-defined]
+            if rx.search(url):
+                return f"url:{rx.pattern}"
+        return None
+
+
+def _compile(patterns: Iterable[str]) -> Tuple[Pattern[str], ...]:
+    return tuple(re.compile(p, re.IGNORECASE) for p in patterns)
+
+
+# =========================
+# Stats por página
+# =========================
+
+@dataclass
+class RequestFilterStats:
+    allowed: int = 0
+    blocked: int = 0
+    bytes_received: int = 0
+    estimated_bytes_saved: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+
+    def record_allowed(self) -> None:
+        self.allowed += 1
+
+    def record_blocked(self, resource_type: str) -> None:
+        self.blocked += 1
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES_BY_TYPE.get(resource_type, ESTIMATED_BYTES_BY_TYPE["other"])
+
+    def record_response(self, headers: Dict[str, str]) -> None:
+        try:
+            self.bytes_received += int(headers.get("content-length") or 0)
+        except ValueError:
+            pass
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requestsAllowed": self.allowed,
+            "requestsBlocked": self.blocked,
+            "bytesReceived": self.bytes_received,
+            "estimatedBytesSaved": self.estimated_bytes_saved,
+            "blockedByType": dict(self.blocked_by_type),
+        }
+
+    def summary(self) -> str:
+        return (
+            f"requisições permitidas={self.allowed} | bloqueadas={self.blocked} | "
+            f"recebido={self.bytes_received / 1024:.0f} kb | economia estimada={self.estimated_bytes_saved / 1024:.0f} kb"
+        )
+
+
+class RequestFilterLog:
+    """Guarda as estatísticas de cada página filtrada no run (para logs/métricas)."""
+
+    def __init__(self, max_items: int = 10_000) -> None:
+        self.max_items = max_items
+        self._items: List[RequestFilterStats] = []
+
+    def add(self, stats: RequestFilterStats) -> None:
+        self._items.append(stats)
+        if len(self._items) > self.max_items:
+            del self._items[: len(self._items) - self.max_items]
+
+    def last(self) -> Optional[RequestFilterStats]:
+        return self._items[-1] if self._items else None
+
+    def summary(self) -> Dict[str, Any]:
+        totals = RequestFilterStats()
+        for st in self._items:
+            totals.allowed += st.allowed
+            totals.blocked += st.blocked
+            totals.bytes_received += st.bytes_received
+            totals.estimated_bytes_saved += st.estimated_bytes_saved
+            for k, v in st.blocked_by_type.items():
+                totals.blocked_by_type[k] = totals.blocked_by_type.get(k, 0) + v
+        return {"pages": len(self._items), **totals.as_dict()}
+
+
+REQUEST_FILTER_LOG = RequestFilterLog()
+
+
+# =========================
+# Instalação (sync / async)
+# =========================
+
+def install_route_filter(target: Any, policy: Optional[RequestFilterPolicy] = None) -> RequestFilterStats:
+    """
+    Instala a política em uma Page ou BrowserContext (API síncrona).
+    Retorna o objeto de estatísticas, atualizado conforme a página carrega.
+    """
+    policy = policy or RequestFilterPolicy.from_env()
+    stats = RequestFilterStats()
+    REQUEST_FILTER_LOG.add(stats)
+    if not policy.enabled:
+        return stats
+
+    def _handle(route, request) -> None:
+        reason = policy.decide(request.url, request.resource_type)
+        if reason:
+            stats.record_blocked(request.resource_type)
+            route.abort()
+        else:
+            stats.record_allowed()
+            route.continue_()
+
+    target.route("**/*", _handle)
+    target.on("response", lambda response: stats.record_response(response.headers))
+    return stats
+
+
+async def install_route_filter_async(target: Any, policy: Optional[RequestFilterPolicy] = None) -> RequestFilterStats:
+    """Equivalente de install_route_filter para a API async do Playwright."""
+    policy = policy or RequestFilterPolicy.from_env()
+    stats = RequestFilterStats()
+    REQUEST_FILTER_LOG.add(stats)
+    if not policy.enabled:
+        return stats
+
+    async def _handle(route, request) -> None:
+        reason = policy.decide(request.url, request.resource_type)
+        if reason:
+            stats.record_blocked(request.resource_type)
+            await route.abort()
+        else:
+            stats.record_allowed()
+            await route.continue_()
+
+    await target.route("**/*", _handle)
+    target.on("response", lambda response: stats.record_response(response.headers))
+    return stats
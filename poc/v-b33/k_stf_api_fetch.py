@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+k_stf_api_fetch.py
+
+Modo de coleta sem navegador: lê diretamente o backend JSON do SPA
+jurisprudencia.stf.jus.br (o mesmo XHR que o Angular renderiza em HTML).
+
+- search_cards(): pesquisa via API e devolve cards no MESMO formato de
+  k_unified_case_pipeline.extract_cards
+- case_sections(): devolve o dict {título: conteúdo} no MESMO formato de
+  k_unified_case_pipeline.parse_sections (entrada de build_raw_and_case_data)
+- Cliente HTTP com pool de conexões, retries e TLS compartilhado (a_http_client.py)
+- Fixtures: o modo "record" abre a página no Playwright e grava em disco as
+  requisições/respostas JSON do SPA junto com o HTML renderizado da mesma
+  página; o modo "replay" aplica o mapeamento sobre um fixture gravado, sem rede
+- Paridade: o modo "check" confere, para cada fixture, que o mapeamento JSON
+  produz exatamente o que extract_cards / build_raw_and_case_data extraem do
+  HTML pareado (mesmos caseStfId "sjur…", mesmos campos e seções)
+
+O corpo da pesquisa é um template gravado do próprio SPA (record). Sem
+template gravado, usa DEFAULT_SEARCH_PAYLOAD (formato Elasticsearch).
+
+O mapeamento só é considerado verificado com fixtures gravados do /api/ real
+(modo record, sem "_provenance") de busca e de processo que passem no check.
+Os fixtures "derived_*" são reconstruções a partir de HTML já gravado: o de
+processo usa o mesmo HTML que o check lê (circular) e os nomes de campo dos
+cards não estão confirmados. Sem fixture verificado, api_mode_problems()
+aponta o motivo e o k_unified_case_pipeline recusa STF_FETCH_MODE=api.
+
+Uso:
+  python k_stf_api_fetch.py record "<url da página de busca ou do processo>"
+  python k_stf_api_fetch.py replay fixtures/stf_api/<arquivo>.json
+  python k_stf_api_fetch.py check [fixtures/stf_api/<arquivo>.json ...]   # default: todos os fixtures
+
+Env vars:
+- STF_API_BASE (default https://jurisprudencia.stf.jus.br/api/search)
+- STF_API_CASE_PATH (default /get/{stf_id})
+- STF_API_FIXTURES_DIR (default fixtures/stf_api, relativo a este arquivo)
+- STF_API_ALLOW_UNVERIFIED (default false): permite STF_FETCH_MODE=api sem fixture
+  gravado verificado (só com aviso; os docs gravados levam processing.fetchModeUnverified)
+- STF_SSL_VERIFY / HTTP_POOL_* / HTTP_RETRIES (ver a_http_client.py)
+
+Dependências:
+  pip install requests certifi
+  pip install playwright  (apenas para o modo record)
+"""
+
+from __future__ import annotations
+
+import copy
+import functools
+import gzip
+import json
+import os
+import re
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import requests
+
+from a_http_client import CONFIG as HTTP_CONFIG, build_session
+from a_rate_limiter import send_with_retries
+
+
+STF_API_BASE = os.getenv("STF_API_BASE", "https://jurisprudencia.stf.jus.br/api/search").rstrip("/")
+STF_API_SEARCH_URL = f"{STF_API_BASE}/search"
+STF_API_CASE_PATH = os.getenv("STF_API_CASE_PATH", "/get/{stf_id}")
+STF_CASE_PAGE_URL = "https://jurisprudencia.stf.jus.br/pages/search/{stf_id}/false"
+
+FIXTURES_DIR = Path(os.getenv("STF_API_FIXTURES_DIR", str(Path(__file__).parent / "fixtures" / "stf_api")))
+SEARCH_TEMPLATE_FILE = FIXTURES_DIR / "search_request_template.json"
+
+# Escape explícito para usar o modo api antes de haver um fixture gravado que passe no check
+STF_API_ALLOW_UNVERIFIED = os.getenv("STF_API_ALLOW_UNVERIFIED", "false").strip().lower() in (
+    "1", "true", "yes", "y", "on", "sim", "s",
+)
+
+
+USER_AGENT: str = (
+    "Mozilla/5.0 (X11; Linux x86_64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Corpo de pesquisa padrão (Elasticsearch) quando não há template gravado do SPA
+DEFAULT_SEARCH_PAYLOAD: Dict[str, Any] = {
+    "query": {
+        "bool": {
+            "must": [{"query_string": {"query": "", "default_operator": "AND"}}],
+            "filter": [
+                {"terms": {"base": ["acordaos"]}},
+                {"terms": {"processo_classe_processual_unificada_classe_sigla": ["ADC", "ADI", "ADO", "ADPF"]}},
+            ],
+        }
+    },
+    "from": 0,
+    "size": 100,
+    "sort": [{"_score": "desc"}],
+}
+
+# Nomes candidatos (em ordem de preferência) de cada campo no _source do backend.
+# caseStfId: o _id do hit primeiro; vale o primeiro "sjur…", como o id que
+# extract_cards tira do link do card (ver _stf_id). Os demais nomes não
+# aparecem no HTML renderizado; o modo check os confere contra o fixture gravado.
+CARD_FIELD_CANDIDATES: Dict[str, Tuple[str, ...]] = {
+    "caseStfId": ("_id", "id", "dg_unique"),
+    "caseTitle": ("titulo", "processo_codigo_completo", "title"),
+    "judgingBody": ("orgao_julgador", "orgao_julgador_nome"),
+    "rapporteur": ("relator_processo_nome", "ministro_facet", "relator"),
+    "judgmentDate": ("julgamento_data", "data_julgamento"),
+    "publicationDate": ("publicacao_data", "data_publicacao"),
+}
+
+# Título de seção (como em parse_dom_sections) -> nomes candidatos no _source, na
+# ordem das seções da página do processo. Os nomes de Partes..Doutrina e Tese são
+# os ids dos <h4> de destaque da página de busca (<h4 id="ementa_texto-0"> Ementa);
+# Publicação e Acórdãos no mesmo sentido não têm destaque e seguem sem confirmação.
+SECTION_FIELD_CANDIDATES: Dict[str, Tuple[str, ...]] = {
+    "Publicação": ("publicacao_texto", "documental_publicacao_lista_texto"),
+    "Partes": ("partes_lista_texto",),
+    "Ementa": ("ementa_texto",),
+    "Tese": ("documental_tese_texto",),
+    "Decisão": ("acordao_ata",),
+    "Indexação": ("documental_indexacao_texto",),
+    "Legislação": ("documental_legislacao_citada_texto",),
+    "Observação": ("documental_observacao_texto",),
+    "Acórdãos no mesmo sentido": ("documental_acordao_mesmo_sentido_lista_texto",),
+    "Doutrina": ("documental_doutrina_texto",),
+}
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+def _clean_str(v: Any) -> Optional[str]:
+    if v is None:
+        return None
+    if isinstance(v, list):
+        v = "\n".join(str(x) for x in v if x is not None)
+    s = str(v).strip()
+    if not s or s == "N/A":
+        return None
+    return s
+
+
+def _first(src: Dict[str, Any], candidates: Iterable[str]) -> Optional[str]:
+    for key in candidates:
+        v = _clean_str(src.get(key))
+        if v is not None:
+            return v
+    return None
+
+
+def _stf_id(src: Dict[str, Any]) -> Optional[str]:
+    """Primeiro candidato "sjur…" (o id da URL do processo); sem nenhum, o primeiro preenchido."""
+    values = [v for v in (_clean_str(src.get(k)) for k in CARD_FIELD_CANDIDATES["caseStfId"]) if v]
+    for v in values:
+        if v.startswith("sjur"):
+            return v
+    return values[0] if values else None
+
+
+def _to_br_date(v: Optional[str]) -> Optional[str]:
+    """Normaliza 'YYYY-MM-DD[...]' para 'DD/MM/YYYY' (formato dos cards HTML)."""
+    if not v:
+        return None
+    m = re.match(r"^(\d{4})-(\d{2})-(\d{2})", v)
+    if m:
+        return f"{m.group(3)}/{m.group(2)}/{m.group(1)}"
+    m = re.search(r"\d{2}/\d{2}/\d{4}", v)
+    return m.group(0) if m else v
+
+
+def _derive_from_title(case_title: str) -> Dict[str, str]:
+    # Mesma regra de k_unified_case_pipeline._derive_from_title
+    out: Dict[str, str] = {}
+    title = re.sub(r"\s+", " ", (case_title or "")).strip()
+    if not title:
+        return out
+    m_class = re.match(r"^([A-Z]{2,})\b", title)
+    if m_class:
+        out["caseClassDetail"] = m_class.group(1)
+    m_num = re.search(r"\b(\d[\d\.\-]*)\b", title)
+    if m_num:
+        out["caseCode"] = m_num.group(1)
+    return out
+
+
+# =========================
+# HTTP client (pool)
+# =========================
+
+_SESSION: Optional[requests.Session] = None
+
+
+def get_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = build_session(headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "application/json, text/plain, */*",
+            "Origin": "https://jurisprudencia.stf.jus.br",
+            "Referer": "https://jurisprudencia.stf.jus.br/pages/search",
+        })
+    return _SESSION
+
+
+# =========================
+# JSON -> cards / sections
+# =========================
+
+def _hits(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aceita a resposta ES ({"result": {"hits": {"hits": [...]}}} ou {"hits": {"hits": [...]}})."""
+    root = payload.get("result") if isinstance(payload.get("result"), dict) else payload
+    hits = (root.get("hits") or {}).get("hits") if isinstance(root.get("hits"), dict) else root.get("hits")
+    return [h for h in (hits or []) if isinstance(h, dict)]
+
+
+def _source(hit: Dict[str, Any]) -> Dict[str, Any]:
+    src = hit.get("_source") if isinstance(hit.get("_source"), dict) else hit
+    if "_id" in hit and "_id" not in src:
+        src = {**src, "_id": hit["_id"]}
+    return src
+
+
+def total_hits(payload: Dict[str, Any]) -> Optional[int]:
+    root = payload.get("result") if isinstance(payload.get("result"), dict) else payload
+    total = (root.get("hits") or {}).get("total") if isinstance(root.get("hits"), dict) else None
+    if isinstance(total, dict):
+        total = total.get("value")
+    try:
+        return int(total) if total is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def card_from_source(src: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    stf_id = _stf_id(src)
+    if not stf_id:
+        return None
+    case_title = _first(src, CARD_FIELD_CANDIDATES["caseTitle"])
+    derived = _derive_from_title(case_title or "")
+    return {
+        "caseStfId": stf_id,
+        "caseTitle": case_title,
+        "caseUrl": STF_CASE_PAGE_URL.format(stf_id=stf_id),
+        "caseClassDetail": derived.get("caseClassDetail"),
+        "caseCode": derived.get("caseCode"),
+        "judgingBody": _first(src, CARD_FIELD_CANDIDATES["judgingBody"]),
+        "rapporteur": _first(src, CARD_FIELD_CANDIDATES["rapporteur"]),
+        "judgmentDate": _to_br_date(_first(src, CARD_FIELD_CANDIDATES["judgmentDate"])),
+        "publicationDate": _to_br_date(_first(src, CARD_FIELD_CANDIDATES["publicationDate"])),
+    }
+
+
+def cards_from_search_json(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for hit in _hits(payload):
+        card = card_from_source(_source(hit))
+        if card:
+            out.append(card)
+    return out
+
+
+def sections_from_source(src: Dict[str, Any]) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for title, candidates in SECTION_FIELD_CANDIDATES.items():
+        content = _first(src, candidates)
+        if content:
+            out[title] = content
+    return out
+
+
+def sections_from_case_json(payload: Dict[str, Any]) -> Dict[str, str]:
+    hits = _hits(payload)
+    src = _source(hits[0]) if hits else payload
+    return sections_from_source(src)
+
+
+def sections_to_markdown(sections: Dict[str, str]) -> str:
+    """Markdown equivalente ao convertido do HTML (#### título + conteúdo)."""
+    return "\n\n".join(f"#### {title}\n\n{content}" for title, content in sections.items()).strip()
+
+
+# =========================
+# Requests
+# =========================
+
+def _load_search_template() -> Dict[str, Any]:
+    if SEARCH_TEMPLATE_FILE.exists():
+        try:
+            return json.loads(SEARCH_TEMPLATE_FILE.read_text(encoding="utf-8"))
+        except Exception as e:
+            log(f"Aviso: template de pesquisa inválido ({SEARCH_TEMPLATE_FILE}): {e}")
+    return copy.deepcopy(DEFAULT_SEARCH_PAYLOAD)
+
+
+def _replace_query_text(node: Any, query_string: str) -> Any:
+    if isinstance(node, dict):
+        out = {}
+        for k, v in node.items():
+            if k == "query" and isinstance(v, str):
+                out[k] = query_string
+            else:
+                out[k] = _replace_query_text(v, query_string)
+        return out
+    if isinstance(node, list):
+        return [_replace_query_text(x, query_string) for x in node]
+    return node
+
+
+def _add_publication_filter(payload: Dict[str, Any], window: Tuple[date, date]) -> None:
+    """Acrescenta o filtro de intervalo de publicacao_data em query.bool.filter."""
+    bool_q = payload.setdefault("query", {}).setdefault("bool", {})
+    filters = bool_q.get("filter")
+    if isinstance(filters, dict):
+        filters = [filters]
+    filters = list(filters or [])
+    filters.append({
+        "range": {
+            "publicacao_data": {
+                "gte": window[0].isoformat(),
+                "lte": window[1].isoformat(),
+                "format": "yyyy-MM-dd",
+            }
+        }
+    })
+    bool_q["filter"] = filters
+
+
+def build_search_payload(
+    *,
+    query_string: str,
+    page: int,
+    page_size: int,
+    publication_window: Optional[Tuple[date, date]] = None,
+) -> Dict[str, Any]:
+    payload = _replace_query_text(_load_search_template(), query_string)
+    payload["from"] = max(0, (page - 1) * page_size)
+    payload["size"] = page_size
+    if publication_window is not None:
+        _add_publication_filter(payload, publication_window)
+    return payload
+
+
+def search_json(
+    *,
+    query_string: str,
+    page: int = 1,
+    page_size: int = 100,
+    publication_window: Optional[Tuple[date, date]] = None,
+    timeout: int = 60,
+) -> Dict[str, Any]:
+    payload = build_search_payload(
+        query_string=query_string,
+        page=page,
+        page_size=page_size,
+        publication_window=publication_window,
+    )
+    resp = send_with_retries(
+        STF_API_SEARCH_URL,
+        lambda: get_session().post(STF_API_SEARCH_URL, json=payload, timeout=timeout),
+        retries=HTTP_CONFIG.retries,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def case_json(stf_id: str, *, timeout: int = 60) -> Dict[str, Any]:
+    url = STF_API_BASE + STF_API_CASE_PATH.format(stf_id=stf_id)
+    resp = send_with_retries(url, lambda: get_session().get(url, timeout=timeout), retries=HTTP_CONFIG.retries)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def search_cards(
+    *,
+    query_string: str,
+    page: int = 1,
+    page_size: int = 100,
+    publication_window: Optional[Tuple[date, date]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Retorna (cards, json bruto) da página de resultados (opcionalmente restrita a uma janela de publicação)."""
+    payload = search_json(
+        query_string=query_string,
+        page=page,
+        page_size=page_size,
+        publication_window=publication_window,
+    )
+    return cards_from_search_json(payload), payload
+
+
+def case_sections(stf_id: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """Retorna (seções, json bruto) do processo."""
+    payload = case_json(stf_id)
+    return sections_from_case_json(payload), payload
+
+
+# =========================
+# Fixtures (record / replay)
+# =========================
+
+def _page_kind(page_url: str) -> str:
+    """"case" para /pages/search/<id>/..., "search" para a página de resultados."""
+    return "case" if re.search(r"/pages/search/[^/?#]+/", page_url) else "search"
+
+
+def _read_page_html(path: Path) -> str:
+    data = path.read_bytes()
+    if path.name.endswith(".gz"):
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+def record_fixtures(page_url: str, *, out_dir: Path = FIXTURES_DIR) -> List[Path]:
+    """
+    Abre a página no Playwright e grava cada XHR JSON do backend (/api/) como fixture:
+    {"kind", "pageUrl", "pageHtml", "request": {"method", "url", "postData"}, "response": <json>}.
+    pageHtml é o HTML renderizado da mesma página (.html.gz ao lado), base do modo check.
+    A primeira requisição POST de pesquisa também vira o template de pesquisa.
+    """
+    from playwright.sync_api import sync_playwright
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    captured: List[Dict[str, Any]] = []
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    def _on_response(response) -> None:
+        req = response.request
+        if "/api/" not in req.url or req.resource_type not in ("xhr", "fetch"):
+            return
+        try:
+            body = response.json()
+        except Exception:
+            return
+        post_data = req.post_data
+        captured.append({
+            "request": {"method": req.method, "url": req.url, "postData": post_data},
+            "response": body,
+        })
+        if req.method == "POST" and req.url.startswith(STF_API_SEARCH_URL) and post_data:
+            if not SEARCH_TEMPLATE_FILE.exists():
+                SEARCH_TEMPLATE_FILE.write_text(post_data, encoding="utf-8")
+
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"])
+        context = browser.new_context(user_agent=USER_AGENT, locale="pt-BR")
+        page = context.new_page()
+        page.on("response", _on_response)
+        page.goto(page_url, wait_until="networkidle", timeout=60_000)
+        page_html = page.content()
+        browser.close()
+
+    html_path = out_dir / f"stf_api_{stamp}_page.html.gz"
+    html_path.write_bytes(gzip.compress(page_html.encode("utf-8"), compresslevel=9, mtime=0))
+    saved: List[Path] = []
+    for n, fixture in enumerate(captured, start=1):
+        path = out_dir / f"stf_api_{stamp}_{n:02d}.json"
+        fixture = {"kind": _page_kind(page_url), "pageUrl": page_url, "pageHtml": html_path.name, **fixture}
+        path.write_text(json.dumps(fixture, ensure_ascii=False, indent=2), encoding="utf-8")
+        saved.append(path)
+    return saved
+
+
+def replay_fixture(path: Path) -> Dict[str, Any]:
+    """Aplica o mapeamento JSON -> cards/seções sobre um fixture gravado (sem rede)."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    payload = data.get("response", data)
+    cards = cards_from_search_json(payload)
+    sections = sections_from_case_json(payload) if len(cards) <= 1 else {}
+    return {"totalHits": total_hits(payload), "cards": cards, "sections": sections}
+
+
+def _diff_fields(expected: Dict[str, Any], got: Dict[str, Any]) -> List[str]:
+    return [
+        f"{k}: html={expected.get(k)!r} json={got.get(k)!r}"
+        for k in sorted(set(expected) | set(got))
+        if expected.get(k) != got.get(k)
+    ]
+
+
+def check_parity(path: Path) -> Optional[List[str]]:
+    """
+    Confere um fixture contra o HTML pareado (pageHtml) pelos extratores do
+    caminho HTML: busca -> extract_cards (mesmos cards, na mesma ordem);
+    processo -> parse_dom_sections + build_raw_and_case_data. Retorna as
+    divergências, ou None se a resposta gravada não tem hits (XHR auxiliar do SPA).
+    """
+    # Import tardio: k_unified_case_pipeline importa este módulo
+    import k_unified_case_pipeline as pipeline
+    from a_dom_sections import parse_dom_sections
+
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    payload = data.get("response", data)
+    if not _hits(payload):
+        return None
+    if not data.get("pageHtml"):
+        return ["sem pageHtml pareado (regrave com o modo record)"]
+    html = _read_page_html(Path(path).parent / data["pageHtml"])
+    problems: List[str] = []
+
+    if data.get("kind") == "search":
+        expected = pipeline.extract_cards(html)
+        got = cards_from_search_json(payload)
+        if [c["caseStfId"] for c in got] != [c["caseStfId"] for c in expected]:
+            problems.append(
+                f"caseStfId: html={[c['caseStfId'] for c in expected]} json={[c['caseStfId'] for c in got]}"
+            )
+        for exp, card in zip(expected, got):
+            problems.extend(f"{card['caseStfId']} {d}" for d in _diff_fields(exp, card))
+        return problems
+
+    sections_html = parse_dom_sections(pipeline.sanitize_html_keep_formatting(html))
+    sections_json = sections_from_case_json(payload)
+    # Só as seções de conteúdo: os <h4> do cabeçalho ("Órgão julgador: ...") não têm campo no _source
+    titles_html = [t for t in sections_html if t in SECTION_FIELD_CANDIDATES]
+    if list(sections_json) != titles_html:
+        problems.append(f"seções: html={titles_html} json={list(sections_json)}")
+    raw_html, case_html = pipeline.build_raw_and_case_data(sections_html)
+    raw_json, case_json_data = pipeline.build_raw_and_case_data(sections_json)
+    problems.extend(f"rawData.{d}" for d in _diff_fields(raw_html, raw_json))
+    problems.extend(f"caseData.{d}" for d in _diff_fields(case_html, case_json_data))
+    return problems
+
+
+def _is_derived(data: Dict[str, Any]) -> bool:
+    """Fixture reconstruído (tem "_provenance"), não gravado do /api/ pelo modo record."""
+    return "_provenance" in data
+
+
+@functools.lru_cache(maxsize=1)
+def api_mode_problems() -> Tuple[str, ...]:
+    """
+    Motivos para não gravar no Mongo pelo modo api (vazio = liberado):
+    exige ao menos um fixture gravado (record) de busca e um de processo
+    passando no check, e nenhum fixture gravado divergente. Calculado uma vez por processo.
+    """
+    verified: Set[str] = set()
+    problems: List[str] = []
+    for path in _fixture_paths([]):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if _is_derived(data):
+            continue
+        result = check_parity(path)
+        if result is None:
+            continue
+        if result:
+            problems.append(f"{path.name}: {len(result)} divergência(s) no check")
+        else:
+            verified.add(data.get("kind") or "")
+    for kind in ("search", "case"):
+        if kind not in verified:
+            problems.append(f"nenhum fixture gravado (record) de {kind} verificado em {FIXTURES_DIR}")
+    return tuple(problems)
+
+
+def _fixture_paths(args: List[str]) -> List[Path]:
+    if args:
+        return [Path(a) for a in args]
+    return sorted(p for p in FIXTURES_DIR.glob("*.json") if p != SEARCH_TEMPLATE_FILE)
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) >= 2 and argv[1] == "check":
+        failed = 0
+        for path in _fixture_paths(argv[2:]):
+            problems = check_parity(path)
+            if problems is None:
+                log(f"{path.name}: ignorado (resposta sem hits)")
+                continue
+            failed += bool(problems)
+            derived = _is_derived(json.loads(path.read_text(encoding="utf-8")))
+            note = " (derivado: não verifica o mapeamento do /api/)" if derived else ""
+            log(f"{path.name}: {'OK' if not problems else f'{len(problems)} divergência(s)'}{note}")
+            for p in problems[:20]:
+                print(f"  - {p}")
+        return 1 if failed else 0
+    if len(argv) < 3 or argv[1] not in ("record", "replay"):
+        print("Uso: python k_stf_api_fetch.py record <url> | replay <fixture.json> | check [fixture.json ...]")
+        return 1
+    if argv[1] == "record":
+        paths = record_fixtures(argv[2])
+        log(f"Fixtures gravados: {len(paths)} em {FIXTURES_DIR}")
+        for p in paths:
+            print(f"  - {p.name}")
+        return 0
+    out = replay_fixture(Path(argv[2]))
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
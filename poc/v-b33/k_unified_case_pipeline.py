@@ -7,29 +7,101 @@ Pipeline unificado para:
 1) Buscar resultados STF e salvar HTML da busca em case_query
 2) Extrair cards e inserir/atualizar case_data (schema unificado)
 3) Buscar HTML completo do processo, sanitizar, converter para Markdown
-4) Minerar seções do Markdown e preencher rawData/caseData
+4) Minerar as seções e preencher rawData/caseData
+
+STF_FETCH_MODE=api lê o JSON do backend do SPA (k_stf_api_fetch.py) no lugar
+do HTML renderizado: sem navegador e sem o ciclo HTML -> BeautifulSoup. O modo
+é recusado enquanto não houver fixtures gravados do /api/ que passem no check
+de paridade (k_stf_api_fetch.api_mode_problems; STF_API_ALLOW_UNVERIFIED=true
+força, com aviso).
+
+A etapa 1 percorre todas as páginas de resultados: lê o total de hits da
+página 1 e busca as demais em paralelo (SEARCH_PAGE_WORKERS), gravando cada
+página em case_query e os cards em case_data à medida que chegam.
+SEARCH_MAX_PAGES limita o número de páginas (0 = todas).
+
+SEARCH_MODE=windows fatia o período em janelas de data de publicação
+(SEARCH_WINDOW_DAYS) buscadas em paralelo (SEARCH_WINDOW_WORKERS). A primeira
+execução cobre SEARCH_BACKFILL_DAYS para trás; cada execução grava em
+case_query a marca d'água (última data de publicação coberta) da consulta,
+e as seguintes pedem apenas as janelas a partir dela (monitoramento diário).
+
+HTTP_CACHE=true serve páginas de busca e de processos já baixadas do cache
+local em disco (a_http_cache.py), para reexecutar parsers sem ir ao STF.
+
+CASE_FETCH_ROUTE=auto (default) busca cada processo primeiro via requests e
+só sobe para o Playwright quando o HTML não traz os marcadores de conteúdo
+(shell vazio do SPA); a taxa de sucesso por padrão de URL é aprendida e
+persistida (a_fetch_router.py), e padrões em que o requests nunca funciona
+vão direto ao navegador. requests|playwright forçam um caminho
+(USE_REQUESTS_FIRST=true equivale a requests).
+
+Os cards da página de resultados são extraídos com lxml (parser C, XPath
+compilado) quando instalado, ou BeautifulSoup/html.parser (CARD_PARSER,
+ver a_card_extractor.py); os dois produzem os mesmos dicts.
+"python k_unified_case_pipeline.py bench-cards [N]" confere isso nas N
+páginas mais recentes de case_query.htmlRaw e compara o tempo dos backends.
+
+As seções "#### Título" do Markdown são tokenizadas uma única vez por caso
+(a_md_sections.py); rawData/caseData e caseContent.* saem do mesmo dict e são
+gravados num único update. "bench-sections [N]" compara com o split antigo.
+
+No modo browser as seções saem direto do DOM do HTML sanitizado (h4 de título
++ nós seguintes, a_dom_sections.py), sem converter o caso para Markdown; os
+valores são os mesmos do caminho markdownify + split ("bench-dom-sections [N]"
+confere nos caseHtmlClean gravados). CASE_MARKDOWN=lazy (default) deixa o
+caseMarkdown para exibição, gerado sob demanda (case_markdown);
+CASE_MARKDOWN=eager volta a gravá-lo no fetch.
+
+CASE_PIPELINE_MODE=pipelined separa as etapas 2-4 em estágios: fetchers
+(CASE_FETCH_WORKERS threads no caminho requests; a thread principal quando há
+BrowserPool) -> parse (sanitizar + seções) num ProcessPoolExecutor com um
+processo por núcleo (CASE_PARSE_WORKERS) -> gravação no Mongo numa thread,
+ligados por uma fila limitada (CASE_QUEUE_SIZE). Rede e CPU trabalham ao mesmo
+tempo; a confirmação item a item continua no modo serial.
+
+"reparse" recalcula caseHtmlClean, rawData/caseData e caseContent.* a partir
+do caseContent.caseHtml já gravado, sem buscar nada no STF (parsers novos):
+cursor ordenado por _id projetando só o caseHtml, parse no mesmo pool de
+processos, gravação em bulk_write não ordenado por lote (REPARSE_BATCH_SIZE).
+O último _id gravado fica em case_query (kind=reparseCheckpoint) e a execução
+seguinte continua dali; "reparse restart" recomeça do início.
+
+O HTML do processo é sanitizado numa única passada do tokenizador, sem montar
+árvore (a_html_sanitizer.py): o wrapper da aba de decisão é isolado e a
+allowlist de tags/atributos aplicada durante a leitura, com saída idêntica à
+do BeautifulSoup; "bench-sanitize [N]" confere isso nos caseHtml gravados.
+
+Toda requisição ao STF (requests, Playwright, API) passa pelo controle
+adaptativo de taxa por host (a_rate_limiter.py): a concorrência sobe enquanto
+as respostas são saudáveis e cai em 429/5xx/timeouts (STF_RATE_*).
 
 Dependências:
   pip install pymongo beautifulsoup4 playwright requests certifi markdownify
+  pip install lxml  (opcional, extração rápida dos cards)
 """
 
 from __future__ import annotations
 
+import math
+import multiprocessing
 import os
+import queue
 import re
 import sys
+import threading
 import time
-from datetime import datetime, timezone
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlencode, urlunparse, urlparse, parse_qs
 
-import certifi
-import requests
 from bs4 import BeautifulSoup
 from markdownify import markdownify as md
 from playwright.sync_api import sync_playwright
-from pymongo import MongoClient, ReturnDocument
+from pymongo import MongoClient, ReturnDocument, UpdateOne
 from pymongo.collection import Collection
 
 try:
@@ -37,6 +109,25 @@ try:
 except Exception:
     load_configs = None  # type: ignore
 
+from a_browser_pool import BrowserPool
+from a_card_extractor import CardIndex, ResultCard, benchmark as benchmark_card_backends, result_cards
+from a_dom_sections import benchmark as benchmark_dom_sections, parse_dom_sections
+from a_fetch_router import FETCH_ROUTER, has_content_markers
+from a_html_sanitizer import benchmark as benchmark_sanitizer, sanitize_html
+from a_http_client import CONFIG as HTTP_CONFIG, get_text
+from a_http_cache import HTTP_CACHE, cached_text
+from a_md_sections import benchmark as benchmark_md_sections, parse_sections
+from a_rate_limiter import (
+    all_stats as rate_limit_stats,
+    controller_for_url,
+    retry_after_seconds,
+    save_all as save_rate_state,
+    send_with_retries,
+)
+from a_page_readiness import READINESS_LOG, ReadinessResult, wait_until_ready
+from a_request_filter import REQUEST_FILTER_LOG, RequestFilterPolicy, RequestFilterStats, install_route_filter
+import k_stf_api_fetch as stf_api
+
 
 # =========================
 # Mongo config
@@ -80,7 +171,43 @@ USER_AGENT: str = (
 )
 
 USE_REQUESTS_FIRST = os.getenv("USE_REQUESTS_FIRST", "false").strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
-SSL_VERIFY = os.getenv("STF_SSL_VERIFY", "true").strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
+
+# auto (requests com fallback para Playwright, roteamento aprendido) | requests | playwright
+CASE_FETCH_ROUTE = os.getenv("CASE_FETCH_ROUTE", "requests" if USE_REQUESTS_FIRST else "auto").strip().lower()
+
+# browser (Playwright/requests + HTML) | api (JSON do backend do SPA, sem navegador; ver k_stf_api_fetch.py)
+STF_FETCH_MODE = os.getenv("STF_FETCH_MODE", "browser").strip().lower()
+
+# Paginação da busca: 0 = todas as páginas (limitado pelo total de hits da página 1)
+SEARCH_MAX_PAGES = int(os.getenv("SEARCH_MAX_PAGES", "0") or 0)
+SEARCH_PAGE_WORKERS = max(1, int(os.getenv("SEARCH_PAGE_WORKERS", "3") or 3))
+
+# pages (uma consulta, todas as páginas) | windows (janelas de data de publicação + marca d'água)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "pages").strip().lower()
+SEARCH_BACKFILL_DAYS = int(os.getenv("SEARCH_BACKFILL_DAYS", "183") or 183)
+SEARCH_WINDOW_DAYS = max(1, int(os.getenv("SEARCH_WINDOW_DAYS", "7") or 7))
+SEARCH_WINDOW_WORKERS = max(1, int(os.getenv("SEARCH_WINDOW_WORKERS", "3") or 3))
+# Dias reabertos antes da marca d'água (publicações indexadas com atraso)
+SEARCH_WINDOW_OVERLAP_DAYS = max(0, int(os.getenv("SEARCH_WINDOW_OVERLAP_DAYS", "1") or 0))
+
+# Filtro de data de publicação do SPA: publicacao_data=DDMMAAAA-DDMMAAAA
+SEARCH_DATE_PARAM = "publicacao_data"
+
+# lazy (seções direto do DOM; caseMarkdown só sob demanda, ver case_markdown) | eager (grava caseMarkdown no fetch)
+CASE_MARKDOWN = os.getenv("CASE_MARKDOWN", "lazy").strip().lower()
+
+# serial (default) | pipelined (fetch em threads -> parse em processos -> gravação; ver _process_docs_pipelined)
+CASE_PIPELINE_MODE = os.getenv("CASE_PIPELINE_MODE", "serial").strip().lower()
+CASE_FETCH_WORKERS = max(1, int(os.getenv("CASE_FETCH_WORKERS", "4") or 4))
+CASE_PARSE_WORKERS = max(1, int(os.getenv("CASE_PARSE_WORKERS", "0") or 0) or (os.cpu_count() or 1))
+# Casos já baixados aguardando parse/gravação; com a fila cheia os fetchers param (backpressure)
+CASE_QUEUE_SIZE = max(1, int(os.getenv("CASE_QUEUE_SIZE", "0") or 0) or 2 * CASE_PARSE_WORKERS)
+
+# Re-parse do HTML gravado: documentos por bulk_write (e por lote de parse em voo)
+REPARSE_BATCH_SIZE = max(1, int(os.getenv("REPARSE_BATCH_SIZE", "200") or 200))
+
+# Bloqueio de imagens/fontes/analytics nos contextos Playwright (ver a_request_filter.py)
+REQUEST_FILTER_POLICY = RequestFilterPolicy.from_env()
 
 
 # =========================
@@ -205,12 +332,18 @@ def build_target_url(
     url_scheme: str,
     url_netloc: str,
     url_path: str,
+    page: int = 1,
+    publication_window: Optional[Tuple[date, date]] = None,
 ) -> str:
     dynamic_params = {
         "pesquisa_inteiro_teor": str(pesquisa_inteiro_teor).lower(),
         "pageSize": page_size,
         "queryString": query_string,
+        "page": page,
     }
+    if publication_window is not None:
+        date_from, date_to = publication_window
+        dynamic_params[SEARCH_DATE_PARAM] = f"{date_from:%d%m%Y}-{date_to:%d%m%Y}"
 
     all_params = FIXED_QUERY_PARAMS.copy()
     classes = all_params.pop("processo_classe_processual_unificada_classe_sigla", [])
@@ -225,6 +358,23 @@ def build_target_url(
 
 
 def fetch_search_html(url: str, headed_mode: bool) -> str:
+    html, _ready, _filter_stats = fetch_search_page(url, headed_mode)
+    return html
+
+
+def fetch_search_page(
+    url: str, headed_mode: bool
+) -> Tuple[str, Optional[ReadinessResult], Optional[RequestFilterStats]]:
+    """
+    Carrega uma página de resultados e retorna (html, prontidão, filtro de requisições)
+    desta página. Abre um Playwright próprio por chamada: pode rodar em threads paralelas.
+    Com HTTP_CACHE=true, um hit no cache retorna (html, None, None) sem abrir o navegador.
+    """
+    cached = HTTP_CACHE.get_text(url, kind="search")
+    if cached is not None:
+        log(f"Página de busca servida do cache: {url}")
+        return cached, None, None
+
     with sync_playwright() as pw:
         browser = pw.chromium.launch(
             headless=not headed_mode,
@@ -236,11 +386,22 @@ def fetch_search_html(url: str, headed_mode: bool) -> str:
             locale="pt-BR",
         )
         page = context.new_page()
-        page.goto(url, wait_until="networkidle")
-        time.sleep(3)
+        filter_stats = install_route_filter(page, REQUEST_FILTER_POLICY)
+        with controller_for_url(url).acquire() as ticket:
+            resp = page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+            ticket.status = resp.status if resp is not None else None
+            ready = wait_until_ready(page, "search", url=url)
+        log(f"Página de busca pronta ({ready.reason}) em {ready.waited_ms} ms")
+        log(f"Filtro de requisições: {filter_stats.summary()}")
         html = page.content()
         browser.close()
-        return html
+    # Página que estourou a prontidão (SPA meio renderizado) não vai para o cache:
+    # seria servida por todo o TTL como se fosse a página real
+    if html and ready.ready:
+        HTTP_CACHE.put_text(url, html, kind="search")
+    elif html:
+        log(f"Página de busca não gravada no cache (prontidão: {ready.reason}): {url}")
+    return html, ready, filter_stats
 
 
 def insert_case_query(
@@ -251,16 +412,33 @@ def insert_case_query(
     inteiro_teor: bool,
     url: str,
     html_raw: str,
+    json_raw: Optional[Dict[str, Any]] = None,
+    page: int = 1,
+    readiness: Optional[ReadinessResult] = None,
+    request_filter: Optional[RequestFilterStats] = None,
+    publication_window: Optional[Tuple[date, date]] = None,
 ) -> str:
     doc = {
         "extractionTimestamp": utc_now(),
         "queryString": query_string,
         "pageSize": int(page_size),
+        "page": int(page),
         "inteiroTeor": bool(inteiro_teor),
         "url": url,
         "htmlRaw": html_raw,
         "status": "new",
     }
+    if publication_window is not None:
+        doc["publicationDateFrom"] = publication_window[0].isoformat()
+        doc["publicationDateTo"] = publication_window[1].isoformat()
+    if json_raw is not None:
+        doc["jsonRaw"] = json_raw
+        doc["fetchMode"] = "api"
+    # Só a prontidão/filtro medidos nesta página (ausentes em hit de cache e no modo api)
+    if readiness is not None:
+        doc["readiness"] = readiness.as_dict()
+    if request_filter is not None:
+        doc["requestFilter"] = request_filter.as_dict()
     result = col.insert_one(doc)
     return str(result.inserted_id)
 
@@ -269,14 +447,9 @@ def insert_case_query(
 # Card extraction (search results)
 # =========================
 
-def _find_result_containers(soup: BeautifulSoup):
-    return soup.find_all("div", class_="result-container")
-
-
-def _extract_stf_decision_id(container) -> Optional[str]:
-    link = container.find("a", class_="mat-tooltip-trigger")
-    if link and link.has_attr("href"):
-        href = link["href"]
+def _extract_stf_decision_id(card: ResultCard) -> Optional[str]:
+    href = card.link_href()
+    if href is not None:
         parts = [p for p in href.split("/") if p]
         for part in reversed(parts):
             if part.startswith("sjur"):
@@ -286,22 +459,15 @@ def _extract_stf_decision_id(container) -> Optional[str]:
     return None
 
 
-def _extract_case_title(container) -> Optional[str]:
-    h4 = container.find("h4", class_="ng-star-inserted")
-    if h4:
-        return _clean_str(h4.get_text(" ", strip=True))
-    link = container.find("a", class_="mat-tooltip-trigger")
-    if link:
-        h4_in = link.find("h4", class_="ng-star-inserted")
-        if h4_in:
-            return _clean_str(h4_in.get_text(" ", strip=True))
-    return None
+def _extract_case_title(card: ResultCard) -> Optional[str]:
+    title = card.title_text()
+    return _clean_str(title) if title is not None else None
 
 
-def _extract_case_url(container) -> Optional[str]:
-    link = container.find("a", class_="mat-tooltip-trigger")
-    if link and link.has_attr("href"):
-        href = (link["href"] or "").strip()
+def _extract_case_url(card: ResultCard) -> Optional[str]:
+    href = card.link_href()
+    if href is not None:
+        href = (href or "").strip()
         if not href:
             return None
         if href.startswith("http"):
@@ -310,28 +476,24 @@ def _extract_case_url(container) -> Optional[str]:
     return None
 
 
-def _extract_labeled_value(container, label_contains: str) -> Optional[str]:
-    for el in container.find_all(["h4", "span", "div"]):
-        txt = el.get_text(" ", strip=True)
-        if label_contains in txt:
-            nxt = el.find_next("span")
-            if nxt:
-                return _clean_str(nxt.get_text(" ", strip=True))
-            if ":" in txt:
-                return _clean_str(txt.split(":", 1)[1])
+def _extract_labeled_value(index: CardIndex, label_contains: str) -> Optional[str]:
+    for item in index.items(label_contains):
+        nxt = item.next_span_text()
+        if nxt is not None:
+            return _clean_str(nxt)
+        if ":" in item.text:
+            return _clean_str(item.text.split(":", 1)[1])
     return None
 
 
-def _extract_date_by_regex(container, label_contains: str) -> Optional[str]:
-    for el in container.find_all(["h4", "span", "div"]):
-        txt = el.get_text(" ", strip=True)
-        if label_contains in txt:
-            m = re.search(r"\d{2}/\d{2}/\d{4}", txt)
-            if m:
-                return m.group(0)
-            nxt = el.find_next("span")
-            if nxt:
-                return _clean_str(nxt.get_text(" ", strip=True))
+def _extract_date_by_regex(index: CardIndex, label_contains: str) -> Optional[str]:
+    for item in index.items(label_contains):
+        m = re.search(r"\d{2}/\d{2}/\d{4}", item.text)
+        if m:
+            return m.group(0)
+        nxt = item.next_span_text()
+        if nxt is not None:
+            return _clean_str(nxt)
     return None
 
 
@@ -349,22 +511,22 @@ def _derive_from_title(case_title: str) -> Dict[str, str]:
     return out
 
 
-def extract_cards(html_raw: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html_raw, "html.parser")
-    containers = _find_result_containers(soup)
-
+def extract_cards(html_raw: str, *, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Cards da página de resultados; backend do parser em CARD_PARSER (ver a_card_extractor.py)."""
     out_docs: List[Dict[str, Any]] = []
-    for container in containers:
-        case_title = _extract_case_title(container)
-        stf_id = _extract_stf_decision_id(container)
-        case_url = _extract_case_url(container)
+    for card in result_cards(html_raw, backend):
+        case_title = _extract_case_title(card)
+        stf_id = _extract_stf_decision_id(card)
+        case_url = _extract_case_url(card)
         if not stf_id:
             continue
 
-        judging_body = _extract_labeled_value(container, "Órgão julgador")
-        rapporteur = _extract_labeled_value(container, "Relator")
-        judgment_date = _extract_date_by_regex(container, "Julgamento")
-        publication_date = _extract_date_by_regex(container, "Publicação")
+        # Uma passada pelo card indexa os candidatos de todos os rótulos
+        index = CardIndex(card)
+        judging_body = _extract_labeled_value(index, "Órgão julgador")
+        rapporteur = _extract_labeled_value(index, "Relator")
+        judgment_date = _extract_date_by_regex(index, "Julgamento")
+        publication_date = _extract_date_by_regex(index, "Publicação")
 
         derived = _derive_from_title(case_title or "")
 
@@ -383,6 +545,30 @@ def extract_cards(html_raw: str) -> List[Dict[str, Any]]:
     return out_docs
 
 
+# Total de hits exibido pelo SPA. Só seletores estritos: o rótulo de contagem
+# (<span class="ng-star-inserted">67 resultado(s) para: <span>aborto</span></span>)
+# e o paginador; um número solto no texto da página não pode limitar a varredura.
+_TOTAL_HITS_LABEL_RE = re.compile(r"^\s*(\d[\d\.]*)\s+resultado\(s\)\s+para\b", re.IGNORECASE)
+_TOTAL_HITS_PAGINATOR_RE = re.compile(r"\b\d[\d\.]*\s*[-–]\s*\d[\d\.]*\s+(?:de|of)\s+(\d[\d\.]*)\s*$", re.IGNORECASE)
+
+
+def extract_total_hits(html_raw: str) -> Optional[int]:
+    """Retorna o total de resultados da busca ou None se o rótulo/paginador não estiver no HTML."""
+    soup = BeautifulSoup(html_raw, "html.parser")
+    candidates = [
+        (_TOTAL_HITS_LABEL_RE, span.get_text(" ", strip=True))
+        for span in soup.select("span.ng-star-inserted")
+    ]
+    label = soup.select_one(".mat-paginator-range-label")
+    if label is not None:
+        candidates.append((_TOTAL_HITS_PAGINATOR_RE, label.get_text(" ", strip=True)))
+    for pattern, txt in candidates:
+        m = pattern.search(txt)
+        if m:
+            return int(m.group(1).replace(".", ""))
+    return None
+
+
 def upsert_case_minimal(case_col: Collection, card: Dict[str, Any], raw_id: str) -> None:
     case_stf_id = card.get("caseStfId")
     if not case_stf_id:
@@ -423,31 +609,353 @@ def upsert_case_minimal(case_col: Collection, card: Dict[str, Any], raw_id: str)
     case_col.update_one({"caseStfId": case_stf_id}, {"$set": doc}, upsert=True)
 
 
+# =========================
+# Stage 1: multi-page crawl
+# =========================
+
+def _fetch_search_result_page(defaults: Dict[str, Any], page: int) -> Dict[str, Any]:
+    """
+    Busca uma página de resultados (modo browser ou api) e extrai os cards.
+    defaults["publication_window"] (opcional) restringe a busca a uma janela de publicação.
+    """
+    window = defaults.get("publication_window")
+    if STF_FETCH_MODE == "api":
+        cards, json_search = stf_api.search_cards(
+            query_string=defaults["query_string"],
+            page=page,
+            page_size=defaults["page_size"],
+            publication_window=window,
+        )
+        return {
+            "page": page,
+            "url": stf_api.STF_API_SEARCH_URL,
+            "html": "",
+            "json": json_search,
+            "readiness": None,
+            "filterStats": None,
+            "cards": cards,
+            "total": stf_api.total_hits(json_search),
+        }
+
+    url = build_target_url(
+        query_string=defaults["query_string"],
+        page_size=defaults["page_size"],
+        pesquisa_inteiro_teor=defaults["inteiro_teor"],
+        url_scheme=defaults["url_scheme"],
+        url_netloc=defaults["url_netloc"],
+        url_path=defaults["url_path"],
+        page=page,
+        publication_window=window,
+    )
+    html, ready, filter_stats = fetch_search_page(url, defaults["headed_mode"])
+    return {
+        "page": page,
+        "url": url,
+        "html": html,
+        "json": None,
+        "readiness": ready,
+        "filterStats": filter_stats,
+        "cards": extract_cards(html),
+        "total": extract_total_hits(html),
+    }
+
+
+def _store_search_result_page(
+    case_query_col: Collection,
+    case_data_col: Collection,
+    defaults: Dict[str, Any],
+    result: Dict[str, Any],
+) -> str:
+    query_id = insert_case_query(
+        case_query_col,
+        query_string=defaults["query_string"],
+        page_size=defaults["page_size"],
+        inteiro_teor=defaults["inteiro_teor"],
+        url=result["url"],
+        html_raw=result["html"],
+        json_raw=result["json"],
+        page=result["page"],
+        readiness=result["readiness"],
+        request_filter=result["filterStats"],
+        publication_window=defaults.get("publication_window"),
+    )
+    for card in result["cards"]:
+        upsert_case_minimal(case_data_col, card, query_id)
+    log(f"{_window_label(defaults)}Página {result['page']}: {len(result['cards'])} processos | case_query _id={query_id}")
+    return query_id
+
+
+def crawl_search_pages(
+    case_query_col: Collection,
+    case_data_col: Collection,
+    defaults: Dict[str, Any],
+    *,
+    page_workers: int = SEARCH_PAGE_WORKERS,
+    strict: bool = False,
+) -> int:
+    """
+    Percorre todas as páginas de resultados da busca.
+
+    A página 1 é buscada primeiro para ler o total de hits; as demais são
+    buscadas em paralelo (page_workers) e gravadas conforme chegam.
+    Sem total visível, busca em lotes de page_workers páginas até
+    receber uma página incompleta ou sem processos novos, ou um lote em
+    que nenhuma página foi obtida.
+
+    strict=True levanta RuntimeError se alguma página falhar (usado pelas
+    janelas de data, que só avançam a marca d'água quando completas).
+
+    Returns:
+        int: quantidade de processos distintos identificados
+    """
+    label = _window_label(defaults)
+    page_size = int(defaults["page_size"])
+    first = _fetch_search_result_page(defaults, 1)
+    _store_search_result_page(case_query_col, case_data_col, defaults, first)
+    seen = {c["caseStfId"] for c in first["cards"]}
+
+    total = first["total"]
+    last_page: Optional[int] = max(1, math.ceil(total / page_size)) if total is not None else None
+    if SEARCH_MAX_PAGES:
+        last_page = min(last_page or SEARCH_MAX_PAGES, SEARCH_MAX_PAGES)
+    log(f"{label}Total de resultados: {total if total is not None else 'desconhecido'} | páginas: {last_page or '?'}")
+
+    if len(first["cards"]) < page_size or last_page == 1:
+        return len(seen)
+
+    failed: List[int] = []
+
+    def _drain(futures: Dict[Any, int]) -> Tuple[bool, int]:
+        """
+        Grava as páginas conforme concluem. Retorna (fim dos resultados, páginas gravadas):
+        o primeiro é True se alguma página indicar o fim dos resultados.
+        """
+        reached_end = False
+        stored = 0
+        for fut in as_completed(futures):
+            page = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                log(f"{label}Erro na página {page}: {e}")
+                failed.append(page)
+                continue
+            _store_search_result_page(case_query_col, case_data_col, defaults, result)
+            stored += 1
+            ids = {c["caseStfId"] for c in result["cards"]}
+            if len(result["cards"]) < page_size or not (ids - seen):
+                reached_end = True
+            seen.update(ids)
+        return reached_end, stored
+
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=page_workers) as executor:
+        if last_page is not None:
+            _drain({executor.submit(_fetch_search_result_page, defaults, p): p for p in range(2, last_page + 1)})
+        else:
+            next_page = 2
+            while True:
+                wave = range(next_page, next_page + page_workers)
+                reached_end, stored = _drain({executor.submit(_fetch_search_result_page, defaults, p): p for p in wave})
+                if reached_end:
+                    break
+                if not stored:
+                    # Lote inteiro com erro (queda, 429, bloqueio): sem total não há como saber o fim
+                    log(f"{label}Nenhuma página do lote {wave.start}-{wave.stop - 1} obtida; interrompendo a varredura")
+                    break
+                next_page += page_workers
+
+    log(f"{label}Busca paginada concluída em {time.monotonic() - t0:.1f}s | processos={len(seen)}")
+    if failed:
+        log(f"{label}Aviso: páginas com erro: {sorted(failed)}")
+        if strict:
+            raise RuntimeError(f"páginas com erro: {sorted(failed)}")
+    return len(seen)
+
+
+# =========================
+# Stage 1: date-window crawl (backfill + monitoramento)
+# =========================
+
+def _window_label(defaults: Dict[str, Any]) -> str:
+    window = defaults.get("publication_window")
+    if window is None:
+        return ""
+    return f"[{window[0]:%d/%m/%Y}-{window[1]:%d/%m/%Y}] "
+
+
+def split_date_windows(start: date, end: date, days: int) -> List[Tuple[date, date]]:
+    """Fatia [start, end] (inclusivo) em janelas consecutivas de até `days` dias."""
+    windows: List[Tuple[date, date]] = []
+    cur = start
+    while cur <= end:
+        w_end = min(end, cur + timedelta(days=days - 1))
+        windows.append((cur, w_end))
+        cur = w_end + timedelta(days=1)
+    return windows
+
+
+def _query_key(defaults: Dict[str, Any]) -> str:
+    classes = ",".join(FIXED_QUERY_PARAMS.get("processo_classe_processual_unificada_classe_sigla", []))
+    return f"{defaults['query_string']}|inteiroTeor={bool(defaults['inteiro_teor'])}|classes={classes}"
+
+
+def get_high_water_mark(col: Collection, defaults: Dict[str, Any]) -> Optional[date]:
+    """Última data de publicação coberta por completo para a consulta (ou None)."""
+    doc = col.find_one({"kind": "highWaterMark", "queryKey": _query_key(defaults)})
+    if not doc or not doc.get("publicationDateTo"):
+        return None
+    try:
+        return date.fromisoformat(doc["publicationDateTo"])
+    except ValueError:
+        return None
+
+
+def set_high_water_mark(
+    col: Collection,
+    defaults: Dict[str, Any],
+    mark: date,
+    *,
+    windows: int,
+    cases: int,
+) -> None:
+    col.update_one(
+        {"kind": "highWaterMark", "queryKey": _query_key(defaults)},
+        {
+            "$set": {
+                "queryString": defaults["query_string"],
+                "inteiroTeor": bool(defaults["inteiro_teor"]),
+                "publicationDateTo": mark.isoformat(),
+                "updatedAt": utc_now(),
+                "lastRun": {"windows": windows, "cases": cases},
+            },
+            "$setOnInsert": {"createdAt": utc_now()},
+        },
+        upsert=True,
+    )
+
+
+def crawl_date_windows(
+    case_query_col: Collection,
+    case_data_col: Collection,
+    defaults: Dict[str, Any],
+) -> int:
+    """
+    Backfill/monitoramento por janelas de data de publicação.
+
+    Sem marca d'água: cobre os últimos SEARCH_BACKFILL_DAYS dias. Com marca:
+    apenas de (marca - SEARCH_WINDOW_OVERLAP_DAYS) até hoje, o que no uso
+    diário são uma ou duas janelas de uma página cada.
+
+    As janelas rodam em paralelo (SEARCH_WINDOW_WORKERS; páginas de cada
+    janela em série). A marca avança até o fim da última janela concluída
+    sem erro e contígua desde a primeira: uma janela com erro é refeita na
+    próxima execução.
+
+    Returns:
+        int: soma dos processos identificados nas janelas
+    """
+    today = utc_now().date()
+    mark = get_high_water_mark(case_query_col, defaults)
+    if mark is None:
+        start = today - timedelta(days=SEARCH_BACKFILL_DAYS)
+        log(f"Sem marca d'água para a consulta: backfill de {SEARCH_BACKFILL_DAYS} dias")
+    else:
+        start = min(today, mark + timedelta(days=1) - timedelta(days=SEARCH_WINDOW_OVERLAP_DAYS))
+        log(f"Marca d'água: {mark:%d/%m/%Y} | buscando a partir de {start:%d/%m/%Y}")
+
+    windows = split_date_windows(start, today, SEARCH_WINDOW_DAYS)
+    log(f"Janelas de publicação: {len(windows)} x {SEARCH_WINDOW_DAYS} dias | workers={SEARCH_WINDOW_WORKERS}")
+
+    done: Dict[Tuple[date, date], int] = {}
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=SEARCH_WINDOW_WORKERS) as executor:
+        futures = {
+            executor.submit(
+                crawl_search_pages,
+                case_query_col,
+                case_data_col,
+                {**defaults, "publication_window": w},
+                page_workers=1,
+                strict=True,
+            ): w
+            for w in windows
+        }
+        for fut in as_completed(futures):
+            w = futures[fut]
+            try:
+                done[w] = fut.result()
+            except Exception as e:
+                log(f"{_window_label({'publication_window': w})}Erro na janela: {e}")
+
+    new_mark = mark
+    for w in windows:
+        if w not in done:
+            break
+        new_mark = w[1] if new_mark is None else max(new_mark, w[1])
+
+    cases = sum(done.values())
+    if new_mark is not None and new_mark != mark:
+        set_high_water_mark(case_query_col, defaults, new_mark, windows=len(done), cases=cases)
+    failed = len(windows) - len(done)
+    log(
+        f"Janelas concluídas: {len(done)}/{len(windows)} em {time.monotonic() - t0:.1f}s | "
+        f"processos={cases} | marca d'água={new_mark.strftime('%d/%m/%Y') if new_mark else '-'}"
+        + (f" | janelas com erro={failed}" if failed else "")
+    )
+    return cases
+
+
 # =========================
 # Stage 2: fetch case HTML
 # =========================
 
 def fetch_case_html_requests(url: str) -> str:
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Referer": "https://jurisprudencia.stf.jus.br/",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
-    verify_opt = certifi.where() if SSL_VERIFY else False
-    if not SSL_VERIFY:
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    return cached_text(url, kind="case_requests", fetch=lambda: _fetch_case_html_requests(url))
+
 
-    resp = requests.get(url, headers=headers, timeout=60, verify=verify_opt)
+def _fetch_case_html_requests(url: str) -> str:
+    # Sessão compartilhada (keep-alive, TLS reaproveitado): ver a_http_client.py.
+    # 429/5xx são repetidos com um ticket do controle de taxa por tentativa
+    headers = {"User-Agent": USER_AGENT, "Upgrade-Insecure-Requests": "1"}
+    resp = send_with_retries(url, lambda: get_text(url, headers=headers), retries=HTTP_CONFIG.retries)
     resp.raise_for_status()
-    resp.encoding = resp.encoding or "utf-8"
     return resp.text
 
 
-def fetch_case_html_playwright(url: str) -> str:
+def fetch_case_page_playwright(url: str, pool: Optional[BrowserPool] = None) -> Dict[str, Any]:
+    """
+    Retorna {"html", "ready", "filterStats"} da página do processo via Playwright.
+    Em hit de cache, "ready" e "filterStats" são None (nada foi medido nesta chamada).
+    Só grava no cache a página pronta e com os marcadores de conteúdo: um hit
+    pula o navegador e o FETCH_ROUTER por todo o TTL.
+    """
+    cached = HTTP_CACHE.get_text(url, kind="case_playwright")
+    if cached is not None:
+        return {"html": cached, "ready": None, "filterStats": None}
+    fetched = _fetch_case_page_playwright(url, pool=pool)
+    html, ready = fetched["html"], fetched["ready"]
+    if html and ready.ready and has_content_markers(html):
+        HTTP_CACHE.put_text(url, html, kind="case_playwright")
+    elif html:
+        why = "sem marcadores de conteúdo" if ready.ready else f"prontidão: {ready.reason}"
+        log(f"Página do processo não gravada no cache ({why}): {url}")
+    return fetched
+
+
+def fetch_case_html_playwright(url: str, pool: Optional[BrowserPool] = None) -> str:
+    return fetch_case_page_playwright(url, pool=pool)["html"]
+
+
+def _fetch_case_page_playwright(url: str, pool: Optional[BrowserPool] = None) -> Dict[str, Any]:
+    if pool is not None:
+        # No modo auto o pool só lança os navegadores no primeiro fallback (start() é idempotente)
+        pool.start()
+        with pool.page() as page:
+            filter_stats = install_route_filter(page, REQUEST_FILTER_POLICY)
+            ready = _goto_case_page(page, url)
+            return {"html": page.content(), "ready": ready, "filterStats": filter_stats}
+
     with sync_playwright() as p:
         browser = p.chromium.launch(
             headless=True,
@@ -459,51 +967,81 @@ def fetch_case_html_playwright(url: str) -> str:
             extra_http_headers={"accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"},
         )
         page = context.new_page()
-        page.goto(url, wait_until="networkidle", timeout=60_000)
-        time.sleep(2)
+        filter_stats = install_route_filter(page, REQUEST_FILTER_POLICY)
+        ready = _goto_case_page(page, url)
         html = page.content()
         browser.close()
-        return html
+        return {"html": html, "ready": ready, "filterStats": filter_stats}
 
 
-def get_case_html(url: str) -> str:
-    if USE_REQUESTS_FIRST:
-        return fetch_case_html_requests(url)
-    return fetch_case_html_playwright(url)
+def _goto_case_page(page, url: str) -> ReadinessResult:
+    # Navegação + espera de prontidão contam como uma requisição para o controle de taxa
+    with controller_for_url(url).acquire() as ticket:
+        resp = page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+        if resp is not None:
+            ticket.status = resp.status
+            ticket.retry_after = retry_after_seconds(resp.headers)
+        return wait_until_ready(page, "case", url=url)
 
 
-def sanitize_html_keep_formatting(html: str) -> str:
-    try:
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(["script", "style", "noscript", "iframe", "object", "embed"]):
-            tag.decompose()
-        content = soup.find("div", class_="mat-tab-body-wrapper")
-        if content is not None:
-            soup = BeautifulSoup(str(content), "html.parser")
-
-        allowed = {
-            "b", "strong", "i", "em", "u",
-            "p", "br",
-            "ul", "ol", "li",
-            "h1", "h2", "h3", "h4", "h5", "h6",
-            "a",
-            "blockquote",
-        }
-        for tag in list(soup.find_all(True)):
-            if tag.name not in allowed:
-                tag.unwrap()
-            elif tag.name != "a":
-                tag.attrs = {}
-            else:
-                href = tag.get("href")
-                tag.attrs = {}
-                if href:
-                    tag["href"] = href
+def get_case_html(url: str, pool: Optional[BrowserPool] = None) -> str:
+    return get_case_page_routed(url, pool=pool)["html"]
+
+
+def get_case_page_routed(
+    url: str,
+    pool: Optional[BrowserPool] = None,
+    *,
+    playwright_fetch: Optional[Callable[[str], Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Retorna {"html", "route", "ready", "filterStats"} conforme CASE_FETCH_ROUTE;
+    route é "requests" | "playwright" e ready/filterStats são os desta página.
+
+    playwright_fetch (opcional) substitui fetch_case_page_playwright(url, pool):
+    o modo pipelined o usa para executar o Playwright síncrono na thread dona do pool.
+    """
+    if CASE_FETCH_ROUTE == "requests":
+        return {"html": fetch_case_html_requests(url), "route": "requests", "ready": None, "filterStats": None}
+    if CASE_FETCH_ROUTE == "playwright":
+        fetched = playwright_fetch(url) if playwright_fetch else fetch_case_page_playwright(url, pool=pool)
+        return {**fetched, "route": "playwright"}
+    return fetch_case_page_hybrid(url, pool=pool, playwright_fetch=playwright_fetch)
+
+
+def fetch_case_page_hybrid(
+    url: str,
+    pool: Optional[BrowserPool] = None,
+    *,
+    playwright_fetch: Optional[Callable[[str], Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Tenta o requests e valida os marcadores de conteúdo; sem eles (shell do
+    SPA) ou em erro, sobe para o Playwright. O resultado de cada caminho
+    alimenta o FETCH_ROUTER, que passa a pular o requests nos padrões de URL
+    em que ele não funciona.
+    """
+    if FETCH_ROUTER.prefer_requests(url):
+        try:
+            html = fetch_case_html_requests(url)
+        except Exception as e:
+            log(f"requests falhou ({e}); usando Playwright")
+            html = ""
+        ok = has_content_markers(html)
+        FETCH_ROUTER.record(url, "requests", ok)
+        if ok:
+            return {"html": html, "route": "requests", "ready": None, "filterStats": None}
+        if html:
+            log("HTML via requests sem marcadores de conteúdo; usando Playwright")
 
-        return str(soup).strip()
-    except Exception:
-        html = re.sub(r"<(script|style)[^>]*>.*?</\1>", "", html, flags=re.DOTALL | re.IGNORECASE)
-        return html.strip()
+    fetched = playwright_fetch(url) if playwright_fetch else fetch_case_page_playwright(url, pool=pool)
+    FETCH_ROUTER.record(url, "playwright", has_content_markers(fetched["html"]))
+    return {**fetched, "route": "playwright"}
+
+
+def sanitize_html_keep_formatting(html: str) -> str:
+    """Conteúdo do processo com formatação e links, numa passada (a_html_sanitizer.py, HTML_SANITIZER)."""
+    return sanitize_html(html)
 
 
 def convert_to_markdown(html: str) -> str:
@@ -520,29 +1058,6 @@ def convert_to_markdown(html: str) -> str:
 # Stage 3: parse markdown
 # =========================
 
-def parse_sections(md_text: str) -> Dict[str, str]:
-    sections: Dict[str, List[str]] = {}
-    current_title: Optional[str] = None
-
-    for raw_line in (md_text or "").splitlines():
-        line = raw_line.rstrip()
-        m = re.match(r"^####\s+(.*)$", line)
-        if m:
-            current_title = _clean_ws(m.group(1))
-            if current_title not in sections:
-                sections[current_title] = []
-            continue
-        if current_title is not None:
-            sections[current_title].append(line)
-
-    out: Dict[str, str] = {}
-    for title, lines in sections.items():
-        content = "\n".join([ln for ln in lines]).strip()
-        if content:
-            out[title] = content
-    return out
-
-
 def parse_parties(text: str) -> List[Dict[str, str]]:
     out: List[Dict[str, str]] = []
     for line in (text or "").splitlines():
@@ -600,27 +1115,10 @@ def build_raw_and_case_data(sections: Dict[str, str]) -> Tuple[Dict[str, Any], D
     return raw_data, case_data
 
 
-def extract_sections_from_markdown(md_text: str) -> Dict[str, Any]:
-    sections: Dict[str, List[str]] = {}
-    current_title: Optional[str] = None
-
-    for raw_line in (md_text or "").splitlines():
-        line = raw_line.rstrip()
-        m = re.match(r"^####\s+(.*)$", line)
-        if m:
-            current_title = _clean_ws(m.group(1))
-            if current_title not in sections:
-                sections[current_title] = []
-            continue
-        if current_title is not None:
-            sections[current_title].append(line)
-
+def map_case_content(sections: Dict[str, str]) -> Dict[str, Any]:
+    """Campos caseContent.* (dot-notation para $set) a partir das seções já tokenizadas."""
     extracted_data: Dict[str, Any] = {}
-    for title, lines in sections.items():
-        content = "\n".join([ln for ln in lines]).strip()
-        if not content:
-            continue
-
+    for title, content in sections.items():
         if title == "Publicação":
             extracted_data["caseContent.casePublication"] = content
         elif title == "Partes":
@@ -643,13 +1141,227 @@ def extract_sections_from_markdown(md_text: str) -> Dict[str, Any]:
     return extracted_data
 
 
+def extract_sections_from_markdown(md_text: str) -> Dict[str, Any]:
+    return map_case_content(parse_sections(md_text))
+
+
+def case_markdown(case_data_col: Collection, doc: Dict[str, Any]) -> str:
+    """
+    caseMarkdown para exibição. Com CASE_MARKDOWN=lazy o fetch não gera o
+    Markdown; ele é convertido do caseHtmlClean no primeiro pedido e gravado.
+    """
+    content = doc.get("caseContent") or {}
+    md_text = content.get("caseMarkdown")
+    if md_text or not content.get("caseHtmlClean"):
+        return md_text or ""
+    md_text = convert_to_markdown(content["caseHtmlClean"])
+    case_data_col.update_one({"_id": doc["_id"]}, {"$set": {"caseContent.caseMarkdown": md_text}})
+    return md_text
+
+
+# =========================
+# Re-parse (HTML gravado, sem refetch)
+# =========================
+
+def _reparse_fields(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """$set/$unset do re-parse: mesmos campos do fetch, sem mexer no status do pipeline."""
+    set_fields: Dict[str, Any] = {
+        "caseContent.caseHtmlClean": parsed["sanitized"],
+        "processing.caseContentMinedAt": utc_now(),
+        "processing.caseReparsedAt": utc_now(),
+        "processing.lastUpdatedAt": utc_now(),
+    }
+    set_fields.update(_parsed_data_fields(parsed))
+    set_fields.update(parsed["caseContent"])
+    update: Dict[str, Any] = {"$set": set_fields}
+    if parsed["markdown"] is not None:
+        set_fields["caseContent.caseMarkdown"] = parsed["markdown"]
+    else:
+        # CASE_MARKDOWN=lazy: o Markdown antigo sairia do parser antigo; case_markdown() regenera sob demanda
+        update["$unset"] = {"caseContent.caseMarkdown": ""}
+    return update
+
+
+def _flush_reparse_batch(
+    case_data_col: Collection,
+    batch: List[Tuple[Any, Future]],
+    counts: Dict[str, int],
+) -> None:
+    ops: List[UpdateOne] = []
+    for doc_id, fut in batch:
+        try:
+            ops.append(UpdateOne({"_id": doc_id}, _reparse_fields(fut.result())))
+            counts["ok"] += 1
+        except Exception as e:
+            ops.append(UpdateOne({"_id": doc_id}, {"$set": {"processing.reparseError": str(e)}}))
+            counts["error"] += 1
+    if ops:
+        case_data_col.bulk_write(ops, ordered=False)
+
+
+def reparse_stored_html(case_query_col: Collection, case_data_col: Collection, *, restart: bool = False) -> int:
+    """
+    Recalcula os campos derivados do HTML de todos os case_data com caseHtml,
+    sem refetch. Um lote é parseado no pool de processos enquanto o anterior é
+    gravado; o checkpoint (_id do último lote gravado) só avança depois do
+    bulk_write, então uma interrupção repete no máximo os lotes em voo.
+    """
+    checkpoint_filter = {"kind": "reparseCheckpoint"}
+    if restart:
+        case_query_col.delete_one(checkpoint_filter)
+    checkpoint = case_query_col.find_one(checkpoint_filter) or {}
+    query: Dict[str, Any] = {"caseContent.caseHtml": {"$nin": [None, ""]}}
+    if checkpoint.get("lastId") is not None:
+        query["_id"] = {"$gt": checkpoint["lastId"]}
+        log(f"Re-parse: retomando após _id={checkpoint['lastId']} ({checkpoint.get('done', 0)} já gravados)")
+
+    counts = {"ok": 0, "error": 0}
+    done = int(checkpoint.get("done", 0))
+    in_flight: "deque[List[Tuple[Any, Future]]]" = deque()
+    t0 = time.monotonic()
+
+    def _write_oldest() -> None:
+        nonlocal done
+        batch = in_flight.popleft()
+        _flush_reparse_batch(case_data_col, batch, counts)
+        done += len(batch)
+        case_query_col.update_one(
+            checkpoint_filter,
+            {
+                "$set": {"lastId": batch[-1][0], "done": done, "updatedAt": utc_now()},
+                "$setOnInsert": {"createdAt": utc_now()},
+            },
+            upsert=True,
+        )
+        elapsed = time.monotonic() - t0
+        log(f"Re-parse: {done} gravados (ok={counts['ok']} erros={counts['error']}, {counts['ok'] / elapsed if elapsed else 0.0:.1f}/s)")
+
+    with ProcessPoolExecutor(max_workers=CASE_PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")) as parse_pool:
+        with case_data_col.find(
+            query,
+            projection={"caseContent.caseHtml": 1},
+            sort=[("_id", 1)],
+            batch_size=REPARSE_BATCH_SIZE,
+            no_cursor_timeout=True,
+        ) as cursor:
+            batch: List[Tuple[Any, Future]] = []
+            for doc in cursor:
+                html = doc["caseContent"]["caseHtml"]
+                batch.append((doc["_id"], parse_pool.submit(parse_case_html, html, CASE_MARKDOWN)))
+                if len(batch) >= REPARSE_BATCH_SIZE:
+                    in_flight.append(batch)
+                    batch = []
+                    # no máximo dois lotes em voo: o próximo é parseado enquanto este é gravado
+                    if len(in_flight) > 1:
+                        _write_oldest()
+            if batch:
+                in_flight.append(batch)
+            while in_flight:
+                _write_oldest()
+
+    log(f"Re-parse concluído: ok={counts['ok']} erros={counts['error']} em {time.monotonic() - t0:.1f}s")
+    return 0 if not counts["error"] else 2
+
+
 # =========================
 # Main
 # =========================
 
+def bench_cards(case_query_col: Collection, limit: int = 20) -> int:
+    """Compara os backends de extract_cards nas páginas de busca gravadas (htmlRaw)."""
+    cursor = case_query_col.find(
+        {"htmlRaw": {"$nin": [None, ""]}},
+        projection={"htmlRaw": 1},
+        sort=[("extractionTimestamp", -1)],
+        limit=limit,
+    )
+    samples = [(str(d["_id"]), d["htmlRaw"]) for d in cursor]
+    if not samples:
+        log("Nenhum case_query com htmlRaw para comparar.")
+        return 1
+    report = benchmark_card_backends(samples, lambda html, backend: extract_cards(html, backend=backend))
+    for line in report.mismatches:
+        log(f"Divergência: {line}")
+    log(f"Extração de cards: {report.summary()}")
+    return 0 if report.identical else 2
+
+
+def bench_sections(case_data_col: Collection, limit: int = 200) -> int:
+    """Tokenizador de seções vs o split linha a linha (2x por caso, como antes) nos caseMarkdown gravados."""
+    cursor = case_data_col.find(
+        {"caseContent.caseMarkdown": {"$nin": [None, ""]}},
+        projection={"caseContent.caseMarkdown": 1},
+        limit=limit,
+    )
+    samples = [(str(d["_id"]), d["caseContent"]["caseMarkdown"]) for d in cursor]
+    if not samples:
+        log("Nenhum case_data com caseMarkdown para comparar.")
+        return 1
+    report = benchmark_md_sections(samples)
+    log(f"Seções Markdown: {report}")
+    return 0 if not report["mismatches"] else 2
+
+
+def bench_dom_sections(case_data_col: Collection, limit: int = 200) -> int:
+    """Seções direto do DOM vs convert_to_markdown + parse_sections nos caseHtmlClean gravados."""
+    cursor = case_data_col.find(
+        {"caseContent.caseHtmlClean": {"$nin": [None, ""]}},
+        projection={"caseContent.caseHtmlClean": 1},
+        limit=limit,
+    )
+    samples = [(str(d["_id"]), d["caseContent"]["caseHtmlClean"]) for d in cursor]
+    if not samples:
+        log("Nenhum case_data com caseHtmlClean para comparar.")
+        return 1
+    report = benchmark_dom_sections(samples, convert_to_markdown)
+    log(f"Seções do DOM: {report}")
+    return 0 if not report["mismatches"] else 2
+
+
+def bench_sanitize(case_data_col: Collection, limit: int = 50) -> int:
+    """Sanitizador em streaming vs o BeautifulSoup (dois parses) nos caseHtml gravados."""
+    cursor = case_data_col.find(
+        {"caseContent.caseHtml": {"$nin": [None, ""]}},
+        projection={"caseContent.caseHtml": 1},
+        limit=limit,
+    )
+    samples = [(str(d["_id"]), d["caseContent"]["caseHtml"]) for d in cursor]
+    if not samples:
+        log("Nenhum case_data com caseHtml para comparar.")
+        return 1
+    report = benchmark_sanitizer(samples)
+    log(f"Sanitização HTML: {report}")
+    return 0 if not report["mismatches"] else 2
+
+
 def main() -> int:
     case_query_col, case_data_col = get_collections()
 
+    if len(sys.argv) > 1 and sys.argv[1] == "reparse":
+        return reparse_stored_html(case_query_col, case_data_col, restart=sys.argv[2:3] == ["restart"])
+    if len(sys.argv) > 1 and sys.argv[1] == "bench-cards":
+        return bench_cards(case_query_col, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
+    if len(sys.argv) > 1 and sys.argv[1] == "bench-sections":
+        return bench_sections(case_data_col, int(sys.argv[2]) if len(sys.argv) > 2 else 200)
+    if len(sys.argv) > 1 and sys.argv[1] == "bench-dom-sections":
+        return bench_dom_sections(case_data_col, int(sys.argv[2]) if len(sys.argv) > 2 else 200)
+    if len(sys.argv) > 1 and sys.argv[1] == "bench-sanitize":
+        return bench_sanitize(case_data_col, int(sys.argv[2]) if len(sys.argv) > 2 else 50)
+
+    if STF_FETCH_MODE == "api":
+        problems = stf_api.api_mode_problems()
+        for problem in problems:
+            log(f"Modo api não verificado: {problem}")
+        if problems and not stf_api.STF_API_ALLOW_UNVERIFIED:
+            log(
+                "STF_FETCH_MODE=api recusado: o mapeamento JSON -> case_data não foi conferido contra "
+                "respostas reais (python k_stf_api_fetch.py record <url> + check). "
+                "Use STF_FETCH_MODE=browser ou STF_API_ALLOW_UNVERIFIED=true."
+            )
+            return 1
+        if problems:
+            log("AVISO: STF_API_ALLOW_UNVERIFIED=true; gravando com mapeamento não verificado")
+
     defaults = load_defaults()
     url = build_target_url(
         query_string=defaults["query_string"],
@@ -663,35 +1375,25 @@ def main() -> int:
     log("ETAPA 1: Pesquisar STF e identificar processos")
     log(f"URL: {url}")
 
-    html_search = fetch_search_html(url, defaults["headed_mode"])
-    query_id = insert_case_query(
-        case_query_col,
-        query_string=defaults["query_string"],
-        page_size=defaults["page_size"],
-        inteiro_teor=defaults["inteiro_teor"],
-        url=url,
-        html_raw=html_search,
-    )
-    log(f"HTML de busca salvo em case_query (_id={query_id})")
-
-    cards = extract_cards(html_search)
-    log(f"Processos identificados: {len(cards)}")
-
-    for card in cards:
-        upsert_case_minimal(case_data_col, card, query_id)
+    if SEARCH_MODE == "windows":
+        cards_count = crawl_date_windows(case_query_col, case_data_col, defaults)
+    else:
+        cards_count = crawl_search_pages(case_query_col, case_data_col, defaults)
+    log(f"Processos identificados: {cards_count}")
 
     # Contagem de novos vs existentes após etapa 1
     base_filter = {"status.pipelineStatus": "caseScraped"}
+    content_field = "caseContent.caseJson" if STF_FETCH_MODE == "api" else "caseContent.caseHtml"
     new_filter = {
         **base_filter,
         "$or": [
-            {"caseContent.caseHtml": {"$exists": False}},
-            {"caseContent.caseHtml": ""},
+            {content_field: {"$exists": False}},
+            {content_field: ""},
         ],
     }
     existing_filter = {
         **base_filter,
-        "caseContent.caseHtml": {"$exists": True, "$ne": ""},
+        content_field: {"$exists": True, "$ne": ""},
     }
 
     total_case_scraped = case_data_col.count_documents(base_filter)
@@ -742,10 +1444,50 @@ def main() -> int:
     print(f"INICIANDO PROCESSAMENTO DE {total} PROCESSOS")
     print("-------------------------------------")
 
+    # Navegadores quentes reaproveitados entre processos (evita lançar um Chromium por URL)
+    if CASE_FETCH_ROUTE == "requests" or STF_FETCH_MODE == "api":
+        pool = None
+    elif CASE_FETCH_ROUTE == "auto":
+        pool = BrowserPool.from_env()  # iniciado sob demanda no primeiro fallback
+    else:
+        pool = BrowserPool.from_env().start()
+    try:
+        if CASE_PIPELINE_MODE == "pipelined" and STF_FETCH_MODE != "api" and not confirm_each:
+            _process_docs_pipelined(case_data_col, docs, pool=pool)
+        else:
+            if CASE_PIPELINE_MODE == "pipelined":
+                log("CASE_PIPELINE_MODE=pipelined não se aplica (modo api ou confirmação item a item); seguindo em série")
+            _process_docs(case_data_col, docs, confirm_each=confirm_each, pool=pool)
+    finally:
+        if CASE_FETCH_ROUTE == "auto" and STF_FETCH_MODE != "api":
+            log(f"Roteamento requests/Playwright: {FETCH_ROUTER.summary()}")
+            FETCH_ROUTER.save(force=True)
+        if pool is not None:
+            log(f"BrowserPool stats: {pool.stats().as_dict()}")
+            log(f"Prontidão de páginas: {READINESS_LOG.summary()}")
+            log(f"Filtro de requisições: {REQUEST_FILTER_LOG.summary()}")
+            pool.close()
+
+    if HTTP_CACHE.enabled:
+        log(f"HTTP cache: {HTTP_CACHE.stats().summary()}")
+    for host, st in rate_limit_stats().items():
+        log(f"Controle de taxa {host}: {st}")
+    save_rate_state()
+    log("Processamento finalizado")
+    return 0
+
+
+def _process_docs(
+    case_data_col: Collection,
+    docs: List[Dict[str, Any]],
+    *,
+    confirm_each: bool,
+    pool: Optional[BrowserPool],
+) -> None:
+    total = len(docs)
     for i, doc in enumerate(docs, start=1):
         case_stf_id = doc.get("caseStfId")
         case_title = (doc.get("caseIdentification") or {}).get("caseTitle", "N/A")
-        case_url = (doc.get("caseIdentification") or {}).get("caseUrl")
 
         if confirm_each:
             cont = input(f"Processar este processo? (s/n) _id={doc.get('_id')}: ").strip().lower()
@@ -756,85 +1498,299 @@ def main() -> int:
         print(f"Processo: {case_title}")
 
         try:
-            # Etapa 2: fetch HTML
-            if not case_url:
-                raise ValueError("caseUrl ausente")
-
-            html = get_case_html(case_url)
-            html_size = calculate_size_kb(html)
-            print(f"Obter HTML da decisão:          OK")
-            print(f"Tamanho html:                   {html_size} kb")
-
-            sanitized = sanitize_html_keep_formatting(html)
-            sanitized_size = calculate_size_kb(sanitized)
-            print(f"Sanitizar HTML:                 OK")
-            print(f"Tamanho html sanitizado:        {sanitized_size} kb")
-
-            md_text = convert_to_markdown(sanitized)
-            md_size = calculate_size_kb(md_text)
-            print(f"Converter para Markdown:        OK")
-            print(f"Tamanho markdown:               {md_size} kb")
-
-            case_data_col.update_one(
-                {"_id": doc["_id"]},
-                {"$set": {
-                    "caseContent.caseHtml": html,
-                    "caseContent.caseHtmlClean": sanitized,
-                    "caseContent.caseMarkdown": md_text,
-                    "status.pipelineStatus": "htmlFetched",
-                    "processing.pipelineStatus": "htmlFetched",
-                    "processing.caseHtmlScrapedAt": utc_now(),
-                    "processing.lastUpdatedAt": utc_now(),
-                }},
-            )
-
-            # Etapa 3: parse markdown
-            sections = parse_sections(md_text)
-            raw_data, case_data = build_raw_and_case_data(sections)
-
-            update_fields: Dict[str, Any] = {
-                "processing.caseContentMinedAt": utc_now(),
-                "processing.lastUpdatedAt": utc_now(),
-                "status.pipelineStatus": "enriched",
-                "processing.pipelineStatus": "enriched",
-            }
-            if raw_data:
-                update_fields["rawData"] = raw_data
-            if case_data:
-                update_fields["caseData"] = case_data
-
-            case_data_col.update_one({"_id": doc["_id"]}, {"$set": update_fields})
-
-            # Process Markdown sections
-            process_case_markdown(case_data_col, doc)
+            if STF_FETCH_MODE == "api":
+                _process_doc_api(case_data_col, doc)
+            else:
+                _process_doc_html(case_data_col, doc, pool=pool)
 
             print("PROCESSAMENTO ITEM FINALIZADO")
 
         except Exception as e:
             err_msg = str(e)
             print(f"Erro no processamento: {err_msg}")
-            case_data_col.update_one(
-                {"_id": doc["_id"]},
-                {"$set": {
-                    "processing.lastUpdatedAt": utc_now(),
-                    "processing.pipelineStatus": "error",
-                    "status.pipelineStatus": "error",
-                    "processing.errors": [err_msg],
-                }},
-            )
+            _mark_doc_error(case_data_col, doc, err_msg)
 
         if confirm_each:
             cont = input("Processar próximo item? (s/n): ").strip().lower()
             if cont != "s":
                 break
 
-    log("Processamento finalizado")
-    return 0
+
+def _mark_doc_error(case_data_col: Collection, doc: Dict[str, Any], err_msg: str) -> None:
+    case_data_col.update_one(
+        {"_id": doc["_id"]},
+        {"$set": {
+            "processing.lastUpdatedAt": utc_now(),
+            "processing.pipelineStatus": "error",
+            "status.pipelineStatus": "error",
+            "processing.errors": [err_msg],
+        }},
+    )
+
+
+def _process_docs_pipelined(
+    case_data_col: Collection,
+    docs: List[Dict[str, Any]],
+    *,
+    pool: Optional[BrowserPool],
+) -> None:
+    """
+    Etapas 2-4 em estágios: fetch (I/O) -> parse_case_html num ProcessPoolExecutor
+    (CPU, um processo por núcleo) -> gravação no Mongo numa thread própria.
+
+    Os fetchers entregam cada caso já submetido ao parse na fila `pending`
+    (limitada a CASE_QUEUE_SIZE); o writer consome na ordem de entrada e espera
+    o parse de cada item. Com o parse ou o Mongo atrasados a fila enche e os
+    fetchers bloqueiam no put, limitando HTML em memória e processos em espera.
+
+    Os fetches rodam em CASE_FETCH_WORKERS threads. O Playwright síncrono é
+    preso à thread que iniciou o pool: com BrowserPool, só o fallback
+    Playwright é serializado, via fila `browser_jobs` atendida pela thread
+    principal; o caminho requests segue em paralelo.
+    """
+    total = len(docs)
+    pending: "queue.Queue[Optional[Tuple[int, Dict[str, Any], Dict[str, Any], Optional[Future], Optional[str]]]]" = queue.Queue(
+        maxsize=CASE_QUEUE_SIZE
+    )
+    counts = {"ok": 0, "error": 0}
+    browser_jobs: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+
+    def _writer() -> None:
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            i, doc, fetched, parse_future, err_msg = item
+            try:
+                if err_msg is not None:
+                    raise RuntimeError(err_msg)
+                parsed = parse_future.result()
+                fields = _html_fields(fetched, parsed)
+                fields.update(_enriched_fields(parsed))
+                case_data_col.update_one({"_id": doc["_id"]}, {"$set": fields})
+                counts["ok"] += 1
+                log(f"Item {i}/{total}: {doc.get('caseStfId')} OK ({fetched['route']}, {calculate_size_kb(fetched['html'])} kb)")
+            except Exception as e:
+                counts["error"] += 1
+                log(f"Item {i}/{total}: {doc.get('caseStfId')} erro: {e}")
+                try:
+                    _mark_doc_error(case_data_col, doc, str(e))
+                except Exception as mark_exc:
+                    # O writer não pode morrer: os fetchers ficariam presos no put da fila cheia
+                    log(f"Item {i}/{total}: {doc.get('caseStfId')} falha ao gravar o erro: {mark_exc}")
+
+    def _playwright_on_main_thread(url: str) -> Dict[str, Any]:
+        job: Future = Future()
+        browser_jobs.put((url, job))
+        return job.result()
+
+    playwright_fetch = _playwright_on_main_thread if pool is not None else None
+
+    def _feed(i: int, doc: Dict[str, Any], parse_pool: ProcessPoolExecutor) -> None:
+        fetched: Dict[str, Any] = {}
+        parse_future: Optional[Future] = None
+        err_msg: Optional[str] = None
+        try:
+            fetched = _fetch_doc_html(doc, pool=pool, playwright_fetch=playwright_fetch)
+            parse_future = parse_pool.submit(parse_case_html, fetched["html"], CASE_MARKDOWN)
+        except Exception as e:
+            err_msg = str(e)
+        pending.put((i, doc, fetched, parse_future, err_msg))  # bloqueia com a fila cheia
+
+    def _serve_browser_jobs(feeds: List[Future]) -> None:
+        """Atende os fallbacks Playwright na thread principal até todos os fetchers terminarem."""
+        remaining = [len(feeds)]
+        lock = threading.Lock()
+
+        def _done(_fut: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+
+        for fut in feeds:
+            fut.add_done_callback(_done)
+        while True:
+            try:
+                url, job = browser_jobs.get(timeout=0.2)
+            except queue.Empty:
+                with lock:
+                    if remaining[0] == 0:
+                        return
+                continue
+            if not job.set_running_or_notify_cancel():
+                continue
+            try:
+                job.set_result(fetch_case_page_playwright(url, pool=pool))
+            except Exception as e:
+                job.set_exception(e)
+
+    log(
+        f"Pipeline: fetch={CASE_FETCH_WORKERS} parse={CASE_PARSE_WORKERS} fila={CASE_QUEUE_SIZE}"
+        + (" | Playwright serializado na thread principal" if pool is not None else "")
+    )
+    t0 = time.monotonic()
+    writer = threading.Thread(target=_writer, name="case-writer", daemon=True)
+    writer.start()
+    try:
+        # spawn: processos limpos, sem herdar as threads (Playwright, HTTP, writer) via fork
+        with ProcessPoolExecutor(max_workers=CASE_PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")) as parse_pool:
+            with ThreadPoolExecutor(max_workers=CASE_FETCH_WORKERS) as fetchers:
+                feeds = [fetchers.submit(_feed, i, doc, parse_pool) for i, doc in enumerate(docs, start=1)]
+                if pool is not None:
+                    _serve_browser_jobs(feeds)
+                for fut in feeds:
+                    fut.result()
+    finally:
+        pending.put(None)
+        writer.join()
+
+    elapsed = time.monotonic() - t0
+    log(
+        f"Pipeline concluído: ok={counts['ok']} erros={counts['error']} em {elapsed:.1f}s "
+        f"({total / elapsed if elapsed else 0.0:.2f} processos/s)"
+    )
+
+
+def parse_case_html(html: str, markdown_mode: str = "lazy") -> Dict[str, Any]:
+    """
+    Parte CPU das etapas 3-4 (sanitizar, Markdown opcional, seções direto do DOM).
+    Função de módulo e só com tipos simples na entrada/saída, para rodar nos
+    processos do _process_docs_pipelined.
+    """
+    sanitized = sanitize_html_keep_formatting(html)
+    sections = parse_dom_sections(sanitized)
+    raw_data, case_data = build_raw_and_case_data(sections)
+    return {
+        "sanitized": sanitized,
+        "markdown": convert_to_markdown(sanitized) if markdown_mode == "eager" else None,
+        "rawData": raw_data,
+        "caseData": case_data,
+        "caseContent": map_case_content(sections),
+    }
+
+
+def _fetch_doc_html(
+    doc: Dict[str, Any],
+    *,
+    pool: Optional[BrowserPool],
+    playwright_fetch: Optional[Callable[[str], Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    case_url = (doc.get("caseIdentification") or {}).get("caseUrl")
+    if not case_url:
+        raise ValueError("caseUrl ausente")
+
+    return get_case_page_routed(case_url, pool=pool, playwright_fetch=playwright_fetch)
+
+
+def _html_fields(fetched: Dict[str, Any], parsed: Dict[str, Any]) -> Dict[str, Any]:
+    ready = fetched["ready"]
+    filter_stats = fetched["filterStats"]
+    fields: Dict[str, Any] = {
+        "caseContent.caseHtml": fetched["html"],
+        "caseContent.caseHtmlClean": parsed["sanitized"],
+        "status.pipelineStatus": "htmlFetched",
+        "processing.pipelineStatus": "htmlFetched",
+        "processing.caseHtmlScrapedAt": utc_now(),
+        "processing.caseHtmlFetchRoute": fetched["route"],
+        "processing.caseHtmlReadiness": ready.as_dict() if ready is not None else None,
+        "processing.caseHtmlRequestFilter": filter_stats.as_dict() if filter_stats is not None else None,
+        "processing.lastUpdatedAt": utc_now(),
+    }
+    if parsed["markdown"] is not None:
+        fields["caseContent.caseMarkdown"] = parsed["markdown"]
+    return fields
+
+
+def _enriched_fields(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    fields: Dict[str, Any] = {
+        "processing.caseContentMinedAt": utc_now(),
+        "processing.lastUpdatedAt": utc_now(),
+        "status.pipelineStatus": "enriched",
+        "processing.pipelineStatus": "enriched",
+    }
+    fields.update(_parsed_data_fields(parsed))
+    fields.update(parsed["caseContent"])
+    return fields
+
+
+def _parsed_data_fields(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    rawData.<k>/caseData.<k> (dot-notation) só para as chaves que o parser produziu.
+    caseData também recebe campos das etapas de LLM (caseNotes, caseNotesInfo,
+    caseDoctrineReferences, caseLegislationReferences), que um $set do objeto inteiro apagaria.
+    """
+    fields: Dict[str, Any] = {}
+    for root in ("rawData", "caseData"):
+        for key, value in (parsed[root] or {}).items():
+            fields[f"{root}.{key}"] = value
+    return fields
+
+
+def _process_doc_html(case_data_col: Collection, doc: Dict[str, Any], *, pool: Optional[BrowserPool]) -> None:
+    # Etapa 2: fetch HTML
+    fetched = _fetch_doc_html(doc, pool=pool)
+    html, route = fetched["html"], fetched["route"]
+    ready, filter_stats = fetched["ready"], fetched["filterStats"]
+    html_size = calculate_size_kb(html)
+    print(f"Obter HTML da decisão:          OK ({route})")
+    print(f"Tamanho html:                   {html_size} kb")
+    if ready is not None:
+        print(f"Espera de prontidão:            {ready.waited_ms} ms ({ready.reason})")
+    if filter_stats is not None:
+        print(f"Requisições bloqueadas:         {filter_stats.blocked} (~{filter_stats.estimated_bytes_saved // 1024} kb)")
+
+    # Etapas 3-4: sanitizar + seções direto do DOM (uma passada alimenta rawData/caseData e caseContent.*)
+    parsed = parse_case_html(html, CASE_MARKDOWN)
+    print(f"Sanitizar HTML:                 OK")
+    print(f"Tamanho html sanitizado:        {calculate_size_kb(parsed['sanitized'])} kb")
+    if parsed["markdown"] is not None:
+        print(f"Converter para Markdown:        OK")
+        print(f"Tamanho markdown:               {calculate_size_kb(parsed['markdown'])} kb")
+
+    fields = _html_fields(fetched, parsed)
+    fields.update(_enriched_fields(parsed))
+    case_data_col.update_one({"_id": doc["_id"]}, {"$set": fields})
+
+
+def _process_doc_api(case_data_col: Collection, doc: Dict[str, Any]) -> None:
+    """
+    Modo api: seções lidas do JSON do backend (sem navegador, sem sanitização/Markdown do HTML).
+    O caseMarkdown é montado a partir das seções para manter compatibilidade com as etapas seguintes.
+    """
+    if stf_api.api_mode_problems() and not stf_api.STF_API_ALLOW_UNVERIFIED:
+        raise RuntimeError("modo api não verificado (ver k_stf_api_fetch.api_mode_problems)")
+    case_stf_id = doc.get("caseStfId")
+    if not case_stf_id:
+        raise ValueError("caseStfId ausente")
+
+    sections, json_case = stf_api.case_sections(case_stf_id)
+    if not sections:
+        raise ValueError("JSON do processo sem seções mapeáveis")
+    md_text = stf_api.sections_to_markdown(sections)
+    print(f"Obter JSON da decisão:          OK ({len(sections)} seções)")
+
+    raw_data, case_data = build_raw_and_case_data(sections)
+    update_fields: Dict[str, Any] = {
+        "caseContent.caseJson": json_case,
+        "caseContent.caseMarkdown": md_text,
+        "processing.caseHtmlScrapedAt": utc_now(),
+        "processing.caseContentMinedAt": utc_now(),
+        "processing.lastUpdatedAt": utc_now(),
+        "processing.fetchMode": "api",
+        "status.pipelineStatus": "enriched",
+        "processing.pipelineStatus": "enriched",
+    }
+    if stf_api.api_mode_problems():
+        # Permite localizar e refazer depois os docs gravados sem o mapeamento verificado
+        update_fields["processing.fetchModeUnverified"] = True
+    update_fields.update(_parsed_data_fields({"rawData": raw_data, "caseData": case_data}))
+    update_fields.update(map_case_content(sections))
+
+    case_data_col.update_one({"_id": doc["_id"]}, {"$set": update_fields})
 
 
 def process_case_markdown(case_data_col: Collection, doc: Dict[str, Any]) -> None:
     case_id = doc.get("_id")
-    markdown_content = (doc.get("caseContent") or {}).get("caseMarkdown")
+    markdown_content = case_markdown(case_data_col, doc)
 
     if not markdown_content:
         log(f"IGNORADO: {case_id} (caseMarkdown vazio)")
@@ -7,6 +7,15 @@ Processa por processo:
 - Extrai citações de acórdãos, decisões monocráticas, legislações estrangeiras, etc.
 - Filtro inicial: status.pipelineStatus == "legislationExtracted"
 
+As notas são extraídas pelo parser determinístico (a_case_notes_parser.py);
+a LLM só recebe as linhas que a gramática rejeita (com o cabeçalho e os
+descritores vigentes), e o delay entre documentos só vale quando ela foi
+chamada. A cobertura do parser é exibida no resumo.
+
+Env vars:
+  NOTES_LLM_FALLBACK=true|false  (default true; false grava só o resultado do parser
+                                  e as linhas rejeitadas em processing.caseNotesRejectedLines)
+
 Dependências:
   pip install pymongo groq
 """
@@ -18,12 +27,14 @@ import os
 import re
 import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from groq import Groq
 from pymongo import MongoClient
 from pymongo.collection import Collection
 
+from a_case_notes_parser import NOTES_COVERAGE, TREATY_WORDS, parse_notes
+
 
 # =========================
 # Config
@@ -38,7 +49,8 @@ GROQ_API_KEY = "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"
 GROQ_MODEL = "llama-3.1-8b-instant"
 REQUEST_TIMEOUT = int(os.getenv("GROQ_TIMEOUT", "60"))
 RETRIES = int(os.getenv("GROQ_RETRIES", "3"))
-API_DELAY_SECONDS = 20  # Delay configurável entre processamentos
+API_DELAY_SECONDS = 20  # Delay configurável entre processamentos (só após chamadas à LLM)
+NOTES_LLM_FALLBACK = os.getenv("NOTES_LLM_FALLBACK", "true").strip().lower() in ("1", "true", "yes", "y", "on", "sim", "s")
 
 
 # =========================
@@ -181,8 +193,7 @@ def normalize_notes_refs(data: Dict[str, Any]) -> List[Dict[str, Any]]:
             raw_ref = item.get("rawRef", "")
             item_type = item.get("itemType", "")
             
-            if isinstance(raw_ref, str) and any(word in raw_ref for word in 
-                                               ["Carta", "Recomendação", "Plano", "ONU", "CNJ"]):
+            if isinstance(raw_ref, str) and any(word in raw_ref for word in TREATY_WORDS):
                 item_type = "treaty_or_recommendation"
             
             normalized_item = {
@@ -240,8 +251,8 @@ def choose_mode() -> bool:
             print("Opção inválida. Digite 1 ou 2.")
 
 
-def process_notes(col: Collection, doc: Dict[str, Any]) -> int:
-    """Processa as notas de um documento"""
+def process_notes(col: Collection, doc: Dict[str, Any]) -> Tuple[int, bool]:
+    """Processa as notas de um documento. Retorna (citações extraídas, se chamou a LLM)."""
     doc_id = doc.get("_id")
     case_stf_id = doc.get("caseStfId", "N/A")
     
@@ -259,18 +270,32 @@ def process_notes(col: Collection, doc: Dict[str, Any]) -> int:
                 "status.pipelineStatus": "notesExtracted",
             }},
         )
-        return 0
-    
-    # Preparar prompt para API
-    user_prompt = USER_PROMPT_NOTES.format(notes_text=notes_content)
+        return 0, False
     
     try:
-        # Chamar API Groq
-        raw_response = groq_chat(SYSTEM_PROMPT_NOTES, user_prompt)
-        
-        # Validar e parsear JSON
-        parsed = _extract_json(raw_response)
-        notes_refs = normalize_notes_refs(parsed)
+        # Parser determinístico; a LLM só vê as linhas rejeitadas pela gramática
+        parsed = parse_notes(notes_content)
+        NOTES_COVERAGE.add(parsed)
+        notes_refs = list(parsed.notes)
+        method = "rules"
+        status = "done"
+        error: Optional[str] = None
+        used_llm = False
+
+        if parsed.rejected and NOTES_LLM_FALLBACK:
+            used_llm = True
+            NOTES_COVERAGE.fallback_docs += 1
+            user_prompt = USER_PROMPT_NOTES.format(notes_text="\n\n".join(r.context() for r in parsed.rejected))
+            try:
+                raw_response = groq_chat(SYSTEM_PROMPT_NOTES, user_prompt)
+                notes_refs.extend(normalize_notes_refs(_extract_json(raw_response)))
+                method = "rules+llm"
+            except Exception as e:
+                # mantém o que o parser extraiu; as linhas rejeitadas ficam registradas
+                NOTES_COVERAGE.fallback_errors += 1
+                status = "partial"
+                error = f"fallback LLM: {e}"
+                log(f"AVISO: fallback LLM falhou para {case_stf_id} - {e}")
         
         # Contar total de citações
         total_citations = sum(len(note.get("items", [])) for note in notes_refs)
@@ -279,17 +304,21 @@ def process_notes(col: Collection, doc: Dict[str, Any]) -> int:
         update_data = {
             "caseData.caseNotes": notes_refs,
             "processing.caseNotesExtractedAt": utc_now(),
-            "processing.caseNotesExtractedStatus": "done",
-            "processing.caseNotesExtractedError": None,
+            "processing.caseNotesExtractedStatus": status,
+            "processing.caseNotesExtractedError": error,
+            "processing.caseNotesExtractedMethod": method,
+            "processing.caseNotesRejectedLines": [r.line for r in parsed.rejected],
             "status.pipelineStatus": "notesExtracted",
         }
+        if parsed.info:
+            update_data["caseData.caseNotesInfo"] = parsed.info
         
         col.update_one(
             {"_id": doc_id},
             {"$set": update_data},
         )
         
-        return total_citations
+        return total_citations, used_llm
         
     except Exception as e:
         log(f"ERRO ao processar notas: {case_stf_id} - {e}")
@@ -302,7 +331,7 @@ def process_notes(col: Collection, doc: Dict[str, Any]) -> int:
                 "status.pipelineStatus": "error",
             }},
         )
-        return 0
+        return 0, False
 
 
 def display_document_info(doc: Dict[str, Any]) -> None:
@@ -320,11 +349,12 @@ def display_document_info(doc: Dict[str, Any]) -> None:
 
 def main() -> int:
     """Função principal"""
-    try:
-        require_api_key()
-    except Exception as e:
-        print(f"ERRO: {e}")
-        return 1
+    if NOTES_LLM_FALLBACK:
+        try:
+            require_api_key()
+        except Exception as e:
+            print(f"ERRO: {e}")
+            return 1
     
     # Conectar ao MongoDB
     col = get_collection()
@@ -377,7 +407,7 @@ def main() -> int:
         
         # Processar notas do documento
         try:
-            citations_count = process_notes(col, doc)
+            citations_count, used_llm = process_notes(col, doc)
             total_citations += citations_count
             total_processed += 1
             
@@ -385,8 +415,8 @@ def main() -> int:
             print(f"   Total de citações extraídas: {citations_count}.")
             print(f"   Processamento do item {case_stf_id} finalizado com sucesso.")
             
-            # Aplicar delay entre processamentos (exceto no último)
-            if i < len(docs) and not confirm_each:
+            # Aplicar delay entre chamadas à LLM (exceto no último)
+            if used_llm and i < len(docs) and not confirm_each:
                 print(f"\nAguardando {API_DELAY_SECONDS} segundos antes do próximo...")
                 time.sleep(API_DELAY_SECONDS)
                 
@@ -400,6 +430,7 @@ def main() -> int:
     print("="*60)
     print(f"Total de documentos processados: {total_processed}")
     print(f"Total de citações extraídas: {total_citations}")
+    print(f"Cobertura do parser: {NOTES_COVERAGE.summary()}")
     print(f"Status final: {'COMPLETO' if total_processed > 0 else 'NENHUM PROCESSADO'}")
     print("="*60)
     
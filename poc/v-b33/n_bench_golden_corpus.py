@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+n_bench_golden_corpus.py
+
+Benchmark dos parsers sobre um corpus fixo (golden corpus) versionado em
+bench/corpus: páginas de busca (case_query.htmlRaw) e páginas de processo
+(caseContent.caseHtml), anonimizadas e gravadas em .html.gz.
+
+Páginas de processo "rebuilt_*" são remontadas (comando rebuild) a partir de
+uma página de busca capturada: o shell do SPA da própria página (~245 kb de
+estilos, scripts e cabeçalho) com o conteúdo de um card no layout da página
+do processo (cabeçalho do card + trechos de destaque por seção). Dão ao corpus
+o tamanho e a marcação de páginas reais (150-900 kb) enquanto não há snapshot
+do Mongo; o texto das seções são trechos reais, não o documento completo.
+
+Para cada etapa mede vazão (docs/s e MB/s), latência p50/p99 por documento e
+pico de memória (heap Python via tracemalloc; buffers C do lxml não entram):
+- extract_cards                  (k_unified, páginas de busca)
+- extract_decisions              (STFListExtractor de v-a33 c_extract_data, páginas de busca)
+- sanitize_html_keep_formatting  (k_unified, páginas de processo)
+- convert_to_markdown            (k_unified, HTML sanitizado)
+- parse_sections                 (a_md_sections, Markdown)
+- parse_dom_sections             (a_dom_sections, HTML sanitizado)
+- extract_all_fields             (v-a33 g_process_case_html_sanitized, páginas de processo; o
+                                  sanitizador do k_unified desembrulha os div.jud-text que ele lê)
+
+A saída de cada etapa por documento é comparada com o digest gravado em
+bench/golden.json: um ganho de tempo que mude resultado, um documento sem
+golden ou uma saída vazia falham a execução (exit 2). Os tempos são
+comparados com bench/baseline.json (só relatório; tempo é ruidoso demais
+para reprovar).
+
+Uso:
+    python n_bench_golden_corpus.py [run] [--repeat N]   # mede, confere golden, compara com baseline
+    python n_bench_golden_corpus.py save-baseline [--repeat N]
+    python n_bench_golden_corpus.py update-golden        # após mudança intencional de saída
+    python n_bench_golden_corpus.py snapshot [N]         # N páginas de busca + N processos do Mongo
+    python n_bench_golden_corpus.py import search|case arquivo.html [...]
+    python n_bench_golden_corpus.py rebuild busca.html [N]   # N processos remontados de uma página de busca
+
+Dependências:
+  as mesmas do k_unified_case_pipeline.py e de v-a33 (c_extract_data, g_process_case_html_sanitized)
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+# Scripts de v-a33 (extract_decisions, extract_all_fields); os a_* compartilhados
+# resolvem primeiro para os desta pasta, que são iguais ou superconjunto.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "v-a33-240125"))
+
+from bson import ObjectId
+
+import k_unified_case_pipeline as pipeline
+from a_dom_sections import parse_dom_sections
+from a_md_sections import parse_sections
+from c_extract_data import STFListExtractor
+from g_process_case_html_sanitized import extract_all_fields
+
+
+BENCH_DIR = Path(__file__).resolve().parent / "bench"
+CORPUS_DIR = BENCH_DIR / "corpus"
+GOLDEN_PATH = BENCH_DIR / "golden.json"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+DEFAULT_REPEAT = 5
+
+# sourceRawHtmlId fixo para que a saída de extract_decisions seja reprodutível
+_BENCH_RAW_ID = ObjectId("0" * 24)
+
+# Linhas de partes ("REQTE.(S) : NOME", "ADV.(A/S) : NOME (12345/SP)"): o nome vira um pseudônimo estável
+_PARTY_RE = re.compile(r"(\b[A-Z][A-Z. ]*\.?\((?:S|A/S|AS|ES|O/A)\)\s*:\s*)([^<\n]+)")
+_CPF_RE = re.compile(r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b")
+_EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+
+
+def log(msg: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}")
+
+
+# =========================
+# Corpus
+# =========================
+
+def anonymize_html(html: str) -> str:
+    """Troca nomes de partes/advogados por pseudônimos estáveis no documento e mascara CPF/e-mail."""
+    names: Dict[str, str] = {}
+
+    def _party(m: "re.Match[str]") -> str:
+        name = m.group(2).strip()
+        alias = names.setdefault(name, f"PARTE {len(names) + 1:04d}")
+        return f"{m.group(1)}{alias}"
+
+    html = _PARTY_RE.sub(_party, html)
+    html = _CPF_RE.sub("000.000.000-00", html)
+    return _EMAIL_RE.sub("anon@example.org", html)
+
+
+def add_to_corpus(kind: str, name: str, html: str) -> Path:
+    path = CORPUS_DIR / kind / f"{name}.html.gz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0: o .gz só muda quando o conteúdo muda
+    path.write_bytes(gzip.compress(anonymize_html(html).encode("utf-8"), compresslevel=9, mtime=0))
+    return path
+
+
+def load_corpus(kind: str) -> List[Tuple[str, str]]:
+    return [
+        (p.name[: -len(".html.gz")], gzip.decompress(p.read_bytes()).decode("utf-8"))
+        for p in sorted((CORPUS_DIR / kind).glob("*.html.gz"))
+    ]
+
+
+# Ordem das seções na página do processo (títulos dos <h4> de destaque dos cards)
+_CASE_SECTION_ORDER = (
+    "Publicação", "Partes", "Ementa", "Tese", "Decisão", "Indexação",
+    "Legislação", "Observação", "Acórdãos no mesmo sentido", "Doutrina",
+)
+
+
+def rebuild_case_pages(search_html: str, limit: int) -> List[Tuple[str, str]]:
+    """
+    Remonta páginas de processo a partir de uma página de busca: o shell do SPA
+    sem os cards + o conteúdo de um card no layout da página do processo
+    (div.jud-text com os <h4> do cabeçalho e um div.jud-text > h4 + div.text-pre-wrap
+    por seção). Usa os `limit` cards com mais texto de seção; retorna (nome, html).
+    """
+    soup = BeautifulSoup(search_html, "html.parser")
+    cards = soup.select("div.result-container")
+    if not cards:
+        return []
+    holder = cards[0].parent
+    for card in cards:
+        card.extract()
+
+    def _sections(card: Any) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        for h4 in card.select("h4[id]"):
+            title = h4.get_text(" ", strip=True)
+            body = h4.find_next_sibling()
+            if title in _CASE_SECTION_ORDER and body is not None and title not in out:
+                out[title] = body.get_text().strip()
+        return out
+
+    ranked = sorted(cards, key=lambda c: -sum(len(t) for t in _sections(c).values()))
+    pages: List[Tuple[str, str]] = []
+    for card in ranked[:limit]:
+        link = card.select_one('a[href^="/pages/search/"]')
+        title = card.select_one("h4.ng-star-inserted")
+        header = card.select_one("#result-principal-header")
+        if link is None or title is None or header is None:
+            continue
+        stf_id = [p for p in link["href"].split("/") if p][2]
+        sections = _sections(card)
+        body = BeautifulSoup("", "html.parser")
+        content = body.new_tag("div", attrs={"class": "mat-tab-body-wrapper"})
+        head = body.new_tag("div", attrs={"class": "jud-text"})
+        h4 = body.new_tag("h4")
+        h4.string = title.get_text(" ", strip=True)
+        head.append(h4)
+        for label in header.select("h4"):
+            h4 = body.new_tag("h4")
+            h4.string = label.get_text(" ", strip=True)
+            head.append(h4)
+        content.append(head)
+        for section in _CASE_SECTION_ORDER:
+            if section not in sections:
+                continue
+            block = body.new_tag("div", attrs={"class": "jud-text"})
+            h4 = body.new_tag("h4")
+            h4.string = section
+            text = body.new_tag("div", attrs={"class": "text-pre-wrap"})
+            text.string = sections[section]
+            block.append(h4)
+            block.append(text)
+            content.append(block)
+        holder.append(content)
+        pages.append((f"rebuilt_{stf_id}", str(soup)))
+        content.extract()
+    return pages
+
+
+def snapshot_from_mongo(limit: int) -> int:
+    """Copia as `limit` páginas de busca e processos mais recentes do Mongo para o corpus."""
+    case_query_col, case_data_col = pipeline.get_collections()
+    added = 0
+    for d in case_query_col.find(
+        {"htmlRaw": {"$nin": [None, ""]}},
+        projection={"htmlRaw": 1},
+        sort=[("extractionTimestamp", -1)],
+        limit=limit,
+    ):
+        add_to_corpus("search", f"search_{d['_id']}", d["htmlRaw"])
+        added += 1
+    for d in case_data_col.find(
+        {"caseContent.caseHtml": {"$nin": [None, ""]}},
+        projection={"caseContent.caseHtml": 1},
+        sort=[("_id", -1)],
+        limit=limit,
+    ):
+        add_to_corpus("case", f"case_{d['_id']}", d["caseContent"]["caseHtml"])
+        added += 1
+    log(f"Corpus: {added} documentos gravados em {CORPUS_DIR}")
+    return 0
+
+
+# =========================
+# Etapas
+# =========================
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[str], Any], inputs: List[Tuple[str, str]]):
+        self.name = name
+        self.fn = fn
+        self.inputs = inputs
+
+
+def build_stages() -> List[Stage]:
+    search = load_corpus("search")
+    cases = load_corpus("case")
+    # Entradas das etapas seguintes saem das anteriores (conferidas pelo golden da etapa que as gera)
+    sanitized = [(name, pipeline.sanitize_html_keep_formatting(html)) for name, html in cases]
+    markdown = [(name, pipeline.convert_to_markdown(html)) for name, html in sanitized]
+    extractor = STFListExtractor()
+    return [
+        Stage("extract_cards", pipeline.extract_cards, search),
+        Stage("extract_decisions", lambda html: extractor.extract_decisions(html, _BENCH_RAW_ID), search),
+        Stage("sanitize_html_keep_formatting", pipeline.sanitize_html_keep_formatting, cases),
+        Stage("convert_to_markdown", pipeline.convert_to_markdown, sanitized),
+        Stage("parse_sections", parse_sections, markdown),
+        Stage("parse_dom_sections", parse_dom_sections, sanitized),
+        # Entrada do g_process é o caseHtmlSanitized, que mantém os div.jud-text;
+        # a saída do sanitize_html_keep_formatting os desembrulha (extract_all_fields -> {})
+        Stage("extract_all_fields", extract_all_fields, cases),
+    ]
+
+
+def output_digest(out: Any) -> str:
+    blob = json.dumps(out, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+_EMPTY_DIGESTS = frozenset(output_digest(v) for v in ({}, [], "", None))
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def measure(stage: Stage, repeat: int) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Métricas da etapa e digest da saída por documento."""
+    digests = {name: output_digest(stage.fn(html)) for name, html in stage.inputs}  # também aquece
+
+    latencies: List[float] = []
+    for _ in range(repeat):
+        for _name, html in stage.inputs:
+            start = time.perf_counter()
+            stage.fn(html)
+            latencies.append(time.perf_counter() - start)
+
+    # Pico de memória numa passada separada (tracemalloc deixa as chamadas mais lentas)
+    peak = 0
+    tracemalloc.start()
+    try:
+        for _name, html in stage.inputs:
+            tracemalloc.reset_peak()
+            stage.fn(html)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    total_s = sum(latencies)
+    total_mb = repeat * sum(len(html.encode("utf-8")) for _name, html in stage.inputs) / 1e6
+    metrics = {
+        "docs": len(stage.inputs),
+        "calls": len(latencies),
+        "docsPerSec": round(len(latencies) / total_s, 1) if total_s else 0.0,
+        "mbPerSec": round(total_mb / total_s, 2) if total_s else 0.0,
+        "p50Ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99Ms": round(_percentile(latencies, 99) * 1000, 3),
+        "peakMemKb": peak // 1024,
+    }
+    return metrics, digests
+
+
+# =========================
+# Golden / baseline
+# =========================
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _delta(now: float, before: Optional[float]) -> str:
+    if not before:
+        return "   n/a"
+    return f"{(now - before) / before * 100:+6.1f}%"
+
+
+def run(repeat: int, *, save_baseline: bool = False, update_golden: bool = False) -> int:
+    stages = build_stages()
+    if not any(stage.inputs for stage in stages):
+        log(f"Corpus vazio em {CORPUS_DIR} (use snapshot ou import)")
+        return 1
+
+    golden = _read_json(GOLDEN_PATH)
+    baseline = _read_json(BASELINE_PATH).get("stages", {})
+    results: Dict[str, Dict[str, Any]] = {}
+    new_golden: Dict[str, Dict[str, str]] = {}
+    mismatches: List[str] = []
+    missing: List[str] = []
+    empty: List[str] = []
+
+    print(f"{'etapa':<30} {'docs/s':>9} {'MB/s':>7} {'p50 ms':>9} {'p99 ms':>9} {'pico kb':>8}   Δp50    Δdocs/s")
+    for stage in stages:
+        if not stage.inputs:
+            continue
+        metrics, digests = measure(stage, repeat)
+        results[stage.name] = metrics
+        new_golden[stage.name] = digests
+
+        expected = golden.get(stage.name, {})
+        for name, digest in digests.items():
+            if name not in expected:
+                missing.append(f"{stage.name}:{name}")
+            elif expected[name] != digest:
+                mismatches.append(f"{stage.name}:{name}")
+            # Saída vazia não prova nada no golden (o digest de {} é sempre igual)
+            if digest in _EMPTY_DIGESTS:
+                empty.append(f"{stage.name}:{name}")
+
+        before = baseline.get(stage.name, {})
+        print(
+            f"{stage.name:<30} {metrics['docsPerSec']:>9} {metrics['mbPerSec']:>7} {metrics['p50Ms']:>9} "
+            f"{metrics['p99Ms']:>9} {metrics['peakMemKb']:>8}  {_delta(metrics['p50Ms'], before.get('p50Ms'))} "
+            f"{_delta(metrics['docsPerSec'], before.get('docsPerSec'))}"
+        )
+
+    if empty:
+        log(f"SAÍDA VAZIA: {empty}")
+    if update_golden:
+        if empty:
+            log("Golden não atualizado: há etapas sem saída")
+            return 2
+        _write_json(GOLDEN_PATH, new_golden)
+        log(f"Golden atualizado: {GOLDEN_PATH}")
+    else:
+        if mismatches:
+            log(f"SAÍDA DIFERENTE DO GOLDEN: {mismatches}")
+        if missing:
+            log(f"SEM GOLDEN (rode update-golden): {missing}")
+
+    if save_baseline:
+        _write_json(BASELINE_PATH, {
+            "savedAt": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "stages": results,
+        })
+        log(f"Baseline gravado: {BASELINE_PATH}")
+
+    if update_golden:
+        return 0
+    return 2 if mismatches or missing or empty else 0
+
+
+def main(argv: List[str]) -> int:
+    repeat = DEFAULT_REPEAT
+    if "--repeat" in argv:
+        i = argv.index("--repeat")
+        repeat = max(1, int(argv[i + 1]))
+        argv = argv[:i] + argv[i + 2:]
+
+    cmd = argv[0] if argv else "run"
+    if cmd == "run":
+        return run(repeat)
+    if cmd == "save-baseline":
+        return run(repeat, save_baseline=True)
+    if cmd == "update-golden":
+        return run(1, update_golden=True)
+    if cmd == "snapshot":
+        return snapshot_from_mongo(int(argv[1]) if len(argv) > 1 else 20)
+    if cmd == "import" and len(argv) > 2 and argv[1] in ("search", "case"):
+        for p in argv[2:]:
+            path = add_to_corpus(argv[1], Path(p).name.split(".")[0], Path(p).read_text(encoding="utf-8", errors="replace"))
+            log(f"Corpus: {path}")
+        return 0
+    if cmd == "rebuild" and len(argv) > 1:
+        limit = int(argv[2]) if len(argv) > 2 else 5
+        html = Path(argv[1]).read_text(encoding="utf-8", errors="replace")
+        for name, page in rebuild_case_pages(html, limit):
+            path = add_to_corpus("case", name, page)
+            log(f"Corpus: {path} ({len(page) // 1024} kb)")
+        return 0
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+a_page_readiness.py
+
+Prontidão de página baseada em seletores (Playwright, API síncrona), no lugar de
+wait_until="networkidle" + time.sleep fixo:
+- search: quantidade de div.result-container > 0 e estável por stable_ms, ou
+  o rótulo "0 resultado(s) para" / aviso de busca sem resultados (reason="empty")
+- case:   div.mat-tab-body-wrapper e div.jud-text presentes no DOM
+- Fallback por timeout: se a condição não for atingida, aguarda networkidle
+  (limitado) e segue com o HTML disponível
+- Registra o tempo de espera observado por página (READINESS_LOG)
+
+Uso:
+    page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+    result = wait_until_ready(page, "case", url=url)
+    html = page.content()
+
+Dependências:
+  pip install playwright
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
+
+
+# =========================
+# Condições por tipo de página
+# =========================
+
+@dataclass(frozen=True)
+class ReadinessCondition:
+    page_type: str
+    # Função JS avaliada em polling; recebe `arg` e retorna truthy quando pronta
+    js_predicate: str
+    arg: Any = None
+    timeout_ms: int = 30_000
+    polling_ms: int = 200
+    # Espera adicional por networkidle quando a condição estoura o timeout
+    fallback_networkidle_ms: int = 5_000
+
+
+# Contagem de cards estável: o Angular renderiza os resultados em lotes.
+# Sem cards, a página vazia legítima é reconhecida pelo rótulo de contagem
+# ("0 resultado(s) para: ...") ou pelo aviso de nenhum resultado.
+_JS_COUNT_STABLE = """
+([selector, stableMs, emptyPattern]) => {
+    const n = document.querySelectorAll(selector).length;
+    if (n === 0 && emptyPattern) {
+        const re = new RegExp(emptyPattern, "i");
+        for (const el of document.querySelectorAll("span.ng-star-inserted, p, h2, h3, mat-card-content")) {
+            if (re.test(el.textContent || "")) {
+                return "empty";
+            }
+        }
+    }
+    const now = performance.now();
+    const w = window.__citoReadiness || (window.__citoReadiness = { n: -1, since: now });
+    if (n !== w.n) {
+        w.n = n;
+        w.since = now;
+        return false;
+    }
+    return n > 0 && (now - w.since) >= stableMs;
+}
+"""
+
+_JS_ALL_PRESENT = """
+(selectors) => selectors.every((sel) => document.querySelector(sel) !== null)
+"""
+
+CONDITIONS: Dict[str, ReadinessCondition] = {
+    "search": ReadinessCondition(
+        page_type="search",
+        js_predicate=_JS_COUNT_STABLE,
+        arg=["div.result-container", 600, r"^\s*(?:0\s+resultado\(s\)\s+para\b|nenhum\s+resultado\s+encontrado)"],
+        timeout_ms=30_000,
+    ),
+    "case": ReadinessCondition(
+        page_type="case",
+        js_predicate=_JS_ALL_PRESENT,
+        arg=["div.mat-tab-body-wrapper", "div.jud-text"],
+        timeout_ms=30_000,
+    ),
+}
+
+
+# =========================
+# Registro de esperas
+# =========================
+
+@dataclass
+class ReadinessResult:
+    page_type: str
+    url: Optional[str]
+    ready: bool
+    # "selector" (condição atendida) | "empty" (busca sem resultados) | "timeout" (fallback aplicado)
+    reason: str
+    waited_ms: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "pageType": self.page_type,
+            "ready": self.ready,
+            "reason": self.reason,
+            "waitedMs": self.waited_ms,
+        }
+
+
+class ReadinessLog:
+    """Histórico em memória das esperas observadas (para logs/métricas do run)."""
+
+    def __init__(self, max_items: int = 10_000) -> None:
+        self.max_items = max_items
+        self._items: List[ReadinessResult] = []
+
+    def add(self, result: ReadinessResult) -> None:
+        self._items.append(result)
+        if len(self._items) > self.max_items:
+            del self._items[: len(self._items) - self.max_items]
+
+    def last(self) -> Optional[ReadinessResult]:
+        return self._items[-1] if self._items else None
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        by_type: Dict[str, List[ReadinessResult]] = {}
+        for r in self._items:
+            by_type.setdefault(r.page_type, []).append(r)
+        for page_type, items in by_type.items():
+            waits = sorted(r.waited_ms for r in items)
+            out[page_type] = {
+                "pages": len(items),
+                "timeouts": sum(1 for r in items if not r.ready),
+                "avgWaitMs": round(sum(waits) / len(waits), 1),
+                "p50WaitMs": waits[len(waits) // 2],
+                "maxWaitMs": waits[-1],
+            }
+        return out
+
+
+READINESS_LOG = ReadinessLog()
+
+
+# =========================
+# Engine
+# =========================
+
+def wait_until_ready(
+    page: Page,
+    page_type: str,
+    *,
+    url: Optional[str] = None,
+    timeout_ms: Optional[int] = None,
+) -> ReadinessResult:
+    """
+    Aguarda a condição de prontidão do tipo de página (ver CONDITIONS).
+
+    Parameters:
+        page (Page): página já navegada (ex.: goto com wait_until="domcontentloaded")
+        page_type (str): "search" ou "case"
+        url (str | None): apenas para registro
+        timeout_ms (int | None): sobrescreve o timeout da condição
+
+    Returns:
+        ReadinessResult: resultado com o tempo de espera observado
+
+    Raises:
+        KeyError: se page_type não tiver condição registrada
+    """
+    cond = CONDITIONS[page_type]
+    timeout = cond.timeout_ms if timeout_ms is None else timeout_ms
+
+    t0 = time.monotonic()
+    ready = True
+    reason = "selector"
+    try:
+        handle = page.wait_for_function(
+            cond.js_predicate,
+            arg=cond.arg,
+            timeout=timeout,
+            polling=cond.polling_ms,
+        )
+        if handle.json_value() == "empty":
+            reason = "empty"
+    except PlaywrightTimeoutError:
+        ready = False
+        reason = "timeout"
+        try:
+            page.wait_for_load_state("networkidle", timeout=cond.fallback_networkidle_ms)
+        except PlaywrightTimeoutError:
+            pass
+
+    result = ReadinessResult(
+        page_type=page_type,
+        url=url,
+        ready=ready,
+        reason=reason,
+        waited_ms=int((time.monotonic() - t0) * 1000),
+    )
+    READINESS_LOG.add(result)
+    return result
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import sys
 import time
 from datetime import datetime, timezone
 from pathlib import Path
@@ -12,6 +13,7 @@ from pymongo.collection import Collection
 from pymongo.errors import PyMongoError
 
 from a_load_configs import load_configs
+from a_page_readiness import ReadinessResult, wait_until_ready
 
 
 # ==============================================================================
@@ -62,15 +64,20 @@ def insert_raw_html(
     page_size: int,
     inteiro_teor_str: str,
     html_raw: str,
+    readiness: Optional[ReadinessResult] = None,
+    page: int = 1,
 ) -> str:
     doc = {
         "extractionTimestamp": datetime.now(timezone.utc),
         "queryString": query_string,
         "pageSize": str(page_size),
+        "page": int(page),
         "inteiroTeor": str_to_bool(inteiro_teor_str),
         "htmlRaw": html_raw,
         "status": "new",
     }
+    if readiness is not None:
+        doc["readiness"] = readiness.as_dict()
 
     _log("INFO", "Inserindo documento no MongoDB (raw_html)...")
     result = collection.insert_one(doc)
@@ -188,11 +195,13 @@ def build_target_url(
     url_scheme: str,
     url_netloc: str,
     url_path: str,
+    page: int = 1,
 ) -> str:
     dynamic_params = {
         "pesquisa_inteiro_teor": pesquisa_inteiro_teor,
         "pageSize": page_size,
         "queryString": query_string,
+        "page": page,
     }
 
     all_params = FIXED_QUERY_PARAMS.copy()
@@ -218,10 +227,14 @@ def scrape_and_insert_html(
     query_string: str,
     page_size: int,
     pesquisa_inteiro_teor: str,
+    page: int = 1,
 ) -> str:
     """
     Executa a pesquisa no STF, coleta o HTML e grava no MongoDB (raw_html).
     Retorna o _id inserido.
+
+    Coleta apenas a página `page`; a varredura de todas as páginas (total de
+    hits + busca paralela) fica em v-b33/k_unified_case_pipeline.crawl_search_pages.
     """
     total_steps = 5
     started_at = time.time()
@@ -233,10 +246,11 @@ def scrape_and_insert_html(
 
     _step(2, total_steps, "Exibindo parâmetros de busca")
     _log("INFO", f"URL alvo: {url}")
-    _log("INFO", f"query_string='{query_string}' | page_size={page_size} | inteiro_teor={pesquisa_inteiro_teor} | headed_mode={headed_mode}")
+    _log("INFO", f"query_string='{query_string}' | page_size={page_size} | page={page} | inteiro_teor={pesquisa_inteiro_teor} | headed_mode={headed_mode}")
 
     _step(3, total_steps, "Inicializando Playwright e navegando até a página de resultados")
     html: Optional[str] = None
+    ready: Optional[ReadinessResult] = None
     try:
         with sync_playwright() as pw:
             browser = pw.chromium.launch(
@@ -249,13 +263,14 @@ def scrape_and_insert_html(
                 locale=LOCALE,
             )
 
-            page = context.new_page()
-            _log("INFO", "Navegando (wait_until=networkidle)...")
-            page.goto(url, wait_until="networkidle")
-            _log("INFO", "Aguardando estabilização adicional (sleep=3s)...")
-            time.sleep(3)
+            browser_page = context.new_page()
+            _log("INFO", "Navegando (wait_until=domcontentloaded)...")
+            browser_page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+            _log("INFO", "Aguardando resultados estáveis (div.result-container)...")
+            ready = wait_until_ready(browser_page, "search", url=url)
+            _log("INFO", f"Página pronta | condição={ready.reason} | espera={ready.waited_ms} ms")
 
-            html = page.content()
+            html = browser_page.content()
             browser.close()
 
     except PlaywrightError as e:
@@ -280,6 +295,8 @@ def scrape_and_insert_html(
             page_size=page_size,
             inteiro_teor_str=pesquisa_inteiro_teor,
             html_raw=html,
+            readiness=ready,
+            page=page,
         )
     except PyMongoError as e:
         _log("ERROR", f"Falha ao inserir no MongoDB: {e}")
@@ -295,6 +312,9 @@ def scrape_and_insert_html(
 # ==============================================================================
 
 def main() -> None:
+    # Uso: python b_initial_query.py [page]   (default: 1)
+    page = max(1, _safe_int(sys.argv[1], 1)) if len(sys.argv) > 1 else 1
+
     _log("INFO", "Montando URL de pesquisa do STF...")
     url_alvo = build_target_url(
         query_string=DEFAULT_QUERY_STRING,
@@ -303,6 +323,7 @@ def main() -> None:
         url_scheme=DEFAULT_URL_SCHEME,
         url_netloc=DEFAULT_URL_NETLOC,
         url_path=DEFAULT_URL_PATH,
+        page=page,
     )
 
     inserted_id = scrape_and_insert_html(
@@ -311,6 +332,7 @@ def main() -> None:
         query_string=DEFAULT_QUERY_STRING,
         page_size=DEFAULT_PAGE_SIZE,
         pesquisa_inteiro_teor=DEFAULT_PESQUISA_INTEIRO_TEOR,
+        page=page,
     )
 
     _log("INFO", f"Execução finalizada com sucesso | _id={inserted_id}")